@@ -0,0 +1,98 @@
+from api.cache import bump_generations, get_generations, incr_counter
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+
+# Всё, что нужно проверкам прав из api/permissions.py.
+CACHED_USER_FIELDS = {"id", "username", "role", "is_staff", "is_active"}
+
+
+def user_cache_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def user_generation_key(user_id):
+    return f"auth:user:{user_id}:generation"
+
+
+def invalidate_user(user_id):
+    bump_generations(user_generation_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без запроса к БД на каждый запрос.
+
+    Минимальная запись пользователя хранится в общем кэше, а без него
+    (AUTH_USER_CACHE выключен) загружается на каждый запрос. Остальные
+    поля модели отложены, как после ``only()``: они догружаются при
+    обращении, а ``save()`` не затирает их пустыми значениями.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # from_db ждёт значения в порядке полей модели.
+        self.field_names = [
+            field.attname
+            for field in self.user_model._meta.concrete_fields
+            if field.attname in CACHED_USER_FIELDS
+        ]
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            )
+        if settings.AUTH_USER_CACHE:
+            values = self.get_cached_values(user_id)
+        else:
+            values = self.load_user_values(user_id)
+        user = self.user_model.from_db(
+            self.user_model.objects.db, self.field_names, values
+        )
+        if not user.is_active:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+        return user
+
+    def get_cached_values(self, user_id):
+        # Запись хранится вместе с поколением, при котором её прочитали
+        # из БД: запрос, начавшийся до сохранения пользователя, может
+        # записать старые значения уже после сброса, но с прежним
+        # поколением они не будут использованы.
+        key = user_cache_key(user_id)
+        generation_key = user_generation_key(user_id)
+        cached = cache.get_many([key, generation_key])
+        generation = cached.get(generation_key)
+        if generation is None:
+            generation = get_generations(generation_key)[0]
+        entry = cached.get(key)
+        if entry is not None and entry[0] == generation:
+            return entry[1]
+        # Попадания не считаются: лишний INCR на каждый запрос.
+        incr_counter("auth_misses")
+        values = self.load_user_values(user_id)
+        cache.set(
+            key, (generation, values), settings.AUTH_USER_CACHE_TIMEOUT
+        )
+        return values
+
+    def load_user_values(self, user_id):
+        values = (
+            self.user_model.objects.filter(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+            .values_list(*self.field_names)
+            .first()
+        )
+        if values is None:
+            raise AuthenticationFailed(
+                _("User not found"), code="user_not_found"
+            )
+        return values
@@ -0,0 +1,158 @@
+from api.cache import invalidate_titles
+from api.facets import record_change
+from api.serializers import TitleBulkItemSerializer
+from django.db import connection, transaction
+from rest_framework.relations import SlugRelatedField
+from reviews.models import Category, Genre, Title, TitleGenre, TitleStatistics
+
+BATCH_SIZE = 1000
+
+CREATED = "created"
+UPDATED = "updated"
+INVALID = "invalid"
+
+TITLE_FIELDS = ("name", "year", "description", "category")
+
+
+def does_not_exist(value):
+    return SlugRelatedField.default_error_messages["does_not_exist"].format(
+        slug_name="slug", value=value
+    )
+
+
+class TitleUpsert:
+    """Пакетная загрузка произведений.
+
+    Слаги жанров и категорий, существующие id и текущие связи с жанрами
+    читаются одним запросом на весь пакет; произведения и строки
+    TitleGenre пишутся пачками. Ошибка в элементе не мешает остальным.
+    """
+
+    def __init__(self, items):
+        self.items = items
+        self.results = [None] * len(items)
+
+    def run(self):
+        rows = self.validate()
+        with transaction.atomic():
+            titles = self.build_titles(rows)
+            self.save_titles(titles)
+            self.link_genres(titles)
+        ids = [title.id for _, title, _ in titles]
+        invalidate_titles(ids)
+        record_change(ids)
+        return self.results
+
+    def validate(self):
+        rows = []
+        for index, item in enumerate(self.items):
+            serializer = TitleBulkItemSerializer(data=item)
+            if serializer.is_valid():
+                rows.append((index, serializer.validated_data))
+            else:
+                self.fail(index, serializer.errors)
+        return rows
+
+    def fail(self, index, errors):
+        self.results[index] = {
+            "index": index,
+            "status": INVALID,
+            "errors": errors,
+        }
+
+    def build_titles(self, rows):
+        genres = dict(
+            Genre.objects.filter(
+                slug__in={slug for _, row in rows for slug in row["genre"]}
+            ).values_list("slug", "id")
+        )
+        categories = dict(
+            Category.objects.filter(
+                slug__in={row["category"] for _, row in rows}
+            ).values_list("slug", "id")
+        )
+        existing = set(
+            Title.objects.filter(
+                id__in={row["id"] for _, row in rows if "id" in row}
+            ).values_list("id", flat=True)
+        )
+        titles = []
+        for index, row in rows:
+            errors = self.check_row(row, genres, categories, existing)
+            if errors:
+                self.fail(index, errors)
+                continue
+            existing.discard(row.get("id"))
+            title = Title(
+                id=row.get("id"),
+                name=row["name"],
+                year=row["year"],
+                description=row["description"],
+                category_id=categories[row["category"]],
+            )
+            genre_ids = {genres[slug] for slug in row["genre"]}
+            titles.append((index, title, genre_ids))
+        return titles
+
+    @staticmethod
+    def check_row(row, genres, categories, existing):
+        errors = {}
+        if "id" in row and row["id"] not in existing:
+            # Повтор id в пакете тоже сюда: первое вхождение его забрало.
+            errors["id"] = [f"Произведение {row['id']} не найдено."]
+        missing = [slug for slug in row["genre"] if slug not in genres]
+        if missing:
+            errors["genre"] = [does_not_exist(slug) for slug in missing]
+        if row["category"] not in categories:
+            errors["category"] = [does_not_exist(row["category"])]
+        return errors
+
+    def save_titles(self, titles):
+        new = [title for _, title, _ in titles if title.id is None]
+        old = [title for _, title, _ in titles if title.id is not None]
+        statuses = {
+            index: UPDATED if title.id else CREATED
+            for index, title, _ in titles
+        }
+        if connection.features.can_return_ids_from_bulk_insert:
+            Title.objects.bulk_create(new, batch_size=BATCH_SIZE)
+            TitleStatistics.objects.bulk_create(
+                [TitleStatistics(title=title) for title in new],
+                batch_size=BATCH_SIZE,
+            )
+        else:
+            # Без RETURNING id новых строк не узнать, сохраняем по одной.
+            for title in new:
+                title.save(force_insert=True)
+        Title.objects.bulk_update(old, TITLE_FIELDS, batch_size=BATCH_SIZE)
+        for index, title, _ in titles:
+            self.results[index] = {
+                "index": index,
+                "status": statuses[index],
+                "id": title.id,
+            }
+
+    def link_genres(self, titles):
+        wanted = {
+            (title.id, genre_id)
+            for _, title, genre_ids in titles
+            for genre_id in genre_ids
+        }
+        current = TitleGenre.objects.filter(
+            title_id__in=[title.id for _, title, _ in titles]
+        ).values_list("id", "title_id", "genre_id")
+        stale = []
+        for pk, title_id, genre_id in current:
+            if (title_id, genre_id) in wanted:
+                wanted.discard((title_id, genre_id))
+            else:
+                stale.append(pk)
+        if stale:
+            TitleGenre.objects.filter(pk__in=stale).delete()
+        TitleGenre.objects.bulk_create(
+            [
+                TitleGenre(title_id=title_id, genre_id=genre_id)
+                for title_id, genre_id in wanted
+            ],
+            batch_size=BATCH_SIZE,
+        )
@@ -0,0 +1,175 @@
+import hashlib
+import math
+import time
+
+from api.replicas import reads_primary_after_write, used_replica
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+CACHE_PREFIX = "catalog"
+CACHE_HEADER = "X-Cache"
+
+
+def incr_counter(name, delta=1):
+    key = f"stats:{name}"
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        if cache.add(key, delta, timeout=None):
+            return delta
+        return cache.incr(key, delta)
+
+
+def get_counters(*names):
+    values = cache.get_many([f"stats:{name}" for name in names])
+    return {name: values.get(f"stats:{name}", 0) for name in names}
+
+
+def comment_count_key(review_id):
+    return f"count:comments:{review_id}"
+
+
+def comment_count(review):
+    """Число комментариев к отзыву из кэша; при промахе — COUNT(*).
+
+    Сигналы сдвигают закэшированное значение, а таймаут
+    COUNT_CACHE_TIMEOUT ограничивает расхождение из-за гонок.
+    """
+    key = comment_count_key(review.pk)
+    count = cache.get(key)
+    if count is None:
+        count = review.comments.count()
+        cache.add(key, count, settings.COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def shift_comment_count(review_id, delta):
+    def shift():
+        try:
+            cache.incr(comment_count_key(review_id), delta)
+        except ValueError:
+            pass
+
+    transaction.on_commit(shift)
+
+
+def generation_key(*parts):
+    return ":".join((CACHE_PREFIX, *map(str, parts), "generation"))
+
+
+def get_generations(*keys):
+    generations = cache.get_many(keys)
+    missing = [key for key in keys if key not in generations]
+    if missing:
+        # Поколение начинается со времени создания, а не с единицы:
+        # если ключ вытеснен из кэша, старые записи не оживут.
+        start = time.time_ns()
+        for key in missing:
+            cache.add(key, start, timeout=None)
+        generations.update(cache.get_many(missing))
+    return [generations.get(key, 0) for key in keys]
+
+
+def bump_generations(*keys):
+    def bump():
+        for key in keys:
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, time.time_ns(), timeout=None)
+
+    # Второй сброс после коммита убирает ответы, закэшированные
+    # параллельным запросом до фиксации транзакции.
+    bump()
+    transaction.on_commit(bump)
+
+
+def invalidate_title(title_id):
+    bump_generations(
+        generation_key("titles"), generation_key("titles", title_id)
+    )
+
+
+def invalidate_titles(title_ids):
+    bump_generations(
+        generation_key("titles"),
+        *(generation_key("titles", title_id) for title_id in title_ids),
+    )
+
+
+def invalidate_catalog(resource):
+    # Жанры и категории встроены в ответы о произведениях.
+    bump_generations(
+        generation_key(resource),
+        generation_key("titles"),
+        generation_key("titles", "related"),
+    )
+
+
+class CachedListMixin:
+    """Кэширует данные ответа list до изменения каталога."""
+
+    cache_resource = None
+
+    def get_cache_generations(self):
+        return get_generations(generation_key(self.cache_resource))
+
+    def get_cache_key(self, request):
+        query = "&".join(
+            f"{name}={value}"
+            for name, values in sorted(request.query_params.lists())
+            for value in values
+        )
+        digest = hashlib.md5(
+            f"{request.get_host()}{request.path}?{query}".encode("utf-8")
+        ).hexdigest()
+        generations = ".".join(map(str, self.get_cache_generations()))
+        return ":".join(
+            (CACHE_PREFIX, self.cache_resource, generations, digest)
+        )
+
+    def cached(self, handler, request, *args, **kwargs):
+        key = self.get_cache_key(request)
+        # Недавно писавший клиент не читает кэш: ответ в нём мог быть
+        # собран на реплике до его записи.
+        sticky = reads_primary_after_write()
+        data = None if sticky else cache.get(key)
+        if data is not None:
+            incr_counter("catalog_hits")
+            response = Response(data)
+            response[CACHE_HEADER] = "HIT"
+            return response
+        incr_counter("catalog_misses")
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            timeout = settings.CATALOG_CACHE_TIMEOUT
+            if used_replica():
+                # Реплика отстаёт не больше REPLICA_MAX_LAG, и столько же
+                # живёт собранный на ней ответ: старые данные не
+                # закрепятся за новым поколением кэша.
+                timeout = min(timeout, math.ceil(settings.REPLICA_MAX_LAG))
+            if timeout > 0:
+                cache.set(key, response.data, timeout)
+        response[CACHE_HEADER] = "BYPASS" if sticky else "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(super().list, request, *args, **kwargs)
+
+
+class CachedReadMixin(CachedListMixin):
+    """Дополнительно кэширует retrieve с точечной инвалидацией объекта."""
+
+    def get_cache_generations(self):
+        if self.action != "retrieve":
+            return super().get_cache_generations()
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        return get_generations(
+            generation_key(self.cache_resource, "related"),
+            generation_key(self.cache_resource, lookup),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register("caches", deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Поколения кэша, счётчики, корзины ограничений, коды
+    подтверждения и метрики должны быть видны всем воркерам."""
+    if settings.CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Warning(
+            "The default cache is local to each process.",
+            hint=(
+                "With several gunicorn workers set CACHE_BACKEND=redis "
+                "(infra/docker-compose.yaml does this)."
+            ),
+            id="api.W001",
+        )
+    ]
@@ -0,0 +1,107 @@
+import hashlib
+import hmac
+import logging
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+def create_confirm_code():
+    return "".join(
+        random.choices(
+            settings.CONFIRM_CODE_CHARS, k=settings.CONFIRM_CODE_LENGTH
+        )
+    )
+
+
+def code_key(username):
+    return f"confirm:{username}"
+
+
+def attempts_key(username):
+    return f"confirm:{username}:attempts"
+
+
+def code_hash(username, code):
+    return hmac.new(
+        settings.SECRET_KEY.encode("utf-8"),
+        f"{username}:{code}".encode("utf-8"),
+        hashlib.sha256,
+    ).hexdigest()
+
+
+def issue_code(user):
+    """Создаёт код подтверждения и сохраняет его хеш в кэше.
+
+    Строка пользователя меняется, только если кэш не общий для
+    воркеров (CONFIRM_CODE_IN_CACHE) или недоступен.
+    """
+    code = create_confirm_code()
+    if not settings.CONFIRM_CODE_IN_CACHE:
+        return save_fallback_code(user, code)
+    timeout = settings.CONFIRM_CODE_TTL
+    try:
+        cache.set_many(
+            {
+                code_key(user.username): code_hash(user.username, code),
+                attempts_key(user.username): 0,
+            },
+            timeout,
+        )
+    except Exception:
+        logger.exception("Confirmation code cache is unavailable")
+        return save_fallback_code(user, code)
+    if user.confirmation_code is not None:
+        # Старый код из базы больше не действует.
+        user.confirmation_code = None
+        user.save(update_fields=("confirmation_code",))
+    return code
+
+
+def save_fallback_code(user, code):
+    user.confirmation_code = code
+    user.save(update_fields=("confirmation_code",))
+    return code
+
+
+def check_code(user, code):
+    """Проверяет код; после успеха и после исчерпания попыток код
+    больше не принимается."""
+    if not settings.CONFIRM_CODE_IN_CACHE:
+        return check_fallback_code(user, code)
+    try:
+        return check_cached_code(user, code)
+    except Exception:
+        logger.exception("Confirmation code cache is unavailable")
+        return check_fallback_code(user, code)
+
+
+def check_cached_code(user, code):
+    username = user.username
+    stored = cache.get(code_key(username))
+    if stored is None:
+        return check_fallback_code(user, code)
+    try:
+        attempts = cache.incr(attempts_key(username))
+    except ValueError:
+        attempts = settings.CONFIRM_CODE_MAX_ATTEMPTS + 1
+    if attempts > settings.CONFIRM_CODE_MAX_ATTEMPTS:
+        cache.delete_many((code_key(username), attempts_key(username)))
+        return False
+    if not hmac.compare_digest(stored, code_hash(username, code)):
+        return False
+    cache.delete_many((code_key(username), attempts_key(username)))
+    return True
+
+
+def check_fallback_code(user, code):
+    stored = user.confirmation_code
+    if not stored or stored == settings.CONFIRM_CODE_STUB:
+        return False
+    # Код из базы, как и раньше, действует на одну попытку.
+    user.confirmation_code = settings.CONFIRM_CODE_STUB
+    user.save(update_fields=("confirmation_code",))
+    return hmac.compare_digest(stored, code)
@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.db import connections
+
+
+def check_connections(**kwargs):
+    """Закрывает постоянные соединения, которые перестали отвечать.
+
+    Соединение, простоявшее без запросов дольше
+    DB_HEALTH_CHECK_INTERVAL, проверяется до обработки запроса, чтобы
+    разрыв после перезапуска БД не превратился в ошибку 500.
+    """
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        released = getattr(connection, "released_at", None)
+        if (
+            released is not None
+            and now - released < settings.DB_HEALTH_CHECK_INTERVAL
+        ):
+            continue
+        if not connection.is_usable():
+            connection.close()
+
+
+def mark_released(**kwargs):
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is not None:
+            connection.released_at = now
+
+
+def pool_stats():
+    return {
+        connection.alias: connection.pool.stats()
+        for connection in connections.all()
+        if hasattr(connection, "pool")
+    }
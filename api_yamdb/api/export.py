@@ -0,0 +1,158 @@
+import csv
+import io
+import zlib
+from itertools import islice
+
+from api.readers import CommentReader, ReviewReader, TitleReader
+from api.renderers import FastJSONRenderer
+from django.conf import settings
+from django.db.models import prefetch_related_objects
+from reviews.models import Comment, Review, Title
+
+NDJSON = "ndjson"
+CSV = "csv"
+CONTENT_TYPES = {
+    NDJSON: "application/x-ndjson; charset=utf-8",
+    CSV: "text/csv; charset=utf-8",
+}
+# Размер блока, который отдаётся клиенту или сжимается за раз.
+BUFFER_SIZE = 64 * 1024
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def export_titles(filters, chunk_size):
+    titles = (
+        Title.objects.filter(**filters)
+        .select_related("category")
+        .order_by("id")
+        .iterator(chunk_size=chunk_size)
+    )
+    reader = TitleReader()
+    # iterator() не выполняет prefetch_related, поэтому жанры
+    # подгружаются отдельным запросом на каждую пачку.
+    for chunk in chunked(titles, chunk_size):
+        prefetch_related_objects(chunk, "genre")
+        for title in chunk:
+            yield reader.to_representation(title)
+
+
+def export_reviews(filters, chunk_size):
+    reader = ReviewReader()
+    for review in (
+        Review.objects.filter(**filters)
+        .select_related("author")
+        .order_by("id")
+        .iterator(chunk_size=chunk_size)
+    ):
+        row = reader.to_representation(review)
+        row["title"] = review.title_id
+        yield row
+
+
+def export_comments(filters, chunk_size):
+    reader = CommentReader()
+    for comment in (
+        Comment.objects.filter(**filters)
+        .select_related("author")
+        .order_by("id")
+        .iterator(chunk_size=chunk_size)
+    ):
+        row = reader.to_representation(comment)
+        row["review"] = comment.review_id
+        yield row
+
+
+# Ресурс -> (колонки CSV, выгрузка, фильтры по произведению и категории).
+EXPORTS = {
+    "titles": (
+        ("id", "name", "year", "genre", "category", "rating", "description"),
+        export_titles,
+        "id",
+        "category__slug",
+    ),
+    "reviews": (
+        ("id", "title", "text", "author", "score", "pub_date"),
+        export_reviews,
+        "title_id",
+        "title__category__slug",
+    ),
+    "comments": (
+        ("id", "review", "text", "author", "pub_date"),
+        export_comments,
+        "review__title_id",
+        "review__title__category__slug",
+    ),
+}
+
+
+def encode_ndjson(rows):
+    renderer = FastJSONRenderer()
+    for row in rows:
+        yield renderer.render(row) + b"\n"
+
+
+def flatten(value):
+    # Вложенные жанры и категория в CSV записываются слагами.
+    if isinstance(value, dict):
+        return value["slug"]
+    if isinstance(value, list):
+        return ",".join(map(flatten, value))
+    return value
+
+
+def encode_csv(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([flatten(row[column]) for column in columns])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def buffered(chunks, size=BUFFER_SIZE):
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        if len(buffer) >= size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def gzipped(chunks):
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_stream(
+    resource, output=NDJSON, title=None, category=None, compress=False
+):
+    """Поток байтов выгрузки; память не зависит от объёма данных."""
+    columns, export, title_lookup, category_lookup = EXPORTS[resource]
+    filters = {}
+    if title is not None:
+        filters[title_lookup] = title
+    if category is not None:
+        filters[category_lookup] = category
+    rows = export(filters, settings.EXPORT_CHUNK_SIZE)
+    if output == CSV:
+        chunks = encode_csv(columns, rows)
+    else:
+        chunks = encode_ndjson(rows)
+    chunks = buffered(chunks)
+    return gzipped(chunks) if compress else chunks
@@ -0,0 +1,342 @@
+import threading
+from collections import defaultdict
+
+from api.cache import generation_key, get_generations
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from reviews.models import Category, Genre, Title, TitleGenre
+
+FACETS_QUERY_PARAM = "facets"
+FACET_FIELDS = ("genre", "category", "year")
+FACETS_GENERATION = generation_key("facets")
+# Запись об изменении, после которой индекс строится заново.
+REBUILD = "rebuild"
+# Если запрос содержит только эти параметры, count страницы берётся из
+# индекса.
+INDEX_COUNT_PARAMS = frozenset(
+    (FACETS_QUERY_PARAM, *FACET_FIELDS)
+    + ("limit", "offset", "ordering", "count", "pagination", "format")
+)
+
+# Номера установленных битов для каждого значения байта.
+BYTE_BITS = tuple(
+    tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)
+)
+popcount = getattr(int, "bit_count", lambda bitmap: bin(bitmap).count("1"))
+
+
+def bitmap(ids):
+    ids = list(ids)
+    if not ids:
+        return 0
+    data = bytearray(max(ids) // 8 + 1)
+    for pk in ids:
+        data[pk >> 3] |= 1 << (pk & 7)
+    return int.from_bytes(data, "little")
+
+
+def bitmap_ids(bitmap):
+    ids = []
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for offset, byte in enumerate(data):
+        if byte:
+            ids.extend(offset * 8 + bit for bit in BYTE_BITS[byte])
+    return ids
+
+
+def split_values(request, name):
+    return [
+        value.strip()
+        for raw in request.query_params.getlist(name)
+        for value in raw.split(",")
+        if value.strip()
+    ]
+
+
+class FacetIndex:
+    """Битовые карты id произведений по жанрам, категориям и годам.
+
+    Бит с номером id установлен, если произведение попадает в значение
+    фасета, поэтому пересечение фильтров — это ``&`` целых чисел, а
+    число произведений — подсчёт битов. Жанры и категории хранятся по
+    id, слаги разрешаются по словарям, построенным вместе с индексом.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.generation = None
+
+    def rebuild(self, generation):
+        # Индекс читает основную базу: отставшая реплика закрепила бы
+        # старые данные за новым поколением.
+        genres = dict(
+            Genre.objects.using(DEFAULT_DB_ALIAS).values_list("slug", "id")
+        )
+        categories = dict(
+            Category.objects.using(DEFAULT_DB_ALIAS).values_list("slug", "id")
+        )
+        titles = {}
+        ids = defaultdict(lambda: defaultdict(list))
+        for pk, category, year in Title.objects.using(
+            DEFAULT_DB_ALIAS
+        ).values_list("id", "category_id", "year").iterator():
+            titles[pk] = [category, year, set()]
+            ids["category"][category].append(pk)
+            ids["year"][year].append(pk)
+        for title, genre in TitleGenre.objects.using(
+            DEFAULT_DB_ALIAS
+        ).values_list("title_id", "genre_id").iterator():
+            titles[title][2].add(genre)
+            ids["genre"][genre].append(title)
+        self.genre_ids = genres
+        self.category_ids = categories
+        self.genre_slugs = {pk: slug for slug, pk in genres.items()}
+        self.category_slugs = {pk: slug for slug, pk in categories.items()}
+        self.titles = titles
+        self.all = bitmap(titles)
+        self.bitmaps = {
+            name: {
+                value: bitmap(pks) for value, pks in ids[name].items()
+            }
+            for name in FACET_FIELDS
+        }
+        self.generation = generation
+
+    def add(self, name, value, pk):
+        bitmaps = self.bitmaps[name]
+        bitmaps[value] = bitmaps.get(value, 0) | 1 << pk
+
+    def discard(self, name, value, pk):
+        bitmaps = self.bitmaps[name]
+        remaining = bitmaps.get(value, 0) & ~(1 << pk)
+        if remaining:
+            bitmaps[value] = remaining
+        else:
+            bitmaps.pop(value, None)
+
+    def reload(self, ids):
+        """Перечитывает из базы произведения с этими id. Возвращает
+        False, если они ссылаются на жанр или категорию, которых в
+        индексе нет."""
+        titles = {
+            pk: [category, year, set()]
+            for pk, category, year in Title.objects.using(DEFAULT_DB_ALIAS)
+            .filter(pk__in=ids)
+            .values_list("id", "category_id", "year")
+        }
+        for title, genre in (
+            TitleGenre.objects.using(DEFAULT_DB_ALIAS)
+            .filter(title_id__in=titles)
+            .values_list("title_id", "genre_id")
+        ):
+            titles[title][2].add(genre)
+        for category, year, genres in titles.values():
+            if category is not None and category not in self.category_slugs:
+                return False
+            if not genres <= self.genre_slugs.keys():
+                return False
+        for pk in ids:
+            self.delete_title(pk)
+        for pk, title in titles.items():
+            category, year, genres = title
+            self.titles[pk] = title
+            self.add("category", category, pk)
+            self.add("year", year, pk)
+            for genre in genres:
+                self.add("genre", genre, pk)
+            self.all |= 1 << pk
+        return True
+
+    def delete_title(self, pk):
+        title = self.titles.pop(pk, None)
+        if title is None:
+            return
+        category, year, genres = title
+        self.discard("category", category, pk)
+        self.discard("year", year, pk)
+        for genre in genres:
+            self.discard("genre", genre, pk)
+        self.all &= ~(1 << pk)
+
+    def union(self, name, values):
+        result = 0
+        for value in values:
+            result |= self.bitmaps[name].get(value, 0)
+        return result
+
+    def select(self, genres, categories, years):
+        """Битовые карты каждого фильтра: жанры должны быть все сразу,
+        из категорий и годов достаточно одного значения."""
+        genre = self.all
+        for slug in genres:
+            genre &= self.bitmaps["genre"].get(self.genre_ids.get(slug), 0)
+        category = self.all
+        if categories:
+            category = self.union(
+                "category",
+                (
+                    self.category_ids[slug]
+                    for slug in categories
+                    if slug in self.category_ids
+                ),
+            )
+        year = self.union("year", years) if years else self.all
+        return genre, category, year
+
+    def counts(self, names, genre, category, year):
+        """Для каждого значения фасета — сколько произведений окажется в
+        выдаче, если выбрать и его. Для категорий и годов фильтр самого
+        фасета не учитывается, потому что их значения объединяются."""
+        selected = genre & category & year
+        bases = {
+            "genre": (selected, self.genre_slugs.get),
+            "category": (genre & year, self.category_slugs.get),
+            "year": (genre & category, str),
+        }
+        result = {}
+        for name in names:
+            base, label = bases[name]
+            counts = {}
+            for value, values in self.bitmaps[name].items():
+                count = popcount(base & values)
+                if count and value is not None:
+                    counts[label(value)] = count
+            result[name] = dict(
+                sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+            )
+        return result
+
+
+_index = FacetIndex()
+
+
+def change_key(generation):
+    return f"facets:change:{generation}"
+
+
+def catch_up(index, generation):
+    """Применяет к индексу изменения, записанные другими процессами
+    после его поколения. False — записей нет или их слишком много,
+    индекс нужно перестроить."""
+    if index.generation is None:
+        return False
+    behind = generation - index.generation
+    if not 0 < behind <= settings.FACET_MAX_CHANGES:
+        return False
+    keys = [
+        change_key(number)
+        for number in range(index.generation + 1, generation + 1)
+    ]
+    changes = cache.get_many(keys)
+    if len(changes) != len(keys):
+        return False
+    ids = set()
+    for change in changes.values():
+        if change == REBUILD:
+            return False
+        ids.update(change)
+    if len(ids) > settings.FACET_MAX_IDS or not index.reload(ids):
+        return False
+    index.generation = generation
+    return True
+
+
+def get_index():
+    """Индекс и поколение фасетов в общем кэше на момент запроса.
+
+    Индекс строится при первом обращении, изменения из других
+    процессов догоняет по записям в кэше и перестраивается, только
+    если их не хватает.
+    """
+    (generation,) = get_generations(FACETS_GENERATION)
+    if _index.generation != generation:
+        with _index.lock:
+            if _index.generation != generation and not catch_up(
+                _index, generation
+            ):
+                _index.rebuild(generation)
+    return _index, generation
+
+
+def record_change(ids):
+    """После коммита сдвигает общее поколение фасетов и записывает,
+    какие произведения изменились (или REBUILD)."""
+
+    def record():
+        try:
+            generation = cache.incr(FACETS_GENERATION)
+        except ValueError:
+            # Поколения нет — все процессы и так перестроят индекс.
+            return
+        cache.set(
+            change_key(generation), change, settings.FACET_CHANGE_TIMEOUT
+        )
+
+    change = REBUILD if ids == REBUILD else sorted(ids)
+    transaction.on_commit(record)
+
+
+def invalidate_facets():
+    record_change(REBUILD)
+
+
+class FacetFilterBackend(BaseFilterBackend):
+    """Фасетный режим списка произведений: ``?facets=genre,category``.
+
+    Фильтры ``genre`` (все перечисленные жанры), ``category`` и ``year``
+    (любое из значений) считает индекс, а в ответ добавляются счётчики
+    по фасетам. Остальные фильтры и сортировка выполняются в SQL.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if FACETS_QUERY_PARAM not in request.query_params:
+            return queryset
+        names = [
+            name
+            for name in split_values(request, FACETS_QUERY_PARAM)
+            if name in FACET_FIELDS
+        ] or list(FACET_FIELDS)
+        genres = split_values(request, "genre")
+        categories = split_values(request, "category")
+        try:
+            years = [int(year) for year in split_values(request, "year")]
+        except ValueError:
+            raise ValidationError({"year": ["Введите число."]})
+        index, generation = get_index()
+        with index.lock:
+            selection = index.select(genres, categories, years)
+            view.facet_counts = index.counts(names, *selection)
+            selected = selection[0] & selection[1] & selection[2]
+            # Пока запрос ждал блокировку, индекс мог уйти к другому
+            # поколению; тогда строки и count берутся из SQL.
+            current = index.generation == generation
+            if current and INDEX_COUNT_PARAMS.issuperset(
+                request.query_params
+            ):
+                view.facet_total = popcount(selected)
+            if not (genres or categories or years):
+                return queryset
+            if current and popcount(selected) <= settings.FACET_MAX_IDS:
+                return queryset.filter(pk__in=bitmap_ids(selected))
+        # Длинный список id дороже, чем те же условия в SQL.
+        for slug in genres:
+            queryset = queryset.filter(genre__slug=slug)
+        if categories:
+            queryset = queryset.filter(category__slug__in=categories)
+        if years:
+            queryset = queryset.filter(year__in=years)
+        return queryset
+
+
+class FacetResponseMixin:
+    """Добавляет к странице списка счётчики из FacetFilterBackend."""
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        facet_counts = getattr(self, "facet_counts", None)
+        if facet_counts is not None:
+            response.data["facets"] = facet_counts
+        return response
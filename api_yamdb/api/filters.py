@@ -1,11 +1,43 @@
+from api.facets import FACET_FIELDS, FACETS_QUERY_PARAM
 from django_filters import rest_framework as rest_framework_filters
 from reviews.models import Title
+from reviews.search import search_titles
+
+# Поле модели -> имя в параметре ``ordering``.
+TITLE_ORDERING_FIELDS = {
+    "rating_avg": "rating",
+    "year": "year",
+    "review_count": "review_count",
+    "name": "name",
+}
+
+
+class StableOrderingFilter(rest_framework_filters.OrderingFilter):
+    """Добавляет id последним ключом, чтобы страницы не перемешивались."""
+
+    def filter(self, qs, value):
+        qs = super().filter(qs, value)
+        if not value:
+            return qs
+        return qs.order_by(*qs.query.order_by, "id")
 
 
 class TitleFilter(rest_framework_filters.FilterSet):
+    search = rest_framework_filters.CharFilter(method="filter_search")
     category = rest_framework_filters.CharFilter(field_name="category__slug")
     genre = rest_framework_filters.CharFilter(field_name="genre__slug")
+    ordering = StableOrderingFilter(fields=TITLE_ORDERING_FIELDS)
 
     class Meta:
         model = Title
         fields = "__all__"
+
+    def filter_queryset(self, queryset):
+        if FACETS_QUERY_PARAM in self.data:
+            # Жанр, категорию и год уже отфильтровал FacetFilterBackend.
+            for name in FACET_FIELDS:
+                self.form.cleaned_data.pop(name, None)
+        return super().filter_queryset(queryset)
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
@@ -0,0 +1,307 @@
+import os
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from api.cache import get_counters, incr_counter
+from api.connections import pool_stats
+from api.throttling import rejection_counters
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+# Границы корзин гистограммы задержки, секунды.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SERIES_KEY = "metrics:series"
+MICROSECONDS = 1000000
+
+_local = threading.local()
+
+
+class RequestMetrics:
+    """Замеры одного запроса; подробные — только для выборки."""
+
+    def __init__(self, sampled):
+        self.sampled = sampled
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+    def server_timing(self, duration):
+        timings = [f"app;dur={duration * 1000:.1f}"]
+        if self.sampled:
+            timings.append(
+                f"db;dur={self.db_time * 1000:.1f};"
+                f'desc="{self.queries} queries"'
+            )
+            timings.append(f"ser;dur={self.serializer_time * 1000:.1f}")
+        return ", ".join(timings)
+
+
+@contextmanager
+def serializer_timer():
+    metrics = getattr(_local, "current", None)
+    if metrics is None or not metrics.sampled:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_time += time.perf_counter() - started
+
+
+class Registry:
+    """Счётчики процесса, периодически сбрасываемые в общий кэш.
+
+    Каждый запрос меняет только словарь в памяти; раз в
+    METRICS_FLUSH_INTERVAL секунд накопленные приращения переносятся
+    в кэш, откуда их читает /metrics любого воркера.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = Counter()
+        self.series = set()
+        self.flushed_at = time.monotonic()
+
+    def observe(self, route, method, duration, metrics, size):
+        labels = f"{route}|{method}"
+        bucket = next(
+            (str(bound) for bound in BUCKETS if duration <= bound), "+Inf"
+        )
+        with self.lock:
+            pending = self.pending
+            pending[f"bucket|{labels}|{bucket}"] += 1
+            pending[f"duration|{labels}"] += int(duration * MICROSECONDS)
+            pending[f"requests|{labels}"] += 1
+            pending[f"bytes|{labels}"] += size
+            if metrics.sampled:
+                pending[f"sampled|{labels}"] += 1
+                pending[f"queries|{labels}"] += metrics.queries
+                pending[f"db|{labels}"] += int(metrics.db_time * MICROSECONDS)
+                pending[f"serializer|{labels}"] += int(
+                    metrics.serializer_time * MICROSECONDS
+                )
+            due = (
+                time.monotonic() - self.flushed_at
+                >= settings.METRICS_FLUSH_INTERVAL
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+            self.flushed_at = time.monotonic()
+        for key, value in pending.items():
+            if value:
+                incr_counter(f"metrics:{key}", value)
+        self.series.update(pending)
+        known = cache.get(SERIES_KEY) or set()
+        if not self.series <= known:
+            # Гонка между воркерами не страшна: недостающие ряды
+            # допишет следующий сброс.
+            cache.set(SERIES_KEY, known | self.series, timeout=None)
+
+    def collect(self):
+        self.flush()
+        series = sorted(cache.get(SERIES_KEY) or ())
+        values = get_counters(*(f"metrics:{key}" for key in series))
+        return {key: values[f"metrics:{key}"] for key in series}
+
+
+registry = Registry()
+
+
+def route_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None or not match.url_name:
+        return "unmatched"
+    return match.view_name
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        metrics = RequestMetrics(
+            random.random() < settings.METRICS_SAMPLE_RATE
+        )
+        _local.current = metrics
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                if metrics.sampled:
+                    for connection in connections.all():
+                        stack.enter_context(
+                            connection.execute_wrapper(metrics.execute)
+                        )
+                response = self.get_response(request)
+        finally:
+            _local.current = None
+        duration = time.perf_counter() - started
+        size = 0 if response.streaming else len(response.content)
+        registry.observe(
+            route_name(request), request.method, duration, metrics, size
+        )
+        if settings.METRICS_SERVER_TIMING:
+            response["Server-Timing"] = metrics.server_timing(duration)
+        return response
+
+
+def process_label():
+    # С кэшем внутри процесса /metrics видит только счётчики ответившего
+    # воркера; с меткой pid ряды разных воркеров не смешиваются, и смена
+    # воркера между опросами не выглядит как сброс счётчика.
+    if settings.CACHE_IS_SHARED:
+        return ""
+    return f',pid="{os.getpid()}"'
+
+
+def label_text(labels):
+    route, method = labels.split("|")
+    return f'route="{route}",method="{method}"{process_label()}'
+
+
+def render_histogram(lines, values):
+    lines += [
+        "# HELP yamdb_request_duration_seconds Request latency by route.",
+        "# TYPE yamdb_request_duration_seconds histogram",
+    ]
+    buckets = {}
+    for key, value in values.items():
+        kind, rest = key.split("|", 1)
+        if kind == "bucket":
+            labels, bound = rest.rsplit("|", 1)
+            buckets.setdefault(labels, Counter())[bound] = value
+    for labels, counts in sorted(buckets.items()):
+        total = 0
+        for bound in (*map(str, BUCKETS), "+Inf"):
+            total += counts[bound]
+            lines.append(
+                f"yamdb_request_duration_seconds_bucket"
+                f'{{{label_text(labels)},le="{bound}"}} {total}'
+            )
+        lines.append(
+            f"yamdb_request_duration_seconds_sum{{{label_text(labels)}}} "
+            f"{values.get(f'duration|{labels}', 0) / MICROSECONDS}"
+        )
+        lines.append(
+            f"yamdb_request_duration_seconds_count{{{label_text(labels)}}} "
+            f"{values.get(f'requests|{labels}', 0)}"
+        )
+
+
+COUNTERS = (
+    ("bytes", "yamdb_response_bytes_total", "Response body size.", 1),
+    ("sampled", "yamdb_sampled_requests_total", "Sampled requests.", 1),
+    (
+        "queries",
+        "yamdb_db_queries_total",
+        "Database queries in sampled requests.",
+        1,
+    ),
+    (
+        "db",
+        "yamdb_db_duration_seconds_total",
+        "Database time in sampled requests.",
+        MICROSECONDS,
+    ),
+    (
+        "serializer",
+        "yamdb_serializer_duration_seconds_total",
+        "Serializer time in sampled requests.",
+        MICROSECONDS,
+    ),
+)
+
+
+POOL_METRICS = (
+    ("size", "yamdb_db_pool_size", "Pool capacity.", "gauge"),
+    ("used", "yamdb_db_pool_used", "Connections checked out.", "gauge"),
+    ("idle", "yamdb_db_pool_idle", "Idle connections in the pool.", "gauge"),
+    (
+        "checkouts",
+        "yamdb_db_pool_checkouts_total",
+        "Connections taken from the pool.",
+        "counter",
+    ),
+    (
+        "timeouts",
+        "yamdb_db_pool_timeouts_total",
+        "Checkouts that gave up waiting.",
+        "counter",
+    ),
+    (
+        "wait_seconds",
+        "yamdb_db_pool_wait_seconds_total",
+        "Time spent waiting for a connection.",
+        "counter",
+    ),
+)
+
+
+def render_pools(lines):
+    # Пул у каждого процесса свой: значения относятся к воркеру,
+    # который ответил на запрос /metrics.
+    pools = pool_stats()
+    if not pools:
+        return
+    pid = os.getpid()
+    for key, name, help_text, kind in POOL_METRICS:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for alias, stats in sorted(pools.items()):
+            lines.append(f'{name}{{alias="{alias}",pid="{pid}"}} {stats[key]}')
+
+
+def render_rejections(lines):
+    name = "yamdb_rejected_requests_total"
+    lines += [
+        f"# HELP {name} Requests rejected by throttles and load shedding.",
+        f"# TYPE {name} counter",
+    ]
+    for reason, value in sorted(rejection_counters().items()):
+        lines.append(f'{name}{{reason="{reason}"{process_label()}}} {value}')
+
+
+def render_metrics(values):
+    lines = []
+    render_histogram(lines, values)
+    render_pools(lines)
+    render_rejections(lines)
+    for kind, name, help_text, scale in COUNTERS:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for key, value in values.items():
+            if key.startswith(f"{kind}|"):
+                labels = key.split("|", 1)[1]
+                value = value if scale == 1 else value / scale
+                lines.append(f"{name}{{{label_text(labels)}}} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    """Метрики Prometheus. Без METRICS_TOKEN отдаются только при DEBUG."""
+    token = settings.METRICS_TOKEN
+    if not token and not settings.DEBUG:
+        return HttpResponseForbidden()
+    if token and request.META.get("HTTP_AUTHORIZATION") != f"Bearer {token}":
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render_metrics(registry.collect()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
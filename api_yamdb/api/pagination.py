@@ -0,0 +1,365 @@
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+from collections import OrderedDict
+from functools import reduce
+from operator import or_
+
+from api.filters import TITLE_ORDERING_FIELDS
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.template import loader
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+FALSE_VALUES = ("false", "0", "no")
+# Откуда взят count страницы.
+EXACT, MAINTAINED, ESTIMATED = "exact", "maintained", "estimated"
+
+
+def estimate_count(queryset):
+    """Число строк по оценке планировщика или None, если СУБД её не даёт."""
+    if not isinstance(queryset, QuerySet):
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.order_by().query.get_compiler(
+        using=queryset.db
+    ).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class OffsetPagination(LimitOffsetPagination):
+    """limit/offset, где ``count`` не обязательно стоит COUNT(*).
+
+    Число записей берётся из счётчика, который поддерживает
+    представление (метод ``get_maintained_count``), для выборок больше
+    COUNT_ESTIMATE_THRESHOLD — из оценки планировщика (тогда в ответе
+    есть ``count_estimated``), а с ``?count=false`` не считается вовсе.
+    Есть ли следующая страница, видно по лишней записи, а не по count:
+    счётчик и оценка могут отставать, поэтому пустую страницу без
+    запроса отдаёт только точный COUNT(*).
+    """
+
+    max_limit = settings.PAGINATION_MAX_LIMIT
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        self.request = request
+        self.count, self.count_source = self.get_page_count(
+            queryset, request, view
+        )
+        if self.count_source == EXACT:
+            if self.count == 0 or self.offset > self.count:
+                self.has_more = False
+                return []
+        page = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_more = len(page) > self.limit
+        if self.template is not None and (self.has_more or self.offset):
+            self.display_page_controls = True
+        return page[:self.limit]
+
+    def get_page_count(self, queryset, request, view):
+        requested = request.query_params.get(self.count_query_param, "")
+        if requested.lower() in FALSE_VALUES:
+            return None, None
+        maintained = getattr(view, "get_maintained_count", None)
+        count = maintained() if maintained else None
+        if count is not None:
+            return count, MAINTAINED
+        estimate = estimate_count(queryset)
+        if (
+            estimate is not None
+            and estimate >= settings.COUNT_ESTIMATE_THRESHOLD
+        ):
+            return estimate, ESTIMATED
+        return self.get_count(queryset), EXACT
+
+    def get_paginated_response(self, data):
+        fields = [
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]
+        if self.count is not None:
+            if self.count_source == ESTIMATED:
+                fields.insert(0, ("count_estimated", True))
+            fields.insert(0, ("count", self.count))
+        return Response(OrderedDict(fields))
+
+    def get_next_link(self):
+        if not self.has_more:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        offset = self.offset + self.limit
+        return replace_query_param(url, self.offset_query_param, offset)
+
+    def get_html_context(self):
+        if self.count_source in (EXACT, MAINTAINED):
+            return super().get_html_context()
+        # Без точного count номера страниц не посчитать.
+        return {
+            "previous_url": self.get_previous_link(),
+            "next_url": self.get_next_link(),
+            "page_links": [],
+        }
+
+
+class KeysetPagination(BasePagination):
+    """Пагинация по ключу сортировки вместо OFFSET.
+
+    Курсор хранит значения полей ``ordering`` крайней записи страницы,
+    поэтому следующая страница выбирается условием по индексу, а не
+    пропуском уже показанных строк. Последнее поле ``ordering`` должно
+    быть уникальным.
+    """
+
+    ordering = None
+    cursor_query_param = "cursor"
+    limit_query_param = "limit"
+    default_limit = api_settings.PAGE_SIZE
+    max_limit = settings.PAGINATION_MAX_LIMIT
+    invalid_cursor_message = _("Invalid cursor")
+    template = "rest_framework/pagination/previous_and_next.html"
+    display_page_controls = True
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.fields = [
+            queryset.model._meta.get_field(name.lstrip("-"))
+            for name in self.ordering
+        ]
+        position, self.reverse = self.decode_cursor(request)
+        self.has_cursor = position is not None
+        ordering = self.ordering
+        if self.reverse:
+            ordering = [self.invert(name) for name in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, position))
+        page = list(queryset[:self.limit + 1])
+        self.has_more = len(page) > self.limit
+        page = page[:self.limit]
+        if self.reverse:
+            page.reverse()
+        self.page = page
+        return page
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        if limit <= 0:
+            return self.default_limit
+        return min(limit, self.max_limit)
+
+    @staticmethod
+    def invert(name):
+        return name[1:] if name.startswith("-") else f"-{name}"
+
+    def after(self, ordering, position):
+        # (a, b) > (x, y) раскрывается в a > x OR (a = x AND b > y);
+        # дополнительное условие a >= x позволяет СУБД сразу ограничить
+        # диапазон составного индекса.
+        conditions = []
+        for index, name in enumerate(ordering):
+            field = name.lstrip("-")
+            lookup = "lt" if name.startswith("-") else "gt"
+            equal = {
+                previous.lstrip("-"): position[previous_index]
+                for previous_index, previous in enumerate(ordering[:index])
+            }
+            conditions.append(
+                Q(**equal, **{f"{field}__{lookup}": position[index]})
+            )
+        first = ordering[0]
+        bound = "lte" if first.startswith("-") else "gte"
+        return reduce(or_, conditions) & Q(
+            **{f"{first.lstrip('-')}__{bound}": position[0]}
+        )
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(b64decode(encoded.encode("ascii")))
+            values = data["v"]
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [
+                field.to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+            return position, bool(data.get("r"))
+        except (
+            BinasciiError,
+            KeyError,
+            TypeError,
+            UnicodeError,
+            ValueError,
+            ValidationError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse):
+        data = {
+            "v": [field.value_to_string(instance) for field in self.fields]
+        }
+        if reverse:
+            data["r"] = 1
+        encoded = b64encode(json.dumps(data).encode("utf-8")).decode("ascii")
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.page or not (self.has_more or self.reverse):
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.page:
+            return None
+        if not (self.has_more if self.reverse else self.has_cursor):
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "previous": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+    def to_html(self):
+        template = loader.get_template(self.template)
+        context = {
+            "previous_url": self.get_previous_link(),
+            "next_url": self.get_next_link(),
+        }
+        return template.render(context)
+
+
+class KeysetOrOffsetPagination(BasePagination):
+    """Offset-пагинация по умолчанию и keyset-пагинация по запросу.
+
+    Клиент включает keyset-режим параметром ``?pagination=cursor``;
+    ссылки ``next``/``previous`` сохраняют его вместе с курсором.
+    """
+
+    mode_query_param = "pagination"
+    keyset_mode = "cursor"
+    ordering = None
+    # Имя в параметре ``ordering`` -> поле модели без NULL.
+    ordering_query_param = "ordering"
+    ordering_fields = {}
+    # Параметры со своим порядком строк, который курсор не сохранит.
+    offset_only_params = ()
+
+    def get_paginator(self, request):
+        keyset = (
+            request.query_params.get(self.mode_query_param)
+            == self.keyset_mode
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+        if not keyset:
+            return OffsetPagination()
+        for name in self.offset_only_params:
+            if name in request.query_params:
+                raise exceptions.ValidationError(
+                    {
+                        self.mode_query_param: [
+                            f"Параметр {name} несовместим "
+                            f"с pagination={self.keyset_mode}."
+                        ]
+                    }
+                )
+        paginator = KeysetPagination()
+        paginator.ordering = self.get_ordering(request)
+        return paginator
+
+    def get_ordering(self, request):
+        requested = request.query_params.get(self.ordering_query_param)
+        if not requested:
+            return self.ordering
+        ordering = []
+        for name in requested.split(","):
+            name = name.strip()
+            field = self.ordering_fields.get(name.lstrip("-"))
+            if field is None:
+                return self.ordering
+            ordering.append(f"-{field}" if name.startswith("-") else field)
+        # Тот же последний ключ, что добавляет StableOrderingFilter.
+        ordering.append("id")
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.get_paginator(request)
+        self.display_page_controls = self.paginator.display_page_controls
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return OffsetPagination().get_paginated_response_schema(schema)
+
+    def get_schema_fields(self, view):
+        return OffsetPagination().get_schema_fields(view)
+
+    def get_schema_operation_parameters(self, view):
+        return OffsetPagination().get_schema_operation_parameters(view)
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+
+class TitlePagination(KeysetOrOffsetPagination):
+    ordering = ("name", "id")
+    ordering_fields = {
+        name: field for field, name in TITLE_ORDERING_FIELDS.items()
+    }
+    # Результаты поиска отсортированы по релевантности.
+    offset_only_params = ("search",)
+
+
+class PublicationPagination(KeysetOrOffsetPagination):
+    ordering = ("-pub_date", "-id")
+
+
+class UserPagination(KeysetOrOffsetPagination):
+    ordering = ("username",)
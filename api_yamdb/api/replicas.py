@@ -0,0 +1,176 @@
+import hashlib
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# Подписанная cookie «недавно писал»: работает и без общего кэша.
+STICKY_COOKIE = "yamdb_primary"
+# Запросы к представлениям этих модулей читают с реплик.
+REPLICA_VIEW_MODULES = ("api.views",)
+
+PRIMARY_LAG_SQL = {
+    # На простаивающем мастере время последней транзакции не меняется,
+    # поэтому при совпадении принятого и применённого WAL отставания нет.
+    "postgresql": (
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = "
+        "pg_last_wal_replay_lsn() THEN 0 ELSE EXTRACT(EPOCH FROM "
+        "now() - pg_last_xact_replay_timestamp()) END"
+    ),
+}
+
+_local = threading.local()
+_lag_lock = threading.Lock()
+# Псевдоним реплики -> (время проверки, годна ли для чтения).
+_replica_state = {}
+
+
+def replica_lag(alias):
+    """Отставание реплики в секундах; 0, если СУБД его не сообщает."""
+    connection = connections[alias]
+    sql = PRIMARY_LAG_SQL.get(connection.vendor)
+    if sql is None:
+        connection.ensure_connection()
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        lag = cursor.fetchone()[0]
+    return float(lag or 0)
+
+
+def replica_available(alias):
+    now = time.monotonic()
+    checked = _replica_state.get(alias)
+    if checked and now - checked[0] < settings.REPLICA_CHECK_INTERVAL:
+        return checked[1]
+    try:
+        available = replica_lag(alias) <= settings.REPLICA_MAX_LAG
+    except DatabaseError:
+        available = False
+    with _lag_lock:
+        _replica_state[alias] = (now, available)
+    return available
+
+
+def choose_replica():
+    replicas = [
+        alias
+        for alias in settings.DATABASE_REPLICAS
+        if replica_available(alias)
+    ]
+    return random.choice(replicas) if replicas else None
+
+
+def sticky_key(request):
+    credentials = request.META.get("HTTP_AUTHORIZATION")
+    if not credentials:
+        return None
+    digest = hashlib.sha1(credentials.encode("utf-8")).hexdigest()
+    return f"replica:primary:{digest}"
+
+
+def is_sticky(request):
+    """Клиент недавно писал: по метке в общем кэше для его токена или
+    по подписанной cookie."""
+    key = sticky_key(request)
+    if key and cache.get(key):
+        return True
+    return (
+        request.get_signed_cookie(
+            STICKY_COOKIE,
+            default=None,
+            salt=STICKY_COOKIE,
+            max_age=settings.REPLICA_STICKY_SECONDS,
+        )
+        is not None
+    )
+
+
+def reads_primary_after_write():
+    """Текущий запрос читает с основной базы, потому что клиент недавно
+    писал; закэшированные ответы для него могут быть старше записи."""
+    return getattr(_local, "sticky", False)
+
+
+def used_replica():
+    """Текущий запрос уже читал с реплики."""
+    return _local.__dict__.get("replica") is not None
+
+
+class ReplicaRouter:
+    """Чтение в запросах, отмеченных ReplicaMiddleware, идёт на реплику.
+
+    Всё остальное, включая команды и запись, работает с основной базой.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not getattr(_local, "use_replica", False):
+            return None
+        if not hasattr(_local, "replica"):
+            # Один запрос читает с одной реплики.
+            _local.replica = choose_replica()
+        return _local.replica
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """Отправляет безопасные запросы к API на реплики.
+
+    После записи клиент с тем же заголовком Authorization или с
+    cookie STICKY_COOKIE ещё REPLICA_STICKY_SECONDS читает с основной
+    базы, чтобы видеть свои изменения, пока реплика их догоняет.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            _local.use_replica = False
+            _local.sticky = False
+            _local.__dict__.pop("replica", None)
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            key = sticky_key(request)
+            if key:
+                cache.set(key, True, settings.REPLICA_STICKY_SECONDS)
+            response.set_signed_cookie(
+                STICKY_COOKIE,
+                "1",
+                salt=STICKY_COOKIE,
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            not settings.DATABASE_REPLICAS
+            or request.method not in SAFE_METHODS
+            or getattr(view_func, "__module__", None)
+            not in REPLICA_VIEW_MODULES
+        ):
+            return
+        _local.sticky = is_sticky(request)
+        _local.use_replica = not _local.sticky
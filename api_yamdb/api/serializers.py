@@ -1,12 +1,32 @@
+from api.metrics import serializer_timer
 from django.conf import settings
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.shortcuts import get_object_or_404
+from django.db import IntegrityError
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
+from rest_framework.settings import api_settings
 from reviews.models import Category, Comment, CustomUser, Genre, Review, Title
 from reviews.validators import username_validator, validate_year
 
 
+class TimedSerializerMixin:
+    """Учитывает время сериализации объектов верхнего уровня в метриках.
+
+    Вложенные сериализаторы не замеряются отдельно, их время входит
+    во время родителя.
+    """
+
+    def to_representation(self, instance):
+        parent = self.parent
+        if parent is not None and not (
+            isinstance(parent, serializers.ListSerializer)
+            and parent.parent is None
+        ):
+            return super().to_representation(instance)
+        with serializer_timer():
+            return super().to_representation(instance)
+
+
 class SignUpSerializer(serializers.Serializer):
     username = serializers.CharField(
         max_length=settings.MAX_USERNAME_LENGTH,
@@ -34,7 +54,7 @@ class TokenSerializer(serializers.Serializer):
     )
 
 
-class UserSerializer(ModelSerializer):
+class UserSerializer(TimedSerializerMixin, ModelSerializer):
     class Meta:
         model = CustomUser
         fields = (
@@ -55,19 +75,19 @@ class UserProfileSerializer(UserSerializer):
         read_only_fields = ("role",)
 
 
-class GenreSerializer(ModelSerializer):
+class GenreSerializer(TimedSerializerMixin, ModelSerializer):
     class Meta:
         model = Genre
         fields = ("slug", "name")
 
 
-class CategorySerializer(ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, ModelSerializer):
     class Meta:
         model = Category
         fields = ("slug", "name")
 
 
-class TitleGetSerializer(ModelSerializer):
+class TitleGetSerializer(TimedSerializerMixin, ModelSerializer):
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(many=True, read_only=True)
     rating = serializers.IntegerField(read_only=True)
@@ -86,7 +106,7 @@ class TitleGetSerializer(ModelSerializer):
         read_only_fields = fields
 
 
-class TitlePostSerializer(ModelSerializer):
+class TitlePostSerializer(TimedSerializerMixin, ModelSerializer):
     genre = serializers.SlugRelatedField(
         slug_field="slug", queryset=Genre.objects.all(), many=True
     )
@@ -109,36 +129,52 @@ class TitlePostSerializer(ModelSerializer):
         return validate_year(value)
 
 
-class ReviewSerializer(ModelSerializer):
+class TitleBulkItemSerializer(serializers.Serializer):
+    """Элемент пакетной загрузки: связи передаются слагами и
+    разрешаются для всего пакета сразу, а не по одной."""
+
+    id = serializers.IntegerField(required=False, min_value=1)
+    name = serializers.CharField(
+        max_length=Title._meta.get_field("name").max_length
+    )
+    year = serializers.IntegerField(
+        min_value=0, validators=(validate_year,)
+    )
+    description = serializers.CharField()
+    category = serializers.SlugField()
+    genre = serializers.ListField(child=serializers.SlugField())
+
+
+class ReviewSerializer(TimedSerializerMixin, ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field="username",
         read_only=True,
         default=serializers.CurrentUserDefault(),
     )
     score = serializers.IntegerField(
-        validators=[MinValueValidator(0), MaxValueValidator(10)]
+        validators=[MinValueValidator(1), MaxValueValidator(10)]
     )
 
     class Meta:
         model = Review
         fields = ("id", "text", "author", "score", "pub_date")
 
-    def validate(self, data):
-        if self.context["request"].method != "POST":
-            return data
-        if Review.objects.filter(
-            title=get_object_or_404(
-                Title, pk=self.context["view"].kwargs.get("title_id")
-            ),
-            author=self.context["request"].user,
-        ).exists():
+    def create(self, validated_data):
+        # Уникальность проверяет ограничение unique_author: отдельный
+        # запрос exists() лишний и не защищает от параллельных POST.
+        try:
+            return super().create(validated_data)
+        except IntegrityError:
             raise serializers.ValidationError(
-                "Можно оставлять только один отзыв!"
+                {
+                    api_settings.NON_FIELD_ERRORS_KEY: [
+                        "Можно оставлять только один отзыв!"
+                    ]
+                }
             )
-        return data
 
 
-class CommentSerializer(ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field="username",
         read_only=True,
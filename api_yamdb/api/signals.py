@@ -0,0 +1,88 @@
+from api.authentication import invalidate_user
+from api.cache import (invalidate_catalog, invalidate_title, invalidate_titles,
+                       shift_comment_count)
+from api.connections import check_connections, mark_released
+from api.facets import invalidate_facets, record_change
+from django.core.signals import request_finished, request_started
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import (Category, Comment, CustomUser, Genre, Review,
+                            Title, TitleGenre)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def title_changed(sender, instance, **kwargs):
+    invalidate_title(instance.pk)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def title_indexed(sender, instance, **kwargs):
+    record_change([instance.pk])
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def title_relation_changed(sender, instance, **kwargs):
+    invalidate_title(instance.title_id)
+
+
+@receiver(m2m_changed, sender=TitleGenre)
+def title_genres_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    index_genres(instance, action, reverse, pk_set)
+    if not reverse:
+        invalidate_title(instance.pk)
+    elif pk_set:
+        invalidate_titles(pk_set)
+    else:
+        invalidate_catalog("genres")
+
+
+def index_genres(instance, action, reverse, pk_set):
+    if not reverse:
+        record_change([instance.pk])
+    elif pk_set:
+        record_change(pk_set)
+    else:
+        # genre.titles.clear(): какие произведения затронуты, неизвестно.
+        invalidate_facets()
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def genre_changed(sender, instance, **kwargs):
+    invalidate_catalog("genres")
+    invalidate_facets()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    invalidate_catalog("categories")
+    invalidate_facets()
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        shift_comment_count(instance.review_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_removed(sender, instance, **kwargs):
+    shift_comment_count(instance.review_id, -1)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def user_changed(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+# Подключаются после close_old_connections из django.db и поэтому
+# видят только соединения, которые Django оставил открытыми.
+request_started.connect(check_connections)
+request_finished.connect(mark_released)
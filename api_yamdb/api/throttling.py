@@ -0,0 +1,169 @@
+import threading
+import time
+
+from api.cache import get_counters, incr_counter
+from django.conf import settings
+from django.http import JsonResponse
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+LOCK_ATTEMPTS = 5
+LOCK_DELAY = 0.001
+
+
+def rejected(reason):
+    incr_counter(f"rejected:{reason}")
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Корзина токенов в общем кэше, общая для всех воркеров.
+
+    Ставка ``N/период`` означает корзину на N запросов, которая
+    полностью наполняется за период. Хранится одно число — момент,
+    когда корзина снова станет полной (алгоритм GCRA), поэтому каждая
+    проверка — одно чтение и одна запись в кэш под короткой блокировкой.
+    """
+
+    cache_format = "bucket:%(scope)s:%(ident)s"
+
+    def get_rate(self):
+        # Ставки читаются при каждом создании, а не при импорте DRF.
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def applies(self, request, view):
+        return True
+
+    def allow_request(self, request, view):
+        if self.rate is None or not self.applies(request, view):
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        interval = self.duration / self.num_requests
+        tolerance = self.duration - interval
+        locked = self.lock()
+        try:
+            now = self.timer()
+            full_at = max(self.cache.get(self.key, now), now)
+            self.delay = full_at - now - tolerance
+            if self.delay > 0:
+                rejected(self.scope)
+                return False
+            full_at += interval
+            self.cache.set(self.key, full_at, int(full_at - now) + 1)
+            return True
+        finally:
+            if locked:
+                self.cache.delete(f"{self.key}:lock")
+
+    def lock(self):
+        # Без блокировки параллельные запросы могли бы потратить один
+        # и тот же токен; не дождавшись её, проверяем без блокировки.
+        for _ in range(LOCK_ATTEMPTS):
+            if self.cache.add(f"{self.key}:lock", 1, timeout=1):
+                return True
+            time.sleep(LOCK_DELAY)
+        return False
+
+    def wait(self):
+        return max(self.delay, 0)
+
+
+class AuthIPThrottle(TokenBucketThrottle):
+    """Регистрация и получение токена с одного адреса."""
+
+    scope = "auth_ip"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
+
+
+class AuthUsernameThrottle(TokenBucketThrottle):
+    """Попытки для одного имени пользователя с любых адресов."""
+
+    scope = "auth_user"
+
+    def get_cache_key(self, request, view):
+        if not isinstance(request.data, dict):
+            # Тело — список или строка: сериализатор ответит 400, а
+            # попытку учтёт корзина адреса.
+            return None
+        username = request.data.get("username")
+        if not isinstance(username, str) or not username:
+            return None
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": username.lower(),
+        }
+
+
+class WriteUserThrottle(TokenBucketThrottle):
+    """Запись отзывов и комментариев: по пользователю, иначе по адресу."""
+
+    scope = "write_user"
+
+    def applies(self, request, view):
+        return request.method not in SAFE_METHODS
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f"user:{request.user.pk}"
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {"scope": self.scope, "ident": ident}
+
+
+class WriteIPThrottle(WriteUserThrottle):
+    """Запись с одного адреса, сколько бы пользователей за ним ни было."""
+
+    scope = "write_ip"
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
+
+
+AUTH_THROTTLES = (AuthIPThrottle, AuthUsernameThrottle)
+WRITE_THROTTLES = (WriteUserThrottle, WriteIPThrottle)
+
+
+def rejection_counters():
+    reasons = [
+        throttle.scope for throttle in AUTH_THROTTLES + WRITE_THROTTLES
+    ] + ["concurrency"]
+    values = get_counters(*(f"rejected:{reason}" for reason in reasons))
+    return {reason: values[f"rejected:{reason}"] for reason in reasons}
+
+
+class ConcurrencyLimitMiddleware:
+    """Сразу отвечает 503, если процесс уже обрабатывает
+    MAX_CONCURRENT_REQUESTS запросов. Это защита одного процесса:
+    соединения сверх его потоков ждут в очереди gunicorn и сюда не
+    доходят, общий предел задаёт limit_conn в nginx."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.limit = settings.MAX_CONCURRENT_REQUESTS
+        self.slots = threading.BoundedSemaphore(self.limit or 1)
+
+    def __call__(self, request):
+        if not self.limit:
+            return self.get_response(request)
+        if not self.slots.acquire(blocking=False):
+            rejected("concurrency")
+            response = JsonResponse(
+                {"detail": "Сервер перегружен, повторите запрос позже."},
+                status=503,
+            )
+            response["Retry-After"] = "1"
+            return response
+        try:
+            return self.get_response(request)
+        finally:
+            self.slots.release()
@@ -1,6 +1,7 @@
-from api.views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                       ReviewViewSet, SignUpView, TitleViewSet, TokenView,
-                       UserViewSet)
+from api.views import (CacheStatsView, CategoryViewSet, CommentViewSet,
+                       ExportView, GenreViewSet, OutboxStatsView,
+                       ReviewViewSet, SignUpView, ThrottleStatsView,
+                       TitleViewSet, TokenView, UserViewSet)
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
@@ -29,4 +30,12 @@ registration_and_auth_urls = [
 urlpatterns = [
     path("v1/", include(v1_router.urls)),
     path("v1/auth/", include(registration_and_auth_urls)),
+    path("v1/stats/cache/", CacheStatsView.as_view(), name="cache_stats"),
+    path("v1/stats/outbox/", OutboxStatsView.as_view(), name="outbox_stats"),
+    path(
+        "v1/stats/throttle/",
+        ThrottleStatsView.as_view(),
+        name="throttle_stats",
+    ),
+    path("v1/export/<str:resource>/", ExportView.as_view(), name="export"),
 ]
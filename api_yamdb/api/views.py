@@ -1,31 +1,44 @@
-import random
-
+from api.bulk import TitleUpsert
+from api.cache import (CachedListMixin, CachedReadMixin, comment_count,
+                       generation_key, get_counters, get_generations)
+from api.confirmation import check_code, issue_code
+from api.export import CONTENT_TYPES, EXPORTS, NDJSON, export_stream
+from api.facets import FacetFilterBackend, FacetResponseMixin
 from api.filters import TitleFilter
+from api.pagination import (OffsetPagination, PublicationPagination,
+                            TitlePagination, UserPagination)
 from api.permissions import (IsAdmin, IsAdminOrModerOrAuthorOrReadOnly,
                              IsAdminOrReadOnly)
+from api.readers import CommentReader, FastReadMixin, ReviewReader, TitleReader
 from api.serializers import (CategorySerializer, CommentSerializer,
                              GenreSerializer, ReviewSerializer,
                              SignUpSerializer, TitleGetSerializer,
                              TitlePostSerializer, TokenSerializer,
                              UserProfileSerializer, UserSerializer)
+from api.throttling import AUTH_THROTTLES, WRITE_THROTTLES, rejection_counters
 from django.conf import settings
-from django.core.mail import send_mail
-from django.db.models import Avg
 from django.db.utils import IntegrityError
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, permissions, status
 from rest_framework.decorators import action, permission_classes
-from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, CustomUser, Genre, Review, Title
+from reviews.models import (Category, CustomUser, Genre, Review, Title,
+                            TitleStatistics)
+from reviews.outbox import enqueue_email, outbox_stats
+from reviews.statistics import summarize
 
 
 class GenreCategoryViewSet(
+    CachedListMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.DestroyModelMixin,
@@ -33,33 +46,63 @@ class GenreCategoryViewSet(
 ):
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (filters.SearchFilter,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = OffsetPagination
     search_fields = ("name",)
     lookup_field = "slug"
     lookup_url_kwarg = "slug"
+    title_lookup = None
 
     class Meta:
         abstract = True
 
+    def get_titles(self):
+        return Title.objects.filter(**{self.title_lookup: self.get_object()})
 
-def create_confirm_code():
-    return "".join(
-        random.choices(
-            settings.CONFIRM_CODE_CHARS, k=settings.CONFIRM_CODE_LENGTH
+    def get_cache_generations(self):
+        if self.action != "top":
+            return super().get_cache_generations()
+        return get_generations(
+            generation_key(self.cache_resource), generation_key("titles")
         )
-    )
+
+    @action(detail=True, methods=["get"])
+    def stats(self, request, slug=None):
+        titles = self.get_titles().values("id")
+        return Response(
+            summarize(TitleStatistics.objects.filter(title__in=titles))
+        )
+
+    @action(detail=True, methods=["get"])
+    def top(self, request, slug=None):
+        return self.cached(self.top_titles, request, slug=slug)
+
+    def top_titles(self, request, slug=None):
+        # Индексы по (-rating_avg, id) отдают первые N без сортировки.
+        titles = (
+            self.get_titles()
+            .filter(rating_avg__gt=0)
+            .select_related("category")
+            .prefetch_related("genre")
+            .order_by("-rating_avg", "id")
+        )[:OffsetPagination().get_limit(request)]
+        serializer_class = (
+            TitleReader if settings.FAST_READERS else TitleGetSerializer
+        )
+        return Response(serializer_class(titles, many=True).data)
 
 
 def send_confirm_code(email, confirm_code):
-    send_mail(
+    enqueue_email(
         subject="Код подтверждения",
         message=f"Код подтверждения\n{confirm_code}",
-        recipient_list=[email],
+        recipient=email,
         from_email=settings.EMAIL_HOST_USER,
     )
 
 
 class SignUpView(APIView):
+    throttle_classes = AUTH_THROTTLES
+
     @permission_classes(AllowAny)
     def post(self, request):
         serializer = SignUpSerializer(data=request.data)
@@ -75,14 +118,14 @@ class SignUpView(APIView):
                 "User with same username or email already exists",
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        confirm_code = create_confirm_code()
-        user.confirmation_code = confirm_code
-        user.save()
+        confirm_code = issue_code(user)
         send_confirm_code(email=email, confirm_code=confirm_code)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 class TokenView(APIView):
+    throttle_classes = AUTH_THROTTLES
+
     @permission_classes(AllowAny)
     def post(self, request):
         serializer = TokenSerializer(data=request.data)
@@ -90,11 +133,7 @@ class TokenView(APIView):
         username = serializer.validated_data.get("username")
         confirm_code = serializer.validated_data.get("confirmation_code")
         user = get_object_or_404(CustomUser, username=username)
-        if (user.confirmation_code != confirm_code
-                or confirm_code == settings.CONFIRM_CODE_STUB):
-            if confirm_code != settings.CONFIRM_CODE_STUB:
-                user.confirmation_code = settings.CONFIRM_CODE_STUB
-                user.save()
+        if not check_code(user, confirm_code):
             return Response(
                 "Invalid confirm code", status=status.HTTP_400_BAD_REQUEST
             )
@@ -111,7 +150,7 @@ class UserViewSet(ModelViewSet):
     lookup_field = "username"
     search_fields = ("username",)
     http_method_names = ["get", "post", "patch", "delete"]
-    pagination_class = LimitOffsetPagination
+    pagination_class = UserPagination
 
     @action(
         detail=False,
@@ -120,7 +159,8 @@ class UserViewSet(ModelViewSet):
         permission_classes=[permissions.IsAuthenticated],
     )
     def user_profile(self, request):
-        user = request.user
+        # Аутентификация отдаёт неполную запись из кэша.
+        user = get_object_or_404(CustomUser, pk=request.user.pk)
         if request.method == "GET":
             return Response(UserProfileSerializer(user).data)
         serializer = UserProfileSerializer(
@@ -135,11 +175,15 @@ class UserViewSet(ModelViewSet):
         return Response(serializer.data)
 
 
-class TitleViewSet(ModelViewSet):
-    queryset = Title.objects.all().annotate(rating=Avg("reviews__score"))
+class TitleViewSet(
+    FacetResponseMixin, FastReadMixin, CachedReadMixin, ModelViewSet
+):
+    queryset = Title.objects.select_related("category").prefetch_related(
+        "genre"
+    )
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (DjangoFilterBackend,)
-    pagination_class = LimitOffsetPagination
+    filter_backends = (FacetFilterBackend, DjangoFilterBackend)
+    pagination_class = TitlePagination
     filterset_fileds = (
         "name",
         "year",
@@ -147,47 +191,169 @@ class TitleViewSet(ModelViewSet):
         "category__slug",
     )
     filterset_class = TitleFilter
-    ordering = ("rating", "name")
+    cache_resource = "titles"
+    reader_class = TitleReader
+
+    def get_maintained_count(self):
+        # Выставляется FacetFilterBackend, если других фильтров нет.
+        return getattr(self, "facet_total", None)
 
     def get_serializer_class(self):
         if self.action == "list" or self.action == "retrieve":
             return TitleGetSerializer
         return TitlePostSerializer
 
+    @action(detail=True, methods=["get"])
+    def stats(self, request, pk=None):
+        summary = summarize(TitleStatistics.objects.filter(title_id=pk))
+        if not summary.pop("title_count"):
+            get_object_or_404(Title, pk=pk)
+        return Response(summary)
+
+    @action(detail=False, methods=["post"], permission_classes=(IsAdmin,))
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError("Ожидается список произведений.")
+        if len(items) > settings.TITLE_BULK_MAX_ITEMS:
+            raise ValidationError(
+                f"Не больше {settings.TITLE_BULK_MAX_ITEMS} произведений "
+                f"за запрос."
+            )
+        return Response({"results": TitleUpsert(items).run()})
+
 
 class GenreViewSet(GenreCategoryViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_resource = "genres"
+    title_lookup = "genre"
 
 
 class CategoryViewSet(GenreCategoryViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_resource = "categories"
+    title_lookup = "category"
 
 
-class ReviewViewSet(ModelViewSet):
-    serializer_class = ReviewSerializer
-    permission_classes = (IsAdminOrModerOrAuthorOrReadOnly,)
+class CacheStatsView(APIView):
+    permission_classes = (IsAdmin,)
+
+    def get(self, request):
+        counters = get_counters(
+            "catalog_hits", "catalog_misses", "auth_misses"
+        )
+        return Response(
+            {
+                "catalog": {
+                    "hits": counters["catalog_hits"],
+                    "misses": counters["catalog_misses"],
+                },
+                "auth": {"misses": counters["auth_misses"]},
+            }
+        )
+
+
+class OutboxStatsView(APIView):
+    permission_classes = (IsAdmin,)
+
+    def get(self, request):
+        return Response({"email_outbox": outbox_stats()})
 
-    def get_title(self):
+
+class ThrottleStatsView(APIView):
+    permission_classes = (IsAdmin,)
+
+    def get(self, request):
+        return Response({"rejected": rejection_counters()})
+
+
+class ExportView(APIView):
+    """Потоковая выгрузка произведений, отзывов или комментариев.
+
+    Параметры: ``output`` (ndjson или csv), ``title`` и ``category``
+    для отбора. Если клиент принимает gzip, поток сжимается на лету.
+    """
+
+    permission_classes = (IsAdmin,)
+
+    def get(self, request, resource):
+        if resource not in EXPORTS:
+            raise NotFound()
+        params = request.query_params
+        output = params.get("output", NDJSON)
+        if output not in CONTENT_TYPES:
+            raise ValidationError(
+                {"output": [f"Ожидается одно из: {', '.join(CONTENT_TYPES)}."]}
+            )
+        title = params.get("title")
+        if title is not None:
+            if not title.isdigit():
+                raise ValidationError({"title": ["Ожидается id."]})
+            get_object_or_404(Title, pk=title)
+        category = params.get("category")
+        if category is not None:
+            get_object_or_404(Category, slug=category)
+        compress = "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "")
+        response = StreamingHttpResponse(
+            export_stream(resource, output, title, category, compress),
+            content_type=CONTENT_TYPES[output],
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{resource}.{output}"'
+        )
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if compress:
+            response["Content-Encoding"] = "gzip"
+        return response
+
+
+class TitleNestedMixin:
+    """Произведение из URL, загруженное один раз за запрос."""
+
+    @cached_property
+    def title(self):
         return get_object_or_404(Title, id=self.kwargs.get("title_id"))
 
+
+class ReviewViewSet(FastReadMixin, TitleNestedMixin, ModelViewSet):
+    serializer_class = ReviewSerializer
+    reader_class = ReviewReader
+    throttle_classes = WRITE_THROTTLES
+    permission_classes = (IsAdminOrModerOrAuthorOrReadOnly,)
+    pagination_class = PublicationPagination
+
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return self.title.reviews.select_related("author")
+
+    def get_maintained_count(self):
+        return self.title.review_count
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        serializer.save(author=self.request.user, title=self.title)
 
 
-class CommentViewSet(ModelViewSet):
+class CommentViewSet(FastReadMixin, TitleNestedMixin, ModelViewSet):
     serializer_class = CommentSerializer
+    reader_class = CommentReader
+    throttle_classes = WRITE_THROTTLES
     permission_classes = (IsAdminOrModerOrAuthorOrReadOnly,)
-
-    def get_review(self):
-        return get_object_or_404(Review, id=self.kwargs.get("review_id"))
+    pagination_class = PublicationPagination
+
+    @cached_property
+    def review(self):
+        return get_object_or_404(
+            Review,
+            id=self.kwargs.get("review_id"),
+            title_id=self.kwargs.get("title_id"),
+        )
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        return self.review.comments.select_related("author")
+
+    def get_maintained_count(self):
+        return comment_count(self.review)
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review())
+        serializer.save(author=self.request.user, review=self.review)
@@ -0,0 +1,170 @@
+"""Прогрев процесса до приёма запросов.
+
+Первые запросы после запуска воркера платят за импорт URLconf и
+компиляцию шаблонов маршрутов, построение полей сериализаторов и
+открытие соединений с БД. ``gunicorn.conf.py`` вызывает ``prepare()``
+в мастере до fork, и воркеры получают результат через copy-on-write, а
+``warm_up()`` — в каждом воркере, пока он ещё не принимает соединения.
+"""
+import logging
+import os
+import re
+import threading
+import time
+
+from api import serializers
+from api.urls import v1_router
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.http import JsonResponse
+from django.test import Client
+from django.urls import URLResolver, get_resolver, reverse
+from django.views.decorators.cache import never_cache
+from rest_framework.serializers import BaseSerializer
+from reviews.models import Review, Title
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+state = {"status": "pending"}
+
+
+def fail(message):
+    logger.warning("Warm-up: %s", message)
+    state["errors"].append(message)
+
+
+def url_patterns(resolver):
+    for pattern in resolver.url_patterns:
+        yield pattern
+        if isinstance(pattern, URLResolver):
+            yield from url_patterns(pattern)
+
+
+def serializer_classes():
+    for value in vars(serializers).values():
+        if (
+            isinstance(value, type)
+            and issubclass(value, BaseSerializer)
+            and value.__module__ == serializers.__name__
+        ):
+            yield value
+
+
+def prepare():
+    """Шаги прогрева, которым не нужна БД: регулярные выражения всех
+    маршрутов (Django компилирует их при первом сопоставлении), таблица
+    обратного разрешения имён и поля всех сериализаторов API."""
+    state.setdefault("errors", [])
+    resolver = get_resolver()
+    state["urls"] = len(
+        [pattern.pattern.regex for pattern in url_patterns(resolver)]
+    )
+    reverse("api:titles-list")
+    count = 0
+    for serializer_class in serializer_classes():
+        try:
+            count += bool(serializer_class().fields)
+        except Exception as error:
+            fail(f"{serializer_class.__name__}: {error!r}")
+    state["serializers"] = count
+
+
+def connect():
+    for connection in connections.all():
+        try:
+            connection.ensure_connection()
+        except DatabaseError as error:
+            fail(f"{connection.alias}: {error}")
+
+
+def route_urls():
+    """Адреса списков всех ресурсов роутера; вложенные подставляют id
+    первого отзыва из базы и пропускаются, если её данные пусты."""
+    kwargs = {}
+    # order_by("pk") вместо сортировки Meta.ordering: первая строка
+    # по первичному ключу не требует сортировки всей таблицы.
+    review = (
+        Review.objects.order_by("pk").values_list("title_id", "id").first()
+    )
+    if review is not None:
+        kwargs = {"title_id": review[0], "review_id": review[1]}
+    else:
+        title = (
+            Title.objects.order_by("pk").values_list("id", flat=True).first()
+        )
+        if title is not None:
+            kwargs["title_id"] = title
+    for prefix, viewset, basename in v1_router.registry:
+        names = re.compile(prefix).groupindex
+        if all(name in kwargs for name in names):
+            yield reverse(
+                f"api:{basename}-list",
+                kwargs={name: kwargs[name] for name in names},
+            )
+
+
+def warm_routes():
+    """Пропускает GET-запрос к каждому списку через весь стек
+    middleware, фильтров, пагинации и чтения ответа."""
+    client = Client(HTTP_HOST=settings.WARMUP_HOST)
+    routes = state["routes"] = {}
+    try:
+        urls = list(route_urls())
+    except DatabaseError as error:
+        fail(f"routes: {error}")
+        return
+    for url in urls:
+        try:
+            routes[url] = client.get(url).status_code
+        except Exception as error:
+            fail(f"{url}: {error!r}")
+            continue
+        if routes[url] >= 500:
+            fail(f"{url}: {routes[url]}")
+
+
+def warm_up():
+    """Полный прогрев воркера. Ошибки отдельных шагов записываются в
+    состояние и не мешают воркеру начать работу."""
+    with _lock:
+        started = time.perf_counter()
+        state.update(status="warming", errors=[])
+        prepare()
+        connect()
+        warm_routes()
+        state.update(
+            status="ready",
+            duration=round(time.perf_counter() - started, 3),
+        )
+    logger.info(
+        "Warm-up finished in %.3fs, %d errors",
+        state["duration"],
+        len(state["errors"]),
+    )
+
+
+def report(**extra):
+    return {**state, "pid": os.getpid(), **extra}
+
+
+@never_cache
+def live_view(request):
+    """Процесс отвечает на запросы."""
+    return JsonResponse({"status": "alive", "pid": os.getpid()})
+
+
+@never_cache
+def ready_view(request):
+    """Воркер прогрет и основная база отвечает, иначе 503."""
+    if state["status"] != "ready":
+        return JsonResponse(report(), status=503)
+    try:
+        with connections["default"].cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except DatabaseError as error:
+        return JsonResponse(
+            report(status="database unavailable", database=str(error)),
+            status=503,
+        )
+    return JsonResponse(report())
@@ -0,0 +1,180 @@
+"""PostgreSQL с пулом соединений внутри процесса.
+
+Потоки воркера gunicorn (``--threads``) берут соединение из общего
+пула на время запроса, а не открывают своё: TLS и аутентификация
+проходят один раз на соединение пула. Используется с
+``CONN_MAX_AGE = 0`` — закрытие соединения в конце запроса
+возвращает его в пул.
+"""
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db.backends.postgresql import base
+from django.db.utils import OperationalError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """Не больше ``size`` соединений; ждущий поток блокируется
+    до ``timeout`` секунд."""
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(size)
+        self.lock = threading.Lock()
+        # (соединение, время возврата в пул)
+        self.idle = deque()
+        self.used = 0
+        self.opened = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+
+    def get(self, connect):
+        started = time.monotonic()
+        if not self.slots.acquire(timeout=self.timeout):
+            with self.lock:
+                self.timeouts += 1
+            raise OperationalError(
+                f"Connection pool exhausted: {self.size} connections busy"
+            )
+        with self.lock:
+            self.used += 1
+            self.checkouts += 1
+            self.wait_time += time.monotonic() - started
+            idle = self.idle.pop() if self.idle else None
+        try:
+            if idle is not None:
+                connection, released = idle
+                if self.healthy(connection, released):
+                    return connection
+                self.discard(connection)
+            connection = connect()
+        except BaseException:
+            self.release()
+            raise
+        with self.lock:
+            self.opened += 1
+        return connection
+
+    def healthy(self, connection, released):
+        if connection.closed:
+            return False
+        if time.monotonic() - released < settings.DB_HEALTH_CHECK_INTERVAL:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except Exception:
+            return False
+        return True
+
+    def put(self, connection, discard=False):
+        if not discard and not connection.closed:
+            try:
+                if (
+                    connection.get_transaction_status()
+                    != TRANSACTION_STATUS_IDLE
+                ):
+                    self.rollback(connection)
+            except Exception:
+                discard = True
+        if discard or connection.closed:
+            self.discard(connection)
+        else:
+            with self.lock:
+                self.idle.append((connection, time.monotonic()))
+        self.release()
+
+    @staticmethod
+    def rollback(connection):
+        # В autocommit psycopg2 не считает транзакцию своей, и rollback()
+        # ничего не отправляет; открытую через BEGIN откатывает только SQL.
+        if connection.autocommit:
+            with connection.cursor() as cursor:
+                cursor.execute("ROLLBACK")
+        else:
+            connection.rollback()
+
+    def discard(self, connection):
+        with self.lock:
+            self.opened -= 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def release(self):
+        with self.lock:
+            self.used -= 1
+        self.slots.release()
+
+    def close_idle(self):
+        with self.lock:
+            idle, self.idle = self.idle, deque()
+        for connection, _ in idle:
+            self.discard(connection)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "size": self.size,
+                "used": self.used,
+                "idle": len(self.idle),
+                "opened": self.opened,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds": round(self.wait_time, 6),
+            }
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    @property
+    def pool(self):
+        with pools_lock:
+            if self.alias not in pools:
+                pools[self.alias] = ConnectionPool(
+                    self.settings_dict.get("POOL_SIZE", 10),
+                    self.settings_dict.get("POOL_TIMEOUT", 5),
+                )
+            return pools[self.alias]
+
+    def get_new_connection(self, conn_params):
+        connection = self.pool.get(
+            lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params
+            )
+        )
+        self.isolation_level = self.settings_dict["OPTIONS"].get(
+            "isolation_level", connection.isolation_level
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            self.pool.put(self.connection, discard=self.errors_occurred)
+
+
+def close_before_fork(wrappers):
+    """Закрывает соединения процесса, не возвращая их в пул.
+
+    Вызывается в мастере gunicorn перед fork: соединение, возвращённое
+    в пул, воркеры унаследовали бы вместе с пулом и читали бы из одного
+    сокета. Работает и с обычным бэкендом PostgreSQL.
+    """
+    for wrapper in wrappers:
+        if wrapper.connection is not None:
+            wrapper.connection.close()
+        # Закрытое соединение пул не принимает, а только освобождает слот.
+        wrapper.close()
+    with pools_lock:
+        closing = list(pools.values())
+        pools.clear()
+    for pool in closing:
+        pool.close_idle()
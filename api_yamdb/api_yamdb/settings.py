@@ -25,6 +25,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework_simplejwt",
     "django_filters",
@@ -36,6 +37,9 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "api.metrics.MetricsMiddleware",
+    "api.throttling.ConcurrencyLimitMiddleware",
+    "api.replicas.ReplicaMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -65,17 +69,112 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "api_yamdb.wsgi.application"
 
+# Пул соединений внутри процесса для воркеров с потоками; без пула
+# соединение потока живёт DB_CONN_MAX_AGE секунд между запросами.
+DB_POOL = os.getenv("DB_POOL", "False").upper() == "TRUE"
+
 DATABASES = {
     "default": {
-        "ENGINE": os.getenv("DB_ENGINE", "django.db.backends.postgresql"),
+        "ENGINE": os.getenv(
+            "DB_ENGINE",
+            "api_yamdb.postgresql_pool"
+            if DB_POOL
+            else "django.db.backends.postgresql",
+        ),
         "NAME": os.getenv("DB_NAME", default="postgres"),
         "USER": os.getenv("POSTGRES_USER", default="postgres"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", default="post_db_pasw"),
         "HOST": os.getenv("DB_HOST", default="db"),
         "PORT": os.getenv("DB_PORT", default=5432),
+        "CONN_MAX_AGE": int(
+            os.getenv("DB_CONN_MAX_AGE", default=0 if DB_POOL else 60)
+        ),
+        "POOL_SIZE": int(os.getenv("DB_POOL_SIZE", default=10)),
+        "POOL_TIMEOUT": float(os.getenv("DB_POOL_TIMEOUT", default=5)),
+    }
+}
+
+# Реплики для чтения: хосты PostgreSQL или имена баз (например, файлы
+# SQLite) через запятую; остальные параметры берутся из default.
+DB_REPLICA_HOSTS = [
+    host for host in os.getenv("DB_REPLICA_HOSTS", "").split(",") if host
+]
+DB_REPLICA_NAMES = [
+    name for name in os.getenv("DB_REPLICA_NAMES", "").split(",") if name
+]
+for index in range(max(len(DB_REPLICA_HOSTS), len(DB_REPLICA_NAMES))):
+    DATABASES[f"replica{index + 1}"] = {
+        **DATABASES["default"],
+        "HOST": DB_REPLICA_HOSTS[index]
+        if index < len(DB_REPLICA_HOSTS)
+        else DATABASES["default"]["HOST"],
+        "NAME": DB_REPLICA_NAMES[index]
+        if index < len(DB_REPLICA_NAMES)
+        else DATABASES["default"]["NAME"],
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["api.replicas.ReplicaRouter"]
+# Сколько секунд после записи клиент читает с основной базы и мимо кэша
+# ответов; должно быть не меньше 2 * REPLICA_MAX_LAG, чтобы ответы,
+# собранные на реплике до записи, успели истечь.
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", default=5))
+# Реплика с большим отставанием (секунды) не используется.
+REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", default=2))
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", default=1))
+
+# Соединение, простоявшее дольше, проверяется SELECT 1 перед запросом.
+DB_HEALTH_CHECK_INTERVAL = float(
+    os.getenv("DB_HEALTH_CHECK_INTERVAL", default=30)
+)
+
+CACHE_BACKENDS = {
+    "locmem": ("django.core.cache.backends.locmem.LocMemCache", "yamdb"),
+    "file": (
+        "django.core.cache.backends.filebased.FileBasedCache",
+        os.path.join(BASE_DIR, "cache"),
+    ),
+    "redis": ("django_redis.cache.RedisCache", "redis://127.0.0.1:6379/1"),
+}
+CACHE_BACKEND, CACHE_DEFAULT_LOCATION = CACHE_BACKENDS[
+    os.getenv("CACHE_BACKEND", default="locmem")
+]
+# Кэш виден всем воркерам; от этого зависят значения по умолчанию для
+# данных, которые нельзя держать в памяти одного процесса.
+CACHE_IS_SHARED = CACHE_BACKEND != CACHE_BACKENDS["locmem"][0]
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": os.getenv("CACHE_LOCATION", CACHE_DEFAULT_LOCATION),
+        "TIMEOUT": int(os.getenv("CACHE_TIMEOUT", default=300)),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", default=10000)),
+        },
     }
 }
 
+CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", default=600))
+# Метрики запросов: задержка считается всегда, число и время запросов
+# к БД и время сериализации — для доли METRICS_SAMPLE_RATE запросов.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").upper() == "TRUE"
+METRICS_SAMPLE_RATE = float(os.getenv("METRICS_SAMPLE_RATE", default=0.1))
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", default=10))
+METRICS_SERVER_TIMING = (
+    os.getenv("METRICS_SERVER_TIMING", "True").upper() == "TRUE"
+)
+# Без токена /metrics отдаётся только при DEBUG.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", default="")
+
+# Запись пользователя для JWT берётся из кэша, только если он общий:
+# сброс после смены роли или блокировки должен дойти до всех воркеров.
+AUTH_USER_CACHE = (
+    os.getenv("AUTH_USER_CACHE", str(CACHE_IS_SHARED)).upper() == "TRUE"
+)
+AUTH_USER_CACHE_TIMEOUT = int(
+    os.getenv("AUTH_USER_CACHE_TIMEOUT", default=300)
+)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -105,8 +204,11 @@ USE_TZ = True
 
 STATIC_URL = "/staticfiles/"
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
+# collectstatic кладёт рядом с файлами с хешем в имени их .gz и .br
+# (если установлен Brotli); whitenoise и nginx отдают сжатый вариант
+# по Accept-Encoding и кэшируют такие файлы навсегда.
 STATICFILES_STORAGE = (
-    "django.contrib.staticfiles.storage.ManifestStaticFilesStorage"
+    "whitenoise.storage.CompressedManifestStaticFilesStorage"
 )
 
 MEDIA_URL = "/media/"
@@ -114,18 +216,71 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
+    "DEFAULT_RENDERER_CLASSES": (
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    # Адрес клиента для ограничений берётся из X-Forwarded-For, который
+    # выставляет nginx; заголовок от самого клиента он перезаписывает.
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES", default=1)),
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.OffsetPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend"
     ],
+    # Корзины токенов api.throttling: «N/период», пустая строка отключает.
+    "DEFAULT_THROTTLE_RATES": {
+        scope: os.getenv(f"THROTTLE_{scope.upper()}", default) or None
+        for scope, default in (
+            ("auth_ip", "20/min"),
+            ("auth_user", "5/min"),
+            ("write_user", "30/min"),
+            ("write_ip", "120/min"),
+        )
+    },
 }
 
+# Запросов одновременно в одном процессе, сверх — сразу 503; 0 — без
+# ограничения.
+MAX_CONCURRENT_REQUESTS = int(
+    os.getenv("MAX_CONCURRENT_REQUESTS", default=0)
+)
+
+# Чтение произведений, отзывов и комментариев без сериализаторов DRF.
+FAST_READERS = os.getenv("FAST_READERS", "True").upper() == "TRUE"
+
+SEARCH_CONFIG = os.getenv("SEARCH_CONFIG", default="russian")
+
+PAGINATION_MAX_LIMIT = int(os.getenv("PAGINATION_MAX_LIMIT", default=100))
+# Выше этого числа строк count в списках берётся из оценки планировщика.
+COUNT_ESTIMATE_THRESHOLD = int(
+    os.getenv("COUNT_ESTIMATE_THRESHOLD", default=10000)
+)
+# Сколько живёт в кэше число комментариев к отзыву.
+COUNT_CACHE_TIMEOUT = int(os.getenv("COUNT_CACHE_TIMEOUT", default=300))
+
+# Host, с которым воркер gunicorn отправляет себе прогревочные запросы.
+WARMUP_HOST = os.getenv("WARMUP_HOST", default="localhost")
+
+TITLE_BULK_MAX_ITEMS = int(os.getenv("TITLE_BULK_MAX_ITEMS", default=5000))
+
+# Строк на одно чтение курсора при потоковой выгрузке.
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", default=2000))
+
+# Фасетный режим списка произведений передаёт в SQL список id, только
+# если он не длиннее этого значения, иначе — обычные условия фильтра.
+FACET_MAX_IDS = int(os.getenv("FACET_MAX_IDS", default=5000))
+# Индекс другого процесса догоняет не больше стольких изменений из
+# общего кэша, записи о них живут FACET_CHANGE_TIMEOUT секунд; иначе
+# индекс перестраивается.
+FACET_MAX_CHANGES = int(os.getenv("FACET_MAX_CHANGES", default=1000))
+FACET_CHANGE_TIMEOUT = int(os.getenv("FACET_CHANGE_TIMEOUT", default=3600))
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
     "AUTH_HEADER_TYPES": ("Bearer",),
@@ -135,9 +290,26 @@ SIMPLE_JWT = {
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
+# Очередь писем: воркер send_outbox повторяет неудачные отправки
+# с экспоненциальной задержкой.
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", default=100))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", default=2))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", default=8))
+OUTBOX_RETRY_DELAY = 30
+OUTBOX_MAX_RETRY_DELAY = 3600
+
 CONFIRM_CODE_CHARS = string.digits
 CONFIRM_CODE_LENGTH = 6
 CONFIRM_CODE_STUB = "wtPScP"
+# Хеши кодов подтверждения хранятся в кэше, если он общий для всех
+# воркеров; иначе, и пока кэш недоступен, код пишется в колонку
+# confirmation_code.
+CONFIRM_CODE_IN_CACHE = (
+    os.getenv("CONFIRM_CODE_IN_CACHE", str(CACHE_IS_SHARED)).upper()
+    == "TRUE"
+)
+CONFIRM_CODE_TTL = int(os.getenv("CONFIRM_CODE_TTL", 60 * 60))
+CONFIRM_CODE_MAX_ATTEMPTS = int(os.getenv("CONFIRM_CODE_MAX_ATTEMPTS", 5))
 
 MAX_EMAIL_LENGTH = 254
 MAX_USERNAME_LENGTH = 150
@@ -1,3 +1,5 @@
+from api.metrics import metrics_view
+from api.warmup import live_view, ready_view
 from django.contrib import admin
 from django.urls import include, path
 from django.views.generic import TemplateView
@@ -5,6 +7,9 @@ from django.views.generic import TemplateView
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("api.urls")),
+    path("metrics", metrics_view, name="metrics"),
+    path("health/live", live_view, name="health_live"),
+    path("health/ready", ready_view, name="health_ready"),
     path(
         "redoc/",
         TemplateView.as_view(template_name="redoc.html"),
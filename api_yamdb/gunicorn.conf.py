@@ -0,0 +1,73 @@
+"""Настройки gunicorn для контейнера web.
+
+Запуск: ``gunicorn -c gunicorn.conf.py api_yamdb.wsgi:application``.
+Значения по умолчанию считаются от числа ядер и переопределяются
+переменными окружения GUNICORN_*.
+"""
+import os
+import resource
+
+
+def cpu_count():
+    # Учитывает ядра, выделенные контейнеру через cpuset.
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+bind = os.getenv("GUNICORN_BIND", default="0:8000")
+# Процесс на ядро плюс один, по два потока в каждом: одновременных
+# запросов столько же, сколько у sync-воркеров по формуле 2 * ядра + 1,
+# а копий приложения в памяти вдвое меньше.
+workers = int(os.getenv("GUNICORN_WORKERS", default=cpu_count() + 1))
+threads = int(os.getenv("GUNICORN_THREADS", default=2))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", default=30))
+graceful_timeout = timeout
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", default=5))
+
+# Приложение загружается в мастере один раз, воркеры получают его
+# через fork.
+preload_app = os.getenv("GUNICORN_PRELOAD", "True").upper() == "TRUE"
+
+# Воркер перезапускается после max_requests запросов; разброс не даёт
+# всем воркерам уйти на перезапуск одновременно.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", default=1000))
+max_requests_jitter = int(
+    os.getenv("GUNICORN_MAX_REQUESTS_JITTER", default=100)
+)
+# Воркер, занявший больше стольких МиБ, перезапускается после текущего
+# запроса; 0 — без ограничения.
+max_memory = int(os.getenv("GUNICORN_MAX_MEMORY", default=0))
+
+
+def when_ready(server):
+    if not server.cfg.preload_app:
+        return
+    from api.warmup import prepare
+    from django.db import connections
+
+    from api_yamdb.postgresql_pool.base import close_before_fork
+
+    prepare()
+    # Воркеры не должны унаследовать сокеты соединений мастера.
+    close_before_fork(connections.all())
+
+
+def post_worker_init(worker):
+    from api.warmup import warm_up
+    from django.db import connections
+
+    warm_up()
+    if worker.cfg.threads > 1:
+        # Запросы обслуживают потоки пула, а не главный поток: его
+        # соединения закрываются, а с DB_POOL возвращаются в пул.
+        connections.close_all()
+
+
+def post_request(worker, req, environ, resp):
+    used = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+    if max_memory and used > max_memory:
+        worker.log.info(
+            "Worker uses %s MiB of %s MiB, restarting", used, max_memory
+        )
+        worker.alive = False
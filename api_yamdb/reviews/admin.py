@@ -1,11 +1,128 @@
+from api.pagination import estimate_count
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
 from django.contrib.auth.admin import UserAdmin
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
-from reviews.models import Category, Comment, CustomUser, Genre, Review, Title
+from reviews.models import (Category, Comment, CustomUser, Genre, OutboxEmail,
+                            Review, Title)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Для больших таблиц число строк берётся из оценки планировщика."""
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if (
+            estimate is not None
+            and estimate >= settings.COUNT_ESTIMATE_THRESHOLD
+        ):
+            return estimate
+        return super().count
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """Фильтр по внешнему ключу с полем автодополнения.
+
+    В отличие от RelatedFieldListFilter не выводит в боковую панель все
+    связанные объекты: варианты подгружает autocomplete связанной
+    модели, а на странице есть только выбранный объект.
+    """
+
+    template = "admin/autocomplete_filter.html"
+
+    def __init__(self, field, request, params, model, model_admin,
+                 field_path):
+        self.lookup_kwarg = f"{field_path}__{field.target_field.name}__exact"
+        self.lookup_val = params.get(self.lookup_kwarg)
+        super().__init__(
+            field, request, params, model, model_admin, field_path
+        )
+        self.title = field.verbose_name
+        widget = AutocompleteSelect(
+            field.remote_field, model_admin.admin_site
+        )
+        self.form_field = field.formfield(widget=widget)
+
+    def has_output(self):
+        return True
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def choices(self, changelist):
+        yield {
+            "selected": self.lookup_val is None,
+            "query_string": changelist.get_query_string(
+                remove=[self.lookup_kwarg]
+            ),
+            "display": _("All"),
+        }
+
+    @property
+    def widget_id(self):
+        return f"autocomplete_filter_{self.field_path}"
+
+    def rendered_widget(self):
+        return self.form_field.widget.render(
+            self.lookup_kwarg,
+            self.lookup_val,
+            attrs={"id": self.widget_id, "style": "width: 100%"},
+        )
+
+
+class ScalableAdminMixin:
+    """Список, который не сканирует таблицу целиком.
+
+    Поиск — точные совпадения по индексированным полям и по id, список
+    объектов — одним запросом с JOIN, число строк — из оценки
+    планировщика, без второго COUNT(*) по всей таблице.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # Поля для поиска по точному совпадению.
+    exact_search_fields = ()
+    # Поля для поиска по началу строки; для них есть индексы с
+    # varchar_pattern_ops.
+    prefix_search_fields = ()
+
+    def __init__(self, model, admin_site):
+        super().__init__(model, admin_site)
+        self.search_fields = (
+            self.exact_search_fields + self.prefix_search_fields
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        query = Q()
+        if term.isdigit():
+            query |= Q(pk=int(term))
+        for field in self.exact_search_fields:
+            query |= Q(**{field: term})
+        for field in self.prefix_search_fields:
+            query |= Q(**{f"{field}__startswith": term})
+        return queryset.filter(query), False
+
+    @property
+    def media(self):
+        media = super().media
+        if any(
+            isinstance(item, tuple) and item[1] is AutocompleteFilter
+            for item in self.list_filter
+        ):
+            media += AutocompleteSelect(None, self.admin_site).media
+        return media
 
 
 @admin.register(CustomUser)
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(ScalableAdminMixin, UserAdmin):
     list_display = ("pk", "username", "email", "role")
     fieldsets = (
         (None, {"fields": ("username", "password")}),
@@ -40,7 +157,8 @@ class CustomUserAdmin(UserAdmin):
         "email",
         "role",
     ]
-    search_fields = ("username",)
+    exact_search_fields = ("email",)
+    prefix_search_fields = ("username",)
 
 
 @admin.register(Category)
@@ -52,29 +170,53 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Title)
-class TitleAdmin(admin.ModelAdmin):
+class TitleAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = ("name", "year", "category")
-    search_fields = ("name",)
+    list_select_related = ("category",)
+    prefix_search_fields = ("name",)
     list_filter = ("category",)
     empty_value_display = "-пусто-"
 
 
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = ("author", "title", "text", "score", "pub_date")
-    search_fields = ("title",)
-    list_filter = ("author", "title")
+    list_select_related = ("author", "title")
+    exact_search_fields = ("author__username",)
+    list_filter = (
+        ("author", AutocompleteFilter),
+        ("title", AutocompleteFilter),
+    )
+    autocomplete_fields = ("author", "title")
+    # Сортировка по первичному ключу идёт по индексу и на миллионах строк.
+    ordering = ("-id",)
     empty_value_display = "-пусто-"
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(ScalableAdminMixin, admin.ModelAdmin):
     list_display = ("author", "review", "text", "pub_date")
-    search_fields = ("review",)
-    list_filter = ("author", "review")
+    list_select_related = ("author", "review")
+    exact_search_fields = ("author__username",)
+    list_filter = (
+        ("author", AutocompleteFilter),
+        ("review__title", AutocompleteFilter),
+    )
+    autocomplete_fields = ("author",)
+    raw_id_fields = ("review",)
+    ordering = ("-id",)
     empty_value_display = "-пусто-"
 
 
 @admin.register(Genre)
 class GenreAdmin(admin.ModelAdmin):
     list_display = ("name", "slug")
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        "recipient", "subject", "status", "attempts", "next_attempt_at"
+    )
+    search_fields = ("recipient",)
+    list_filter = ("status",)
@@ -0,0 +1,75 @@
+import time
+
+from api.readers import CommentReader, ReviewReader, TitleReader
+from api.renderers import FastJSONRenderer
+from api.serializers import (CommentSerializer, ReviewSerializer,
+                             TitleGetSerializer)
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from reviews.models import Comment, Review, Title
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares serializers with JSONRenderer against fast readers "
+        "with FastJSONRenderer on pages loaded from the database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        limit = options["limit"]
+        cases = (
+            (
+                "titles",
+                Title.objects.select_related("category").prefetch_related(
+                    "genre"
+                ),
+                TitleGetSerializer,
+                TitleReader,
+            ),
+            (
+                "reviews",
+                Review.objects.select_related("author"),
+                ReviewSerializer,
+                ReviewReader,
+            ),
+            (
+                "comments",
+                Comment.objects.select_related("author"),
+                CommentSerializer,
+                CommentReader,
+            ),
+        )
+        for name, queryset, serializer_class, reader_class in cases:
+            page = list(queryset.order_by("id")[:limit])
+            if not page:
+                self.stdout.write(f"{name}: no rows, skipped")
+                continue
+            slow = self.measure(
+                lambda: JSONRenderer().render(
+                    serializer_class(page, many=True).data
+                ),
+                options["repeat"],
+            )
+            fast = self.measure(
+                lambda: FastJSONRenderer().render(
+                    reader_class(page, many=True).data
+                ),
+                options["repeat"],
+            )
+            if slow[1] != fast[1]:
+                raise CommandError(f"{name}: outputs differ")
+            self.stdout.write(
+                f"{name} x{len(page)}: serializer {slow[0]:.2f} ms, "
+                f"reader {fast[0]:.2f} ms, {slow[0] / fast[0]:.1f}x faster"
+            )
+
+    def measure(self, render, repeat):
+        output = render()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            render()
+        return (time.perf_counter() - started) / repeat * 1000, output
@@ -0,0 +1,163 @@
+import time
+from wsgiref.util import setup_testing_defaults
+
+from api.connections import pool_stats
+from django.apps import apps
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, router
+from django.db.utils import load_backend
+from django.test import override_settings
+
+BENCHMARK_PATH = "/api/v1/titles/"
+BENCHMARK_BACKENDS = (
+    ("without pool", "django.db.backends.postgresql"),
+    ("with pool", "api_yamdb.postgresql_pool"),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Checks that every database accepts connections and has the "
+        "project tables. With --benchmark, measures the latency of a "
+        "titles list request with and without the connection pool"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            action="append",
+            dest="databases",
+            help="Alias to check, all databases by default",
+        )
+        parser.add_argument(
+            "--benchmark",
+            type=int,
+            default=0,
+            help="Number of titles list requests per backend",
+        )
+
+    def handle(self, *args, **options):
+        failed = []
+        for alias in options["databases"] or list(connections):
+            try:
+                self.check_database(alias)
+            except DatabaseError as error:
+                self.stderr.write(f"{alias}: {error}")
+                failed.append(alias)
+                continue
+        if failed:
+            raise CommandError(f"Database check failed: {', '.join(failed)}")
+        if options["benchmark"]:
+            self.benchmark(options["benchmark"])
+
+    def check_database(self, alias):
+        connection = connections[alias]
+        connection.close()
+        started = time.perf_counter()
+        connection.ensure_connection()
+        connected = time.perf_counter() - started
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        round_trip = time.perf_counter() - started
+        tables = set(connection.introspection.table_names())
+        missing = sorted(
+            model._meta.db_table
+            for model in apps.get_models()
+            if router.allow_migrate_model(alias, model)
+            and model._meta.db_table not in tables
+        )
+        settings_dict = connection.settings_dict
+        self.stdout.write(
+            f"{alias}: {settings_dict['ENGINE']}, "
+            f"connect {connected * 1000:.1f} ms, "
+            f"SELECT 1 {round_trip * 1000:.2f} ms, "
+            f"CONN_MAX_AGE {settings_dict['CONN_MAX_AGE']}"
+        )
+        stats = pool_stats().get(alias)
+        if stats:
+            self.stdout.write(f"{alias}: pool {stats}")
+        if missing:
+            raise DatabaseError(f"missing tables: {', '.join(missing)}")
+
+    def benchmark(self, count):
+        # Запросы читают только из основной базы; она и сравнивается.
+        connection = connections[DEFAULT_DB_ALIAS]
+        if connection.vendor != "postgresql":
+            self.report("current backend", self.time_requests(count))
+            return
+        from api_yamdb.postgresql_pool.base import pools
+
+        connection.close()
+        saved_pool = pools.pop(DEFAULT_DB_ALIAS, None)
+        for label, engine in BENCHMARK_BACKENDS:
+            # Пул возвращает соединение в конце запроса, только если
+            # CONN_MAX_AGE = 0; без пула берётся настройка проекта.
+            max_age = (
+                0 if engine == "api_yamdb.postgresql_pool"
+                else connection.settings_dict["CONN_MAX_AGE"]
+            )
+            wrapper = load_backend(engine).DatabaseWrapper(
+                {
+                    **connection.settings_dict,
+                    "ENGINE": engine,
+                    "CONN_MAX_AGE": max_age,
+                },
+                DEFAULT_DB_ALIAS,
+            )
+            connections[DEFAULT_DB_ALIAS] = wrapper
+            try:
+                durations = self.time_requests(count)
+            finally:
+                wrapper.close()
+                connections[DEFAULT_DB_ALIAS] = connection
+                pool = pools.pop(DEFAULT_DB_ALIAS, None)
+                if pool is not None:
+                    pool.close_idle()
+            self.report(f"{label}, CONN_MAX_AGE {max_age}", durations)
+        if saved_pool is not None:
+            pools[DEFAULT_DB_ALIAS] = saved_pool
+
+    def time_requests(self, count):
+        # Запрос проходит через WSGIHandler, как в gunicorn: сигналы
+        # начала и конца запроса закрывают соединение или возвращают его
+        # в пул. Тестовый Client этого не делает. Кэш отключён, чтобы
+        # каждый запрос доходил до базы, реплики — чтобы читать из неё.
+        handler = WSGIHandler()
+        durations = []
+        with override_settings(
+            ALLOWED_HOSTS=["*"],
+            DATABASE_REPLICAS=[],
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.dummy.DummyCache"
+                }
+            },
+        ):
+            for _ in range(count):
+                environ = {"PATH_INFO": BENCHMARK_PATH}
+                setup_testing_defaults(environ)
+                started = time.perf_counter()
+                response = handler(environ, lambda status, headers: None)
+                try:
+                    b"".join(response)
+                finally:
+                    response.close()
+                durations.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    raise CommandError(
+                        f"GET {BENCHMARK_PATH}: {response.status_code}"
+                    )
+        return durations
+
+    def report(self, label, durations):
+        count = len(durations)
+        durations = sorted(durations)
+        self.stdout.write(
+            f"GET {BENCHMARK_PATH} {label}: {count} requests, "
+            f"mean {sum(durations) / count * 1000:.2f} ms, "
+            f"p50 {durations[count // 2] * 1000:.2f} ms, "
+            f"p95 {durations[int(count * 0.95)] * 1000:.2f} ms"
+        )
@@ -0,0 +1,52 @@
+import sys
+
+from api.export import CONTENT_TYPES, EXPORTS, NDJSON, export_stream
+from django.core.management.base import BaseCommand, CommandError
+from reviews.models import Category, Title
+
+
+class Command(BaseCommand):
+    help = (
+        "Streams titles, reviews or comments as NDJSON or CSV "
+        "to a file or stdout"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("resource", choices=sorted(EXPORTS))
+        parser.add_argument(
+            "--format",
+            dest="output",
+            choices=sorted(CONTENT_TYPES),
+            default=NDJSON,
+        )
+        parser.add_argument("--title", type=int)
+        parser.add_argument("--category")
+        parser.add_argument("--output", dest="path", help="Defaults to stdout")
+        parser.add_argument(
+            "--gzip", action="store_true", help="Compress the output"
+        )
+
+    def handle(self, *args, **options):
+        title, category = options["title"], options["category"]
+        if title is not None and not Title.objects.filter(pk=title).exists():
+            raise CommandError(f"Title {title} does not exist")
+        if (
+            category is not None
+            and not Category.objects.filter(slug=category).exists()
+        ):
+            raise CommandError(f"Category {category} does not exist")
+        chunks = export_stream(
+            options["resource"],
+            options["output"],
+            title,
+            category,
+            compress=options["gzip"],
+        )
+        if not options["path"]:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+        with open(options["path"], "wb") as output:
+            for chunk in chunks:
+                output.write(chunk)
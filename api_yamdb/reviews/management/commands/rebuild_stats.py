@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Max, Min
+from reviews.models import Title
+from reviews.statistics import rebuild_title_statistics
+
+
+class Command(BaseCommand):
+    help = "Rebuilds title statistics from reviews and comments"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Number of chunks processed in parallel",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to rebuild statistics in",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        self.using = options["database"]
+        bounds = Title.objects.using(self.using).aggregate(
+            first=Min("id"), last=Max("id")
+        )
+        if bounds["first"] is None:
+            self.stdout.write("No titles, nothing to rebuild")
+            return
+        chunks = [
+            (start, start + batch_size)
+            for start in range(bounds["first"], bounds["last"] + 1, batch_size)
+        ]
+        if options["workers"] > 1:
+            with ThreadPoolExecutor(options["workers"]) as pool:
+                rebuilt = sum(pool.map(self.rebuild_in_thread, chunks))
+        else:
+            rebuilt = sum(map(self.rebuild_chunk, chunks))
+        self.stdout.write(f"Rebuilt statistics for {rebuilt} titles")
+
+    def rebuild_chunk(self, chunk):
+        start, stop = chunk
+        title_ids = list(
+            Title.objects.using(self.using)
+            .filter(id__gte=start, id__lt=stop)
+            .values_list("id", flat=True)
+        )
+        rebuild_title_statistics(title_ids, self.using)
+        return len(title_ids)
+
+    def rebuild_in_thread(self, chunk):
+        # У каждого потока своё соединение с БД, закрываем его сами.
+        try:
+            return self.rebuild_chunk(chunk)
+        finally:
+            connections.close_all()
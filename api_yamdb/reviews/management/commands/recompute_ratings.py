@@ -0,0 +1,75 @@
+import math
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from reviews.models import Title
+from reviews.ratings import average, calculate_title_ratings
+
+
+class Command(BaseCommand):
+    help = "Recomputes stored title ratings from reviews"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report titles with inconsistent ratings",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to recompute ratings in",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        check = options["check"]
+        using = options["database"]
+        titles = Title.objects.using(using).only(
+            "id", "rating_sum", "review_count", "rating_avg"
+        )
+        last_id = 0
+        checked = mismatched = 0
+        while True:
+            batch = list(
+                titles.filter(id__gt=last_id).order_by("id")[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+            checked += len(batch)
+            totals = calculate_title_ratings(
+                [title.id for title in batch], using
+            )
+            stale = []
+            for title in batch:
+                rating_sum, review_count = totals[title.id]
+                rating_avg = average(rating_sum, review_count)
+                if (
+                    (title.rating_sum, title.review_count) == totals[title.id]
+                    and math.isclose(title.rating_avg, rating_avg)
+                ):
+                    continue
+                self.stdout.write(
+                    f"Title {title.id}: stored "
+                    f"{title.rating_sum}/{title.review_count}, "
+                    f"actual {rating_sum}/{review_count}"
+                )
+                title.rating_sum = rating_sum
+                title.review_count = review_count
+                title.rating_avg = rating_avg
+                stale.append(title)
+            mismatched += len(stale)
+            if stale and not check:
+                with transaction.atomic(using=using):
+                    Title.objects.using(using).bulk_update(
+                        stale, ("rating_sum", "review_count", "rating_avg")
+                    )
+        if check and mismatched:
+            raise CommandError(
+                f"Checked {checked} titles, {mismatched} inconsistent"
+            )
+        self.stdout.write(
+            f"Checked {checked} titles, fixed {mismatched} inconsistent"
+        )
@@ -0,0 +1,380 @@
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+
+from api.metrics import route_name
+from api.throttling import WRITE_THROTTLES
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Max, Min
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import Category, CustomUser, Genre, Review, Title
+
+# Доли запросов синтетической нагрузки: чтение преобладает.
+SYNTHETIC_MIX = (
+    ("list_titles", 30),
+    ("get_title", 15),
+    ("filter_titles", 10),
+    ("search_titles", 5),
+    ("list_reviews", 15),
+    ("list_comments", 10),
+    ("list_catalog", 5),
+    ("create_review", 5),
+    ("create_comment", 5),
+)
+PERCENTILES = (50, 95, 99)
+SAMPLE_SIZE = 1000
+
+
+def percentile(durations, rank):
+    """Перцентиль по ближайшему рангу для отсортированного списка."""
+    if not durations:
+        return 0.0
+    index = max(int(round(rank / 100 * len(durations))) - 1, 0)
+    return durations[min(index, len(durations) - 1)]
+
+
+def summarize(durations, statuses, elapsed):
+    durations = sorted(durations)
+    summary = {
+        "count": len(durations),
+        "rps": round(len(durations) / elapsed, 1) if elapsed else 0.0,
+        "errors": sum(1 for status in statuses if status >= 500),
+        "client_errors": sum(
+            1 for status in statuses if 400 <= status < 500
+        ),
+        "mean_ms": round(
+            sum(durations) / len(durations) * 1000 if durations else 0, 2
+        ),
+    }
+    for rank in PERCENTILES:
+        summary[f"p{rank}_ms"] = round(percentile(durations, rank) * 1000, 2)
+    return summary
+
+
+def change(before, after):
+    if not before:
+        return f"{after}"
+    return f"{before} -> {after} ({(after - before) / before * 100:+.1f}%)"
+
+
+class SyntheticTrace:
+    """Генерирует запросы по идентификаторам, которые есть в базе."""
+
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+        self.titles = self.sample(Title.objects, "id")
+        self.reviews = self.sample(Review.objects, "id", "title_id")
+        self.users = self.sample(
+            CustomUser.objects.filter(is_active=True), "username"
+        )
+        self.genres = self.sample(Genre.objects, "slug")
+        self.categories = self.sample(Category.objects, "slug")
+        self.words = [
+            word
+            for name in Title.objects.values_list("name", flat=True)[:100]
+            for word in name.split()
+        ]
+        if not self.titles or not self.users:
+            raise CommandError("Seed the database before replaying traffic")
+
+    def sample(self, queryset, *fields):
+        # Случайные id из диапазона вместо ORDER BY random(), который
+        # сортирует всю таблицу; на пропусках в id строк будет меньше.
+        bounds = queryset.aggregate(first=Min("pk"), last=Max("pk"))
+        if bounds["first"] is None:
+            return []
+        ids = range(bounds["first"], bounds["last"] + 1)
+        return list(
+            queryset.filter(
+                pk__in=self.random.sample(ids, min(SAMPLE_SIZE, len(ids)))
+            )
+            .order_by()
+            .values_list(*fields, flat=len(fields) == 1)
+        )
+
+    def __iter__(self):
+        kinds, weights = zip(*SYNTHETIC_MIX)
+        while True:
+            kind = self.random.choices(kinds, weights)[0]
+            entry = getattr(self, kind)()
+            if entry:
+                yield entry
+
+    def pick(self, items):
+        return self.random.choice(items) if items else None
+
+    def list_titles(self):
+        query = f"offset={self.pick((0, 0, 0, 10, 20, 100))}"
+        ordering = self.pick(("", "-rating", "-year", "name"))
+        if ordering:
+            query += f"&ordering={ordering}"
+        return {"method": "GET", "path": f"/api/v1/titles/?{query}"}
+
+    def get_title(self):
+        return {
+            "method": "GET",
+            "path": f"/api/v1/titles/{self.pick(self.titles)}/",
+        }
+
+    def filter_titles(self):
+        if self.genres and self.random.random() < 0.5:
+            query = f"genre={self.pick(self.genres)}"
+        elif self.categories:
+            query = f"category={self.pick(self.categories)}"
+        else:
+            return None
+        return {"method": "GET", "path": f"/api/v1/titles/?{query}"}
+
+    def search_titles(self):
+        word = self.pick(self.words)
+        if word is None:
+            return None
+        return {"method": "GET", "path": f"/api/v1/titles/?search={word}"}
+
+    def list_reviews(self):
+        return {
+            "method": "GET",
+            "path": f"/api/v1/titles/{self.pick(self.titles)}/reviews/",
+        }
+
+    def list_comments(self):
+        if not self.reviews:
+            return None
+        review, title = self.pick(self.reviews)
+        return {
+            "method": "GET",
+            "path": f"/api/v1/titles/{title}/reviews/{review}/comments/",
+        }
+
+    def list_catalog(self):
+        resource = self.pick(("genres", "categories"))
+        return {"method": "GET", "path": f"/api/v1/{resource}/"}
+
+    def create_review(self):
+        return {
+            "method": "POST",
+            "path": f"/api/v1/titles/{self.pick(self.titles)}/reviews/",
+            "user": self.pick(self.users),
+            "body": {
+                "text": "Нагрузочный отзыв",
+                "score": self.random.randint(1, 10),
+            },
+        }
+
+    def create_comment(self):
+        if not self.reviews:
+            return None
+        review, title = self.pick(self.reviews)
+        return {
+            "method": "POST",
+            "path": f"/api/v1/titles/{title}/reviews/{review}/comments/",
+            "user": self.pick(self.users),
+            "body": {"text": "Нагрузочный комментарий"},
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        "Replays a JSON lines trace of API requests through the WSGI "
+        "application and reports latency percentiles per endpoint"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "trace",
+            nargs="?",
+            help="JSON lines file: method, path, optional body and user",
+        )
+        parser.add_argument(
+            "--synthetic",
+            type=int,
+            default=0,
+            help="Generate this many requests from database contents",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--concurrency", type=int, default=1)
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=0,
+            help="Requests to send before measuring",
+        )
+        parser.add_argument(
+            "--save-trace", help="Write the replayed requests to this file"
+        )
+        parser.add_argument("--output", help="Write results as JSON")
+        parser.add_argument(
+            "--baseline", help="Compare with results saved by --output"
+        )
+        parser.add_argument(
+            "--throttle",
+            action="store_true",
+            help="Keep write throttling on; replayed writes then mostly "
+            "get 429",
+        )
+
+    def handle(self, *args, **options):
+        entries = self.load_entries(options)
+        if options["save_trace"]:
+            with open(
+                options["save_trace"], "w", encoding="utf-8"
+            ) as trace_file:
+                for entry in entries:
+                    trace_file.write(json.dumps(entry, ensure_ascii=False))
+                    trace_file.write("\n")
+        self.tokens = {}
+        self.tokens_lock = threading.Lock()
+        warmup = options["warmup"]
+        with self.write_throttling(options["throttle"]):
+            self.replay(entries[:warmup], options["concurrency"])
+            results = self.replay(entries[warmup:], options["concurrency"])
+        self.report(results)
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, indent=2, sort_keys=True)
+        if options["baseline"]:
+            with open(options["baseline"]) as baseline:
+                self.compare(json.load(baseline), results)
+
+    def load_entries(self, options):
+        if options["synthetic"]:
+            trace = iter(SyntheticTrace(options["seed"]))
+            total = options["synthetic"] + options["warmup"]
+            return [next(trace) for _ in range(total)]
+        if not options["trace"]:
+            raise CommandError("Pass a trace file or --synthetic N")
+        with open(options["trace"], encoding="utf-8") as trace_file:
+            return [json.loads(line) for line in trace_file if line.strip()]
+
+    def write_throttling(self, enabled):
+        # Все записи трассы идут от нескольких пользователей с одного
+        # адреса, и корзины WRITE_THROTTLES отклонили бы почти все.
+        if enabled:
+            return nullcontext()
+        rates = {
+            **settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+            **{throttle.scope: None for throttle in WRITE_THROTTLES},
+        }
+        return override_settings(
+            REST_FRAMEWORK={
+                **settings.REST_FRAMEWORK,
+                "DEFAULT_THROTTLE_RATES": rates,
+            }
+        )
+
+    def token(self, username):
+        with self.tokens_lock:
+            if username not in self.tokens:
+                user = CustomUser.objects.get(username=username)
+                self.tokens[username] = str(AccessToken.for_user(user))
+            return self.tokens[username]
+
+    def send(self, client, entry):
+        headers = {}
+        if entry.get("user"):
+            headers["HTTP_AUTHORIZATION"] = (
+                f"Bearer {self.token(entry['user'])}"
+            )
+        method = getattr(client, entry.get("method", "GET").lower())
+        if "body" in entry:
+            return method(
+                entry["path"],
+                json.dumps(entry["body"]),
+                content_type="application/json",
+                **headers,
+            )
+        return method(entry["path"], **headers)
+
+    def replay(self, entries, concurrency):
+        samples = defaultdict(lambda: ([], []))
+        lock = threading.Lock()
+        position = iter(entries)
+
+        def worker():
+            client = Client()
+            try:
+                while True:
+                    with lock:
+                        entry = next(position, None)
+                    if entry is None:
+                        return
+                    started = time.perf_counter()
+                    response = self.send(client, entry)
+                    duration = time.perf_counter() - started
+                    endpoint = (
+                        f"{entry.get('method', 'GET').upper()} "
+                        f"{route_name(response.wsgi_request)}"
+                    )
+                    with lock:
+                        durations, statuses = samples[endpoint]
+                        durations.append(duration)
+                        statuses.append(response.status_code)
+            finally:
+                if concurrency > 1:
+                    connections.close_all()
+
+        started = time.perf_counter()
+        if concurrency > 1:
+            threads = [
+                threading.Thread(target=worker) for _ in range(concurrency)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        else:
+            worker()
+        elapsed = time.perf_counter() - started
+        durations = [
+            duration for values, _ in samples.values() for duration in values
+        ]
+        statuses = [
+            status for _, values in samples.values() for status in values
+        ]
+        return {
+            "elapsed": round(elapsed, 3),
+            "concurrency": concurrency,
+            "total": summarize(durations, statuses, elapsed),
+            "endpoints": {
+                endpoint: summarize(values, codes, elapsed)
+                for endpoint, (values, codes) in sorted(samples.items())
+            },
+        }
+
+    def report(self, results):
+        columns = ("count", "rps", "errors", "p50_ms", "p95_ms", "p99_ms")
+        width = max(map(len, results["endpoints"]), default=10)
+        self.stdout.write(
+            f"{'endpoint':<{width}} " + " ".join(f"{c:>8}" for c in columns)
+        )
+        rows = [*results["endpoints"].items(), ("total", results["total"])]
+        for endpoint, summary in rows:
+            self.stdout.write(
+                f"{endpoint:<{width}} "
+                + " ".join(f"{summary[c]:>8}" for c in columns)
+            )
+
+    def compare(self, baseline, results):
+        self.stdout.write("Against baseline (rps, p95):")
+        rows = [
+            *results["endpoints"].items(),
+            ("total", results["total"]),
+        ]
+        for endpoint, summary in rows:
+            before = (
+                baseline["total"]
+                if endpoint == "total"
+                else baseline["endpoints"].get(endpoint)
+            )
+            if not before:
+                continue
+            self.stdout.write(
+                f"{endpoint}: {change(before['rps'], summary['rps'])}, "
+                f"{change(before['p95_ms'], summary['p95_ms'])}"
+            )
@@ -0,0 +1,226 @@
+import csv
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Max
+from django.utils import timezone
+from reviews.models import (Category, Comment, CustomUser, Genre, Review,
+                            Title, TitleGenre)
+
+WORDS = (
+    "мир война любовь город ночь дорога море время история дом песня "
+    "сад зима лето звезда тень огонь река голос сон"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a synthetic dataset and loads it with import_csv. "
+        "Review counts per title follow a Zipf-like distribution"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--categories", type=int, default=10)
+        parser.add_argument("--genres", type=int, default=30)
+        parser.add_argument("--titles", type=int, default=10000)
+        parser.add_argument("--reviews", type=int, default=100000)
+        parser.add_argument(
+            "--comments-per-review",
+            type=float,
+            default=2,
+            help="Average number of comments per review",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument(
+            "--path",
+            help="Keep generated csv files in this directory",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to seed",
+        )
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["titles"] < 1:
+            raise CommandError("At least one user and one title are needed")
+        self.random = random.Random(options["seed"])
+        self.options = options
+        self.offsets = {
+            model: self.last_pk(model)
+            for model in (
+                CustomUser,
+                Category,
+                Genre,
+                Title,
+                TitleGenre,
+                Review,
+                Comment,
+            )
+        }
+        if options["path"]:
+            os.makedirs(options["path"], exist_ok=True)
+            self.generate(options["path"])
+            self.load(options["path"])
+            return
+        with tempfile.TemporaryDirectory() as path:
+            self.generate(path)
+            self.load(path)
+
+    def last_pk(self, model):
+        queryset = model.objects.using(self.options["database"])
+        return queryset.aggregate(last=Max("pk"))["last"] or 0
+
+    def load(self, path):
+        call_command(
+            "import_csv",
+            path=path,
+            batch_size=self.options["batch_size"],
+            workers=self.options["workers"],
+            database=self.options["database"],
+            stdout=self.stdout,
+            stderr=self.stderr,
+        )
+
+    def ids(self, model, count):
+        start = self.offsets[model] + 1
+        return range(start, start + count)
+
+    def phrase(self, length):
+        return " ".join(self.random.choices(WORDS, k=length))
+
+    def write(self, path, name, header, rows):
+        with open(os.path.join(path, name), "w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+    def generate(self, path):
+        options = self.options
+        self.users = self.ids(CustomUser, options["users"])
+        self.categories = self.ids(Category, options["categories"])
+        self.genres = self.ids(Genre, options["genres"])
+        self.titles = self.ids(Title, options["titles"])
+        self.write(
+            path,
+            "users.csv",
+            ("id", "username", "email", "role"),
+            (
+                (pk, f"seed_user_{pk}", f"seed_user_{pk}@yamdb.fake", "user")
+                for pk in self.users
+            ),
+        )
+        for name, ids in (
+            ("category.csv", self.categories),
+            ("genre.csv", self.genres),
+        ):
+            self.write(
+                path,
+                name,
+                ("id", "name", "slug"),
+                ((pk, self.phrase(2), f"seed-{name[:3]}-{pk}") for pk in ids),
+            )
+        self.write(
+            path,
+            "titles.csv",
+            ("id", "name", "year", "category", "description"),
+            self.title_rows(),
+        )
+        self.write(
+            path,
+            "genre_title.csv",
+            ("id", "title_id", "genre_id"),
+            self.genre_rows(),
+        )
+        self.write(
+            path,
+            "review.csv",
+            ("id", "title_id", "text", "author", "score", "pub_date"),
+            self.review_rows(),
+        )
+        self.write(
+            path,
+            "comments.csv",
+            ("id", "review_id", "text", "author", "pub_date"),
+            self.comment_rows(),
+        )
+
+    def title_rows(self):
+        for pk in self.titles:
+            category = (
+                self.random.choice(self.categories) if self.categories else ""
+            )
+            yield (
+                pk,
+                self.phrase(3).capitalize(),
+                self.random.randint(1950, timezone.now().year),
+                category,
+                self.phrase(12),
+            )
+
+    def genre_rows(self):
+        pk = self.offsets[TitleGenre]
+        for title in self.titles:
+            count = min(len(self.genres), self.random.randint(1, 3))
+            for genre in self.random.sample(self.genres, count):
+                pk += 1
+                yield pk, title, genre
+
+    def review_counts(self):
+        # Популярным произведениям достаётся больше отзывов, как в жизни;
+        # у одного автора не больше одного отзыва на произведение.
+        weights = [1 / rank for rank in range(1, len(self.titles) + 1)]
+        total = sum(weights)
+        limit = len(self.users)
+        order = list(self.titles)
+        self.random.shuffle(order)
+        for title, weight in zip(order, weights):
+            count = round(self.options["reviews"] * weight / total)
+            yield title, min(count, limit)
+
+    def pub_date(self):
+        moment = datetime(2015, 1, 1) + timedelta(
+            seconds=self.random.randrange(300000000)
+        )
+        return timezone.make_aware(moment).isoformat()
+
+    def review_rows(self):
+        pk = self.offsets[Review]
+        self.review_ids = []
+        for title, count in self.review_counts():
+            start = self.random.randrange(len(self.users))
+            for index in range(count):
+                pk += 1
+                author = self.users[(start + index) % len(self.users)]
+                self.review_ids.append(pk)
+                yield (
+                    pk,
+                    title,
+                    self.phrase(20),
+                    author,
+                    self.random.choices(
+                        range(1, 11), weights=(1, 1, 2, 3, 5, 7, 9, 9, 6, 4)
+                    )[0],
+                    self.pub_date(),
+                )
+
+    def comment_rows(self):
+        pk = self.offsets[Comment]
+        per_review = self.options["comments_per_review"]
+        for _ in range(round(len(self.review_ids) * per_review)):
+            pk += 1
+            yield (
+                pk,
+                self.random.choice(self.review_ids),
+                self.phrase(8),
+                self.random.choice(self.users),
+                self.pub_date(),
+            )
@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from reviews.outbox import deliver_pending
+
+
+class Command(BaseCommand):
+    help = "Delivers queued emails from the outbox table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the queue once and exit",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.OUTBOX_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.OUTBOX_POLL_INTERVAL,
+            help="Seconds to wait when the queue is empty",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                close_old_connections()
+                self.drain(options["batch_size"])
+                if options["once"]:
+                    return
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+    def drain(self, batch_size):
+        while True:
+            sent, postponed = deliver_pending(batch_size)
+            if sent or postponed:
+                self.stdout.write(f"Sent {sent}, postponed {postponed}")
+            if sent + postponed < batch_size:
+                return
@@ -0,0 +1,36 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:30
+
+from django.db import migrations, models
+
+# Связи, загруженные старым import_csv в reviews_titlegenre, переносятся
+# в таблицу, которую читает Title.genre.
+COPY_GENRE_LINKS = """
+INSERT INTO reviews_title_genre (title_id, genre_id)
+SELECT DISTINCT link.title_id, link.genre_id
+FROM reviews_titlegenre link
+WHERE link.title_id IS NOT NULL AND link.genre_id IS NOT NULL
+AND NOT EXISTS (
+    SELECT 1 FROM reviews_title_genre existing
+    WHERE existing.title_id = link.title_id
+    AND existing.genre_id = link.genre_id
+)
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='title',
+            name='genre',
+            field=models.ManyToManyField(help_text='Жанр, к которому будет относиться произведение', related_name='titles', to='reviews.Genre', verbose_name='Жанр'),
+        ),
+        migrations.RunSQL(COPY_GENRE_LINKS, migrations.RunSQL.noop),
+        migrations.DeleteModel(
+            name='TitleGenre',
+        ),
+    ]
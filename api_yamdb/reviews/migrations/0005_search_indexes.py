@@ -0,0 +1,38 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+from reviews.operations import ForVendor
+from reviews.search import (POSTGRES_DOCUMENT_INDEX,
+                            POSTGRES_DOCUMENT_INDEX_DROP, SQLITE_FTS,
+                            SQLITE_FTS_DROP, SQLITE_TRIGGERS,
+                            SQLITE_TRIGGERS_DROP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_remove_titlegenre'),
+    ]
+
+    operations = [
+        ForVendor('postgresql', [
+            TrigramExtension(),
+            migrations.AddIndex(
+                model_name='title',
+                index=GinIndex(
+                    fields=['name'],
+                    name='title_name_trgm_idx',
+                    opclasses=['gin_trgm_ops'],
+                ),
+            ),
+            migrations.RunSQL(
+                POSTGRES_DOCUMENT_INDEX, POSTGRES_DOCUMENT_INDEX_DROP
+            ),
+        ]),
+        ForVendor('sqlite', [
+            migrations.RunSQL(
+                SQLITE_FTS + SQLITE_TRIGGERS,
+                SQLITE_TRIGGERS_DROP + SQLITE_FTS_DROP,
+            ),
+        ]),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:30
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+
+
+def fill_statistics(apps, schema_editor):
+    """Сводки для произведений, созданных до появления таблицы."""
+    db = schema_editor.connection.alias
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    Comment = apps.get_model('reviews', 'Comment')
+    TitleStatistics = apps.get_model('reviews', 'TitleStatistics')
+    last_id = 0
+    while True:
+        title_ids = list(
+            Title.objects.using(db)
+            .filter(pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:BATCH_SIZE]
+        )
+        if not title_ids:
+            break
+        last_id = title_ids[-1]
+        statistics = {
+            title_id: TitleStatistics(title_id=title_id)
+            for title_id in title_ids
+        }
+        scores = (
+            Review.objects.using(db)
+            .filter(title_id__in=title_ids)
+            .order_by()
+            .values_list('title_id', 'score')
+            .annotate(count=Count('id'))
+        )
+        for title_id, score, count in scores:
+            setattr(statistics[title_id], f'score_{score}', count)
+        comments = (
+            Comment.objects.using(db)
+            .filter(review__title_id__in=title_ids)
+            .order_by()
+            .values_list('review__title_id')
+            .annotate(count=Count('id'))
+        )
+        for title_id, count in comments:
+            statistics[title_id].comment_count = count
+        TitleStatistics.objects.using(db).bulk_create(statistics.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_outboxemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleStatistics',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='statistics', serialize=False, to='reviews.Title', verbose_name='Произведение')),
+                ('comment_count', models.PositiveIntegerField(default=0, verbose_name='Количество комментариев')),
+                ('score_1', models.PositiveIntegerField(default=0, verbose_name='Оценок 1')),
+                ('score_2', models.PositiveIntegerField(default=0, verbose_name='Оценок 2')),
+                ('score_3', models.PositiveIntegerField(default=0, verbose_name='Оценок 3')),
+                ('score_4', models.PositiveIntegerField(default=0, verbose_name='Оценок 4')),
+                ('score_5', models.PositiveIntegerField(default=0, verbose_name='Оценок 5')),
+                ('score_6', models.PositiveIntegerField(default=0, verbose_name='Оценок 6')),
+                ('score_7', models.PositiveIntegerField(default=0, verbose_name='Оценок 7')),
+                ('score_8', models.PositiveIntegerField(default=0, verbose_name='Оценок 8')),
+                ('score_9', models.PositiveIntegerField(default=0, verbose_name='Оценок 9')),
+                ('score_10', models.PositiveIntegerField(default=0, verbose_name='Оценок 10')),
+            ],
+            options={
+                'verbose_name': 'Статистика произведения',
+                'verbose_name_plural': 'Статистика произведений',
+            },
+        ),
+        migrations.RunPython(fill_statistics, migrations.RunPython.noop),
+    ]
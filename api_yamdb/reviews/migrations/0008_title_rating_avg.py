@@ -0,0 +1,47 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:31
+
+from django.db import migrations, models
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+from reviews.operations import ForVendor
+from reviews.search import SQLITE_TRIGGERS, SQLITE_TRIGGERS_DROP
+
+
+def fill_rating_avg(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Title.objects.using(schema_editor.connection.alias).filter(
+        review_count__gt=0
+    ).update(rating_avg=Cast(F('rating_sum'), FloatField()) / F('review_count'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_titlestatistics'),
+    ]
+
+    # SQLite добавляет столбец, пересоздавая reviews_title, и триггеры
+    # поиска пропадают вместе со старой таблицей; в обе стороны они
+    # создаются заново после пересоздания.
+    operations = [
+        ForVendor('sqlite', [
+            migrations.RunSQL(migrations.RunSQL.noop, SQLITE_TRIGGERS),
+        ]),
+        migrations.AddField(
+            model_name='title',
+            name='rating_avg',
+            field=models.FloatField(default=0, editable=False, verbose_name='Средняя оценка'),
+        ),
+        ForVendor('sqlite', [
+            migrations.RunSQL(SQLITE_TRIGGERS, SQLITE_TRIGGERS_DROP),
+        ]),
+        migrations.RunPython(fill_rating_avg, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['-rating_avg', 'id'], name='title_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', '-rating_avg', 'id'], name='title_category_rating_idx'),
+        ),
+    ]
@@ -1,7 +1,8 @@
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from reviews.validators import username_validator, validate_year
 
 USER_ROLE = "user"
@@ -57,6 +58,14 @@ class CustomUser(AbstractUser):
 
     class Meta:
         ordering = ("username",)
+        indexes = [
+            # Поиск по началу имени в админке и автодополнении.
+            models.Index(
+                fields=("username",),
+                name="user_username_prefix_idx",
+                opclasses=("varchar_pattern_ops",),
+            ),
+        ]
 
     REQUIRED_FIELDS = ("email",)
     USERNAME_FIELD = "username"
@@ -97,7 +106,6 @@ class Title(models.Model):
     )
     genre = models.ManyToManyField(
         Genre,
-        null=True,
         related_name="titles",
         verbose_name="Жанр",
         help_text="Жанр, к которому будет относиться произведение",
@@ -114,19 +122,50 @@ class Title(models.Model):
     year = models.PositiveIntegerField(
         verbose_name="Год выпуска", validators=(validate_year,)
     )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name="Сумма оценок", default=0, editable=False
+    )
+    review_count = models.PositiveIntegerField(
+        verbose_name="Количество отзывов", default=0, editable=False
+    )
+    # Средняя оценка для сортировки; 0, пока отзывов нет.
+    rating_avg = models.FloatField(
+        verbose_name="Средняя оценка", default=0, editable=False
+    )
 
     class Meta:
         ordering = ("name",)
         verbose_name = "Произведение"
         verbose_name_plural = "Прозведения"
+        indexes = [
+            models.Index(fields=("name", "id"), name="title_name_id_idx"),
+            models.Index(
+                fields=("name",),
+                name="title_name_prefix_idx",
+                opclasses=("varchar_pattern_ops",),
+            ),
+            models.Index(
+                fields=("-rating_avg", "id"), name="title_rating_idx"
+            ),
+            models.Index(
+                fields=("category", "-rating_avg", "id"),
+                name="title_category_rating_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def rating(self):
+        if not self.review_count:
+            return None
+        return self.rating_sum // self.review_count
+
 
-class TitleGenre(models.Model):
-    title = models.ForeignKey(Title, null=True, on_delete=models.CASCADE)
-    genre = models.ForeignKey(Genre, null=True, on_delete=models.CASCADE)
+# Автоматическая промежуточная таблица reviews_title_genre; изменения
+# через title.genre приходят в сигнал m2m_changed.
+TitleGenre = Title.genre.through
 
 
 class CommentReview(models.Model):
@@ -168,8 +207,31 @@ class Review(CommentReview):
                 fields=["author", "title"], name="unique_author"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=("title", "-pub_date", "-id"),
+                name="review_title_pub_date_idx",
+            ),
+        ]
         default_related_name = "reviews"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_rating_state()
+        return instance
+
+    def remember_rating_state(self):
+        """Запоминает оценку и произведение, учтённые в рейтинге."""
+        self._rated_score = self.__dict__.get("score")
+        self._rated_title_id = self.__dict__.get("title_id")
+
+    def save(self, *args, **kwargs):
+        # Рейтинг произведения пересчитывается в post_save, поэтому
+        # сохранение отзыва и обновление рейтинга идут одной транзакцией.
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
 
 class Comment(CommentReview):
     review = models.ForeignKey(
@@ -181,4 +243,85 @@ class Comment(CommentReview):
     class Meta(CommentReview.Meta):
         verbose_name = "Коментарий"
         verbose_name_plural = "Коментарии"
+        indexes = [
+            models.Index(
+                fields=("review", "-pub_date", "-id"),
+                name="comment_review_pub_date_idx",
+            ),
+        ]
         default_related_name = "comments"
+
+
+class TitleStatistics(models.Model):
+    """Сводка по отзывам произведения, обновляется сигналами reviews."""
+
+    title = models.OneToOneField(
+        Title,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name="statistics",
+        verbose_name="Произведение",
+    )
+    comment_count = models.PositiveIntegerField(
+        verbose_name="Количество комментариев", default=0
+    )
+    score_1 = models.PositiveIntegerField("Оценок 1", default=0)
+    score_2 = models.PositiveIntegerField("Оценок 2", default=0)
+    score_3 = models.PositiveIntegerField("Оценок 3", default=0)
+    score_4 = models.PositiveIntegerField("Оценок 4", default=0)
+    score_5 = models.PositiveIntegerField("Оценок 5", default=0)
+    score_6 = models.PositiveIntegerField("Оценок 6", default=0)
+    score_7 = models.PositiveIntegerField("Оценок 7", default=0)
+    score_8 = models.PositiveIntegerField("Оценок 8", default=0)
+    score_9 = models.PositiveIntegerField("Оценок 9", default=0)
+    score_10 = models.PositiveIntegerField("Оценок 10", default=0)
+
+    class Meta:
+        verbose_name = "Статистика произведения"
+        verbose_name_plural = "Статистика произведений"
+
+    def __str__(self):
+        return str(self.title_id)
+
+
+class OutboxEmail(models.Model):
+    PENDING = "pending"
+    FAILED = "failed"
+    STATUSES = (
+        (PENDING, "pending"),
+        (FAILED, "failed"),
+    )
+
+    subject = models.CharField(verbose_name="Тема", max_length=256)
+    body = models.TextField(verbose_name="Текст")
+    from_email = models.CharField(
+        verbose_name="Отправитель",
+        max_length=settings.MAX_EMAIL_LENGTH,
+        blank=True,
+    )
+    recipient = models.CharField(
+        verbose_name="Получатель", max_length=settings.MAX_EMAIL_LENGTH
+    )
+    status = models.CharField(
+        choices=STATUSES,
+        max_length=max(len(status) for status, _ in STATUSES),
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ("next_attempt_at", "id")
+        verbose_name = "Письмо в очереди"
+        verbose_name_plural = "Очередь писем"
+        indexes = [
+            models.Index(
+                fields=("status", "next_attempt_at", "id"),
+                name="outbox_status_next_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient}: {self.subject}"
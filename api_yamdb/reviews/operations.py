@@ -0,0 +1,45 @@
+from django.db.migrations.operations.base import Operation
+
+
+class ForVendor(Operation):
+    """Операции миграции, которые выполняются только на одной СУБД.
+
+    Состояние моделей не меняется: так описываются объекты, которых нет
+    в моделях, — расширения, GIN-индексы, таблицы FTS5 и их триггеры.
+    """
+
+    reversible = True
+    reduces_to_sql = True
+
+    def __init__(self, vendor, operations):
+        self.vendor = vendor
+        self.operations = operations
+
+    def deconstruct(self):
+        return self.__class__.__name__, [self.vendor, self.operations], {}
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor != self.vendor:
+            return
+        for operation in self.operations:
+            operation.database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.vendor != self.vendor:
+            return
+        for operation in reversed(self.operations):
+            operation.database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+    def describe(self):
+        return f"{self.vendor} only: " + "; ".join(
+            operation.describe() for operation in self.operations
+        )
@@ -0,0 +1,103 @@
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+from reviews.models import OutboxEmail
+
+
+def enqueue_email(subject, message, recipient, from_email=""):
+    """Ставит письмо в очередь; отправляет его воркер send_outbox."""
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=message,
+        recipient=recipient,
+        from_email=from_email or "",
+    )
+
+
+def retry_delay(attempts):
+    return timedelta(
+        seconds=min(
+            settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1),
+            settings.OUTBOX_MAX_RETRY_DELAY,
+        )
+    )
+
+
+def build_message(email, connection):
+    return EmailMessage(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email or None,
+        to=[email.recipient],
+        connection=connection,
+    )
+
+
+def schedule_retry(email, error, now):
+    email.attempts += 1
+    email.last_error = str(error) or error.__class__.__name__
+    if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        email.status = OutboxEmail.FAILED
+    else:
+        email.next_attempt_at = now + retry_delay(email.attempts)
+
+
+def deliver_pending(batch_size=None):
+    """Отправляет пачку писем через одно соединение с почтовым сервером.
+
+    Возвращает пару (отправлено, отложено). Строки блокируются
+    с SKIP LOCKED, поэтому несколько воркеров не шлют одно письмо дважды.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxEmail.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        if not emails:
+            return 0, 0
+        sent, postponed = [], []
+        try:
+            with get_connection(fail_silently=False) as connection:
+                for email in emails:
+                    try:
+                        build_message(email, connection).send()
+                    except (smtplib.SMTPException, OSError) as error:
+                        schedule_retry(email, error, now)
+                        postponed.append(email)
+                    else:
+                        sent.append(email.pk)
+        except (smtplib.SMTPException, OSError) as error:
+            # Не удалось открыть соединение: откладываем всю пачку.
+            done = set(sent)
+            for email in emails:
+                if email.pk not in done and email not in postponed:
+                    schedule_retry(email, error, now)
+                    postponed.append(email)
+        OutboxEmail.objects.filter(pk__in=sent).delete()
+        OutboxEmail.objects.bulk_update(
+            postponed,
+            ("status", "attempts", "last_error", "next_attempt_at"),
+        )
+    return len(sent), len(postponed)
+
+
+def outbox_stats():
+    pending = OutboxEmail.objects.filter(status=OutboxEmail.PENDING)
+    oldest = pending.aggregate(oldest=Min("created"))["oldest"]
+    return {
+        "pending": pending.count(),
+        "failed": OutboxEmail.objects.filter(
+            status=OutboxEmail.FAILED
+        ).count(),
+        "oldest_pending_seconds": (
+            int((timezone.now() - oldest).total_seconds()) if oldest else 0
+        ),
+    }
@@ -0,0 +1,56 @@
+from django.db.models import (Case, Count, ExpressionWrapper, F, FloatField,
+                              Sum, Value, When)
+from django.db.models.functions import Cast, Coalesce
+from reviews.models import Review, Title
+
+
+def average(rating_sum, review_count):
+    return rating_sum / review_count if review_count else 0
+
+
+def update_title_rating(title_id, score_delta, count_delta):
+    if title_id is None:
+        return
+    rating_sum = F("rating_sum") + score_delta
+    review_count = F("review_count") + count_delta
+    # В UPDATE справа видны старые значения столбцов, поэтому среднее
+    # считается по тем же выражениям, что и новые сумма и количество.
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=rating_sum,
+        review_count=review_count,
+        rating_avg=Case(
+            When(review_count=-count_delta, then=Value(0.0)),
+            default=ExpressionWrapper(
+                Cast(rating_sum, FloatField()) / review_count,
+                output_field=FloatField(),
+            ),
+            output_field=FloatField(),
+        ),
+    )
+
+
+def calculate_title_ratings(title_ids, using=None):
+    totals = {title_id: (0, 0) for title_id in title_ids}
+    rows = (
+        Review.objects.using(using)
+        .filter(title_id__in=title_ids)
+        .order_by()
+        .values("title_id")
+        .annotate(rating_sum=Sum("score"), review_count=Count("id"))
+    )
+    for row in rows:
+        totals[row["title_id"]] = (row["rating_sum"], row["review_count"])
+    return totals
+
+
+def recalculate_title_rating(title_id):
+    if title_id is None:
+        return
+    totals = Review.objects.filter(title_id=title_id).aggregate(
+        rating_sum=Coalesce(Sum("score"), 0),
+        review_count=Count("id"),
+    )
+    Title.objects.filter(pk=title_id).update(
+        rating_avg=average(totals["rating_sum"], totals["review_count"]),
+        **totals,
+    )
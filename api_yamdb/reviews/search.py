@@ -0,0 +1,111 @@
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVectorField,
+                                            TrigramSimilarity)
+from django.db import connections
+from django.db.models import F, FloatField, Q
+from django.db.models.expressions import RawSQL, Value
+
+TITLE_TABLE = "reviews_title"
+FTS_TABLE = "reviews_title_fts"
+
+# Выражение должно совпадать с индексом, иначе PostgreSQL его не применит.
+POSTGRES_DOCUMENT = (
+    f"to_tsvector('{settings.SEARCH_CONFIG}'::regconfig, "
+    f"coalesce({TITLE_TABLE}.name, '') || ' ' || "
+    f"coalesce({TITLE_TABLE}.description, ''))"
+)
+
+# Объекты поиска создаёт миграция 0005_search_indexes.
+POSTGRES_DOCUMENT_INDEX = (
+    f"CREATE INDEX title_document_idx ON {TITLE_TABLE} "
+    f"USING gin (({POSTGRES_DOCUMENT.replace(f'{TITLE_TABLE}.', '')}))"
+)
+POSTGRES_DOCUMENT_INDEX_DROP = "DROP INDEX IF EXISTS title_document_idx"
+
+SQLITE_FTS = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"name, description, content='{TITLE_TABLE}', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2')",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+)
+SQLITE_FTS_DROP = (f"DROP TABLE IF EXISTS {FTS_TABLE}",)
+
+# SQLite при изменении столбцов пересоздаёт reviews_title, и триггеры
+# удаляются вместе со старой таблицей: такая миграция должна создать их
+# заново (см. 0008_title_rating_avg).
+SQLITE_TRIGGERS = (
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert "
+    f"AFTER INSERT ON {TITLE_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, name, description) "
+    f"VALUES (new.id, new.name, new.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete "
+    f"AFTER DELETE ON {TITLE_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) "
+    f"VALUES ('delete', old.id, old.name, old.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update "
+    f"AFTER UPDATE ON {TITLE_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) "
+    f"VALUES ('delete', old.id, old.name, old.description); "
+    f"INSERT INTO {FTS_TABLE}(rowid, name, description) "
+    f"VALUES (new.id, new.name, new.description); END",
+)
+SQLITE_TRIGGERS_DROP = tuple(
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{event}"
+    for event in ("insert", "delete", "update")
+)
+
+
+def search_postgresql(queryset, text):
+    query = SearchQuery(text, config=settings.SEARCH_CONFIG)
+    return queryset.annotate(
+        document=RawSQL(
+            POSTGRES_DOCUMENT, [], output_field=SearchVectorField()
+        ),
+    ).filter(
+        Q(document=query) | Q(name__trigram_similar=text)
+    ).annotate(
+        search_rank=SearchRank(F("document"), query)
+        + TrigramSimilarity("name", text),
+    )
+
+
+def search_sqlite(queryset, text):
+    terms = re.findall(r"\w+", text)
+    if not terms:
+        return queryset.none()
+    # Каждое слово ищется как префикс: «шоу» найдёт «Шоушенка».
+    match = " ".join(f'"{term}"*' for term in terms)
+    # pk__in=RawSQL(...) SQLite воспринимает как скалярный подзапрос
+    # и сравнивает только с первой строкой, поэтому условие задано явно.
+    return queryset.extra(
+        where=[
+            f"{TITLE_TABLE}.id IN (SELECT rowid FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s)"
+        ],
+        params=[match],
+    ).annotate(
+        search_rank=RawSQL(
+            f"SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = {TITLE_TABLE}.id",
+            [match],
+            output_field=FloatField(),
+        )
+    )
+
+
+def search_fallback(queryset, text):
+    return queryset.filter(
+        Q(name__icontains=text) | Q(description__icontains=text)
+    ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def search_titles(queryset, text):
+    """Отбирает произведения по тексту и сортирует их по релевантности."""
+    search = {
+        "postgresql": search_postgresql,
+        "sqlite": search_sqlite,
+    }.get(connections[queryset.db].vendor, search_fallback)
+    return search(queryset, text).order_by("-search_rank", "name", "id")
@@ -0,0 +1,83 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import Comment, Review, Title, TitleStatistics
+from reviews.ratings import recalculate_title_rating, update_title_rating
+from reviews.statistics import (rebuild_title_statistics, review_title,
+                                update_title_statistics)
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        TitleStatistics.objects.create(title=instance)
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    rated_score = getattr(instance, "_rated_score", None)
+    rated_title_id = getattr(instance, "_rated_title_id", None)
+    if created:
+        update_title_rating(instance.title_id, instance.score, 1)
+        update_title_statistics(instance.title_id, [(instance.score, 1)])
+    elif rated_score is None:
+        recalculate_title_rating(instance.title_id)
+        rebuild_title_statistics([instance.title_id])
+    elif rated_title_id != instance.title_id:
+        review_moved(instance, rated_score, rated_title_id)
+    elif rated_score != instance.score:
+        update_title_rating(instance.title_id, instance.score - rated_score, 0)
+        update_title_statistics(
+            instance.title_id, [(rated_score, -1), (instance.score, 1)]
+        )
+    instance.remember_rating_state()
+
+
+def review_moved(instance, rated_score, rated_title_id):
+    comment_count = instance.comments.count()
+    update_title_rating(rated_title_id, -rated_score, -1)
+    update_title_rating(instance.title_id, instance.score, 1)
+    update_title_statistics(
+        rated_title_id, [(rated_score, -1)], -comment_count
+    )
+    update_title_statistics(
+        instance.title_id, [(instance.score, 1)], comment_count
+    )
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    rated_score = getattr(instance, "_rated_score", None)
+    if rated_score is None:
+        recalculate_title_rating(instance.title_id)
+        rebuild_title_statistics([instance.title_id])
+        return
+    update_title_rating(instance._rated_title_id, -rated_score, -1)
+    # При удалении произведения его сводка может быть удалена раньше
+    # отзывов; создавать её заново нельзя.
+    update_title_statistics(
+        instance._rated_title_id, [(rated_score, -1)], create_missing=False
+    )
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    if Comment.review.is_cached(instance):
+        title = instance.review.title_id
+    else:
+        title = review_title(instance.review_id)
+    update_title_statistics(title, comment_delta=1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    # При каскадном удалении отзыва комментарии удаляются раньше него,
+    # так что подзапрос ещё находит произведение.
+    update_title_statistics(
+        review_title(instance.review_id),
+        comment_delta=-1,
+        create_missing=False,
+    )
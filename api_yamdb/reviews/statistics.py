@@ -0,0 +1,109 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, Subquery, Sum
+from reviews.models import Comment, Review, Title, TitleStatistics
+
+SCORES = range(1, 11)
+
+
+def score_field(score):
+    return f"score_{score}"
+
+
+SCORE_FIELDS = [score_field(score) for score in SCORES]
+
+
+def update_title_statistics(
+    title, scores=(), comment_delta=0, create_missing=True
+):
+    """Сдвигает счётчики сводки; scores — пары (оценка, изменение).
+
+    title — id произведения или подзапрос, который его возвращает.
+    Если сводки нет, при create_missing она считается целиком заново.
+    """
+    deltas = Counter()
+    for score, delta in scores:
+        deltas[score_field(score)] += delta
+    deltas["comment_count"] += comment_delta
+    changes = {
+        field: F(field) + delta for field, delta in deltas.items() if delta
+    }
+    if title is None or not changes:
+        return
+    updated = TitleStatistics.objects.filter(title_id=title).update(**changes)
+    if not updated and create_missing:
+        create_title_statistics(title)
+
+
+def create_title_statistics(title):
+    title_ids = list(
+        Title.objects.filter(pk=title).values_list("pk", flat=True)
+    )
+    TitleStatistics.objects.bulk_create(
+        calculate_title_statistics(title_ids).values(),
+        ignore_conflicts=True,
+    )
+
+
+def review_title(review_id):
+    return Subquery(
+        Review.objects.filter(pk=review_id).values("title_id")[:1]
+    )
+
+
+def calculate_title_statistics(title_ids, using=None):
+    statistics = {
+        title_id: TitleStatistics(title_id=title_id) for title_id in title_ids
+    }
+    scores = (
+        Review.objects.using(using)
+        .filter(title_id__in=title_ids)
+        .order_by()
+        .values_list("title_id", "score")
+        .annotate(count=Count("id"))
+    )
+    for title_id, score, count in scores:
+        setattr(statistics[title_id], score_field(score), count)
+    comments = (
+        Comment.objects.using(using)
+        .filter(review__title_id__in=title_ids)
+        .order_by()
+        .values_list("review__title_id")
+        .annotate(count=Count("id"))
+    )
+    for title_id, count in comments:
+        statistics[title_id].comment_count = count
+    return statistics
+
+
+def rebuild_title_statistics(title_ids, using=None):
+    title_ids = [title_id for title_id in title_ids if title_id is not None]
+    statistics = calculate_title_statistics(title_ids, using)
+    stored = TitleStatistics.objects.db_manager(using)
+    with transaction.atomic(using=using):
+        stored.filter(title_id__in=title_ids).delete()
+        stored.bulk_create(statistics.values())
+
+
+def summarize(queryset):
+    """Гистограмма, средняя оценка и счётчики по набору сводок."""
+    totals = queryset.aggregate(
+        title_count=Count("title_id"),
+        comment_count=Sum("comment_count"),
+        **{field: Sum(field) for field in SCORE_FIELDS},
+    )
+    histogram = {
+        str(score): totals[score_field(score)] or 0 for score in SCORES
+    }
+    review_count = sum(histogram.values())
+    score_sum = sum(int(score) * count for score, count in histogram.items())
+    return {
+        "title_count": totals["title_count"],
+        "review_count": review_count,
+        "comment_count": totals["comment_count"] or 0,
+        "mean": (
+            round(score_sum / review_count, 2) if review_count else None
+        ),
+        "histogram": histogram,
+    }
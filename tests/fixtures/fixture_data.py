@@ -0,0 +1,79 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from rest_framework.test import APIClient
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def estimate_queries():
+    # На PostgreSQL count списка начинается с оценки планировщика
+    # (EXPLAIN), на остальных СУБД её нет.
+    return int(connection.vendor == 'postgresql')
+
+
+@pytest.fixture
+def admin(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestAdmin', email='admin@yamdb.fake', role='admin'
+    )
+
+
+@pytest.fixture
+def admin_client(admin):
+    client = APIClient()
+    client.force_authenticate(user=admin)
+    return client
+
+
+@pytest.fixture
+def catalog(django_user_model):
+    from reviews.models import Category, Comment, Genre, Review, Title
+
+    users = [
+        django_user_model.objects.create_user(
+            username=f'user{index}', email=f'user{index}@yamdb.fake'
+        )
+        for index in range(12)
+    ]
+    categories = [
+        Category.objects.create(name=f'Категория {index}', slug=f'cat{index}')
+        for index in range(3)
+    ]
+    genres = [
+        Genre.objects.create(name=f'Жанр {index}', slug=f'genre{index}')
+        for index in range(4)
+    ]
+    titles = []
+    for index in range(12):
+        title = Title.objects.create(
+            name=f'Произведение {index:02}',
+            year=2000 + index,
+            description='Описание',
+            category=categories[index % len(categories)],
+        )
+        title.genre.set(genres[:index % len(genres) + 1])
+        titles.append(title)
+    title = titles[0]
+    for index, user in enumerate(users):
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=index % 10 + 1
+        )
+        for commenter in users:
+            Comment.objects.create(
+                review=review, author=commenter, text='Комментарий'
+            )
+    return {
+        'users': users,
+        'categories': categories,
+        'genres': genres,
+        'titles': titles,
+        'title': title,
+        'review': title.reviews.first(),
+    }
@@ -0,0 +1,129 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.fixture
+def superuser_client(client, django_user_model):
+    superuser = django_user_model.objects.create_superuser(
+        username='root', email='root@yamdb.fake', password='password'
+    )
+    client.force_login(superuser)
+    return client
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что страница `{url}` открывается'
+    )
+    return len(context), response
+
+
+@pytest.mark.django_db
+class TestAdminQueries:
+
+    @pytest.mark.parametrize('url, budget', [
+        ('/admin/reviews/review/', 4),
+        ('/admin/reviews/comment/', 4),
+        ('/admin/reviews/title/', 5),
+        ('/admin/reviews/customuser/', 5),
+    ])
+    def test_changelist_budget(self, superuser_client, catalog, url, budget,
+                               estimate_queries):
+        from reviews.models import Review
+
+        budget += estimate_queries
+
+        queries, _ = count_queries(superuser_client, url)
+        for title in catalog['titles'][1:]:
+            Review.objects.create(
+                title=title, author=catalog['users'][0], text='Отзыв'
+            )
+        more_rows, _ = count_queries(superuser_client, url)
+        assert queries == more_rows, (
+            f'Проверьте, что число запросов на `{url}` не зависит от '
+            f'числа строк: {queries} и {more_rows}'
+        )
+        assert more_rows <= budget, (
+            f'Страница `{url}` выполняет {more_rows} запросов к БД, '
+            f'допустимо не больше {budget}'
+        )
+
+    def test_filters_do_not_list_objects(self, superuser_client, catalog,
+                                         estimate_queries):
+        user = catalog['users'][3]
+        url = f'/admin/reviews/review/?author__id__exact={user.id}'
+        queries, response = count_queries(superuser_client, url)
+        content = response.content.decode()
+        assert queries <= 5 + estimate_queries
+        assert f'<option value="{user.id}" selected>' in content
+        assert content.count('<option') == 3, (
+            'Проверьте, что фильтры по автору и произведению не выводят '
+            'всех пользователей и произведения'
+        )
+        assert 'admin/js/autocomplete.' in content
+        assert response.context['cl'].result_count == 1
+
+    def test_comment_filter_by_title(self, superuser_client, catalog):
+        title = catalog['titles'][1]
+        _, response = count_queries(
+            superuser_client,
+            f'/admin/reviews/comment/?review__title__id__exact={title.id}',
+        )
+        assert response.context['cl'].result_count == 0
+
+    def test_search_is_exact(self, superuser_client, catalog):
+        _, response = count_queries(
+            superuser_client, '/admin/reviews/review/?q=user3'
+        )
+        assert response.context['cl'].result_count == 1
+        _, response = count_queries(
+            superuser_client, '/admin/reviews/review/?q=user'
+        )
+        assert response.context['cl'].result_count == 0, (
+            'Проверьте, что отзывы ищутся по точному имени автора'
+        )
+
+    def test_user_autocomplete(self, superuser_client, catalog):
+        _, response = count_queries(
+            superuser_client, '/admin/reviews/customuser/autocomplete/'
+            '?term=user1'
+        )
+        assert [item['text'] for item in response.json()['results']] == [
+            'user1', 'user10', 'user11'
+        ]
+
+    def test_estimated_count(self, superuser_client, catalog, monkeypatch,
+                             settings):
+        settings.COUNT_ESTIMATE_THRESHOLD = 100
+        monkeypatch.setattr(
+            'reviews.admin.estimate_count', lambda queryset: 2000000
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = superuser_client.get('/admin/reviews/comment/')
+        assert response.context['cl'].result_count == 2000000
+        assert not any(
+            'COUNT' in query['sql'] for query in context.captured_queries
+        ), 'Проверьте, что большие таблицы не считаются через COUNT(*)'
+
+    def test_title_genres_in_change_form(self, superuser_client, catalog):
+        title = catalog['titles'][0]
+        genres = catalog['genres']
+        url = f'/admin/reviews/title/{title.id}/change/'
+        assert superuser_client.get(url).status_code == 200
+        response = superuser_client.post(url, {
+            'name': title.name, 'year': title.year,
+            'description': title.description,
+            'category': title.category_id,
+            'genre': [genres[2].id, genres[3].id],
+        })
+        assert response.status_code == 302
+        assert set(title.genre.values_list('slug', flat=True)) == {
+            'genre2', 'genre3'
+        }, 'Проверьте, что жанры произведения меняются в админке'
+        titles = superuser_client.get(
+            '/api/v1/titles/', {'genre': 'genre3', 'limit': 20}
+        ).json()['results']
+        assert title.name in [item['name'] for item in titles]
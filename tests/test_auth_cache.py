@@ -0,0 +1,115 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+def token_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+    )
+    return client
+
+
+@pytest.fixture
+def shared_cache(settings):
+    settings.AUTH_USER_CACHE = True
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('shared_cache')
+class TestCachedAuthentication:
+
+    def test_user_is_cached(self, admin):
+        client = token_client(admin)
+        assert client.get('/api/v1/stats/cache/').status_code == 200
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/v1/stats/cache/')
+        assert response.status_code == 200
+        assert len(queries) == 0, (
+            'Проверьте, что повторный запрос с тем же токеном не загружает '
+            'пользователя из БД'
+        )
+        assert response.json()['auth'] == {'misses': 1}
+
+    def test_stale_write_after_invalidation(
+        self, monkeypatch, django_user_model
+    ):
+        from api.authentication import CachedJWTAuthentication
+
+        user = django_user_model.objects.create_user(
+            username='reader', email='reader@yamdb.fake'
+        )
+        client = token_client(user)
+        load_user_values = CachedJWTAuthentication.load_user_values
+
+        def load_then_promote(self, user_id):
+            try:
+                return load_user_values(self, user_id)
+            finally:
+                # Роль меняют, пока запрос держит прочитанные значения:
+                # он запишет их в кэш уже после сброса.
+                promoted = django_user_model.objects.get(pk=user_id)
+                promoted.role = 'admin'
+                promoted.save()
+
+        monkeypatch.setattr(
+            CachedJWTAuthentication, 'load_user_values', load_then_promote
+        )
+        assert client.get('/api/v1/users/').status_code == 403
+        monkeypatch.undo()
+        assert client.get('/api/v1/users/').status_code == 200, (
+            'Проверьте, что значения, прочитанные до смены роли, '
+            'не используются после сброса кэша пользователя'
+        )
+
+    def test_role_change_invalidates(self, admin, django_user_model):
+        user = django_user_model.objects.create_user(
+            username='reader', email='reader@yamdb.fake'
+        )
+        client = token_client(user)
+        assert client.get('/api/v1/users/').status_code == 403
+        response = token_client(admin).patch(
+            '/api/v1/users/reader/', data={'role': 'admin'}
+        )
+        assert response.status_code == 200
+        assert client.get('/api/v1/users/').status_code == 200, (
+            'Проверьте, что смена роли сбрасывает кэш пользователя'
+        )
+        user.refresh_from_db()
+        user.is_active = False
+        user.save()
+        assert client.get('/api/v1/users/').status_code == 401
+
+    def test_profile_is_complete(self, admin):
+        client = token_client(admin)
+        client.get('/api/v1/users/me/')
+        response = client.patch('/api/v1/users/me/', data={'bio': 'Био'})
+        assert response.status_code == 200
+        assert response.json()['email'] == admin.email
+        admin.refresh_from_db()
+        assert (admin.email, admin.bio) == ('admin@yamdb.fake', 'Био'), (
+            'Проверьте, что изменение профиля не затирает поля пользователя'
+        )
+
+
+@pytest.mark.django_db
+class TestProcessLocalCache:
+
+    def test_role_change_on_other_worker(self, settings, django_user_model):
+        settings.AUTH_USER_CACHE = False
+        user = django_user_model.objects.create_user(
+            username='reader', email='reader@yamdb.fake'
+        )
+        client = token_client(user)
+        assert client.get('/api/v1/users/').status_code == 403
+        # update() не вызывает сигналов, как запись в другом воркере.
+        django_user_model.objects.filter(pk=user.pk).update(role='admin')
+        assert client.get('/api/v1/users/').status_code == 200, (
+            'Проверьте, что без общего кэша пользователь загружается '
+            'из БД на каждый запрос'
+        )
+        django_user_model.objects.filter(pk=user.pk).update(is_active=False)
+        assert client.get('/api/v1/users/').status_code == 401
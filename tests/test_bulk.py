@@ -0,0 +1,81 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+def item(name, genres, category='cat0', **extra):
+    return {
+        'name': name,
+        'year': 1999,
+        'description': 'Описание',
+        'category': category,
+        'genre': genres,
+        **extra,
+    }
+
+
+@pytest.mark.django_db
+class TestTitleBulkUpsert:
+
+    url = '/api/v1/titles/bulk/'
+
+    def test_upsert(self, admin_client, catalog):
+        from reviews.models import Title
+
+        existing = catalog['titles'][0]
+        payload = [
+            item('Новое 1', ['genre0', 'genre1']),
+            item('Обновлённое', ['genre3'], category='cat2', id=existing.id),
+            item('Плохой жанр', ['nope']),
+            item('Плохой год', ['genre0'], year=3000),
+            item('Новое 2', ['genre2']),
+        ]
+        response = admin_client.post(self.url, data=payload, format='json')
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert [result['status'] for result in results] == [
+            'created', 'updated', 'invalid', 'invalid', 'created'
+        ]
+        assert 'genre' in results[2]['errors']
+        assert 'year' in results[3]['errors']
+        created = Title.objects.get(id=results[0]['id'])
+        assert sorted(created.genre.values_list('slug', flat=True)) == [
+            'genre0', 'genre1'
+        ]
+        existing.refresh_from_db()
+        assert existing.name == 'Обновлённое'
+        assert existing.category.slug == 'cat2'
+        assert list(existing.genre.values_list('slug', flat=True)) == [
+            'genre3'
+        ], 'Проверьте, что жанры обновлённого произведения заменяются'
+        assert existing.review_count == 12, (
+            'Проверьте, что пакетное обновление не затирает рейтинг'
+        )
+
+    def test_slugs_resolved_once(self, admin_client, catalog):
+        payload = [
+            item(f'Произведение {index}', [f'genre{index % 4}'])
+            for index in range(40)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.post(
+                self.url, data=payload, format='json'
+            )
+        assert response.status_code == 200
+        genre_queries = [
+            query for query in queries
+            if 'FROM "reviews_genre"' in query['sql']
+        ]
+        assert len(genre_queries) == 1, (
+            'Проверьте, что слаги жанров разрешаются одним запросом'
+        )
+
+    def test_permissions_and_limits(self, admin_client, catalog, settings):
+        response = APIClient().post(self.url, data=[], format='json')
+        assert response.status_code == 401
+        settings.TITLE_BULK_MAX_ITEMS = 1
+        response = admin_client.post(
+            self.url, data=[item('1', []), item('2', [])], format='json'
+        )
+        assert response.status_code == 400
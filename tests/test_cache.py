@@ -0,0 +1,98 @@
+import os
+import re
+
+import pytest
+
+from .conftest import infra_dir_path
+
+
+@pytest.mark.django_db
+class TestCatalogCache:
+
+    def test_title_list_invalidated_by_review(self, client, catalog):
+        title = catalog['titles'][1]
+        url = '/api/v1/titles/?limit=100'
+        assert client.get(url)['X-Cache'] == 'MISS'
+        response = client.get(url)
+        assert response['X-Cache'] == 'HIT', (
+            'Проверьте, что повторный запрос списка произведений '
+            'отдаётся из кэша'
+        )
+        title.reviews.create(
+            author=catalog['users'][0], text='Отзыв', score=7
+        )
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что новый отзыв сбрасывает кэш произведений'
+        )
+        rating = {
+            item['id']: item['rating'] for item in response.json()['results']
+        }
+        assert rating[title.id] == 7
+
+    def test_title_detail_invalidated_precisely(self, client, catalog):
+        first, second = catalog['titles'][:2]
+        for title in (first, second):
+            client.get(f'/api/v1/titles/{title.id}/')
+        first.name = 'Новое название'
+        first.save()
+        response = client.get(f'/api/v1/titles/{first.id}/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['name'] == 'Новое название'
+        response = client.get(f'/api/v1/titles/{second.id}/')
+        assert response['X-Cache'] == 'HIT', (
+            'Проверьте, что изменение одного произведения не сбрасывает '
+            'кэш остальных'
+        )
+
+    def test_genre_rename_invalidates_titles(self, client, catalog):
+        title = catalog['titles'][0]
+        genre = catalog['genres'][0]
+        client.get('/api/v1/genres/')
+        client.get(f'/api/v1/titles/{title.id}/')
+        genre.name = 'Переименованный жанр'
+        genre.save()
+        assert client.get('/api/v1/genres/')['X-Cache'] == 'MISS'
+        response = client.get(f'/api/v1/titles/{title.id}/')
+        assert response['X-Cache'] == 'MISS'
+        assert 'Переименованный жанр' in [
+            item['name'] for item in response.json()['genre']
+        ]
+        title.genre.remove(genre)
+        response = client.get(f'/api/v1/titles/{title.id}/')
+        assert response['X-Cache'] == 'MISS'
+        assert genre.slug not in [
+            item['slug'] for item in response.json()['genre']
+        ]
+
+    def test_stats(self, client, admin_client, catalog):
+        client.get('/api/v1/categories/')
+        client.get('/api/v1/categories/')
+        response = admin_client.get('/api/v1/stats/cache/')
+        assert response.status_code == 200
+        assert response.json()['catalog'] == {'hits': 1, 'misses': 1}
+        assert client.get('/api/v1/stats/cache/').status_code == 401
+
+
+class TestSharedCache:
+
+    def test_process_local_cache_warning(self, settings):
+        from api.checks import check_shared_cache
+
+        assert [
+            warning.id for warning in check_shared_cache(None)
+        ] == ['api.W001']
+        settings.CACHES = {'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': 'redis://redis:6379/1',
+        }}
+        assert check_shared_cache(None) == []
+
+    def test_compose_uses_redis(self):
+        with open(os.path.join(infra_dir_path, 'docker-compose.yaml')) as f:
+            compose = f.read()
+        assert re.search(r'^  redis:\n    image: redis', compose, re.M)
+        assert re.search(r'CACHE_BACKEND:\s+redis', compose)
+        assert compose.count('environment: *shared-cache') == 2, (
+            'Проверьте, что web и worker используют общий кэш'
+        )
@@ -0,0 +1,154 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+SIGNUP = '/api/v1/auth/signup/'
+TOKEN = '/api/v1/auth/token/'
+
+
+def writes(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith(('UPDATE', 'INSERT'))
+        and 'reviews_customuser' in query['sql']
+    ]
+
+
+@pytest.fixture
+def issued(monkeypatch):
+    codes = {}
+
+    def remember(email, confirm_code):
+        codes[email] = confirm_code
+
+    monkeypatch.setattr('api.views.send_confirm_code', remember)
+    return codes
+
+
+@pytest.fixture
+def shared_cache(settings):
+    settings.CONFIRM_CODE_IN_CACHE = True
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('shared_cache')
+class TestConfirmationCodes:
+
+    def test_no_user_writes(self, client, catalog, issued):
+        user = catalog['users'][0]
+        data = {'username': user.username, 'email': user.email}
+        with CaptureQueriesContext(connection) as context:
+            assert client.post(SIGNUP, data).status_code == 200
+            code = issued[user.email]
+            wrong = {'username': user.username, 'confirmation_code': 'x'}
+            assert client.post(TOKEN, wrong).status_code == 400
+            right = {'username': user.username, 'confirmation_code': code}
+            assert client.post(TOKEN, right).status_code == 200
+        assert writes(context) == [], (
+            'Проверьте, что выдача и проверка кода не пишут в строку '
+            'пользователя'
+        )
+        user.refresh_from_db()
+        assert user.confirmation_code is None
+
+    def test_code_is_hashed_and_single_use(self, client, catalog, issued):
+        from api.confirmation import code_key
+        from django.core.cache import cache
+
+        user = catalog['users'][0]
+        client.post(SIGNUP, {'username': user.username, 'email': user.email})
+        code = issued[user.email]
+        assert code not in cache.get(code_key(user.username))
+        data = {'username': user.username, 'confirmation_code': code}
+        assert client.post(TOKEN, data).status_code == 200
+        assert client.post(TOKEN, data).status_code == 400, (
+            'Проверьте, что код подтверждения одноразовый'
+        )
+
+    def test_attempts_are_limited(self, client, catalog, issued, settings):
+        settings.CONFIRM_CODE_MAX_ATTEMPTS = 2
+        user = catalog['users'][0]
+        client.post(SIGNUP, {'username': user.username, 'email': user.email})
+        wrong = {'username': user.username, 'confirmation_code': 'x'}
+        for _ in range(2):
+            assert client.post(TOKEN, wrong).status_code == 400
+        right = {
+            'username': user.username,
+            'confirmation_code': issued[user.email],
+        }
+        assert client.post(TOKEN, right).status_code == 400, (
+            'Проверьте, что после исчерпания попыток код не принимается'
+        )
+
+    def test_code_expires(self, client, catalog, issued):
+        from api.confirmation import code_key
+        from django.core.cache import cache
+
+        user = catalog['users'][0]
+        client.post(SIGNUP, {'username': user.username, 'email': user.email})
+        cache.delete(code_key(user.username))
+        data = {
+            'username': user.username,
+            'confirmation_code': issued[user.email],
+        }
+        assert client.post(TOKEN, data).status_code == 400
+
+    def test_database_fallback(self, client, catalog, issued, monkeypatch):
+        from django.core.cache import cache
+
+        def unavailable(*args, **kwargs):
+            raise ConnectionError('cache is down')
+
+        user = catalog['users'][0]
+        with monkeypatch.context() as patch:
+            patch.setattr(cache, 'set_many', unavailable)
+            client.post(
+                SIGNUP, {'username': user.username, 'email': user.email}
+            )
+        code = issued[user.email]
+        user.refresh_from_db()
+        assert user.confirmation_code == code, (
+            'Проверьте, что без кэша код сохраняется в базе'
+        )
+        data = {'username': user.username, 'confirmation_code': code}
+        assert client.post(TOKEN, data).status_code == 200
+        assert client.post(TOKEN, data).status_code == 400
+
+    def test_cache_errors_on_check(self, client, catalog, issued,
+                                   monkeypatch):
+        class Unavailable:
+            def __getattr__(self, name):
+                raise ConnectionError('cache is down')
+
+        user = catalog['users'][0]
+        client.post(SIGNUP, {'username': user.username, 'email': user.email})
+        monkeypatch.setattr('api.confirmation.cache', Unavailable())
+        data = {
+            'username': user.username,
+            'confirmation_code': issued[user.email],
+        }
+        assert client.post(TOKEN, data).status_code == 400, (
+            'Проверьте, что недоступный кэш не приводит к ошибке 500'
+        )
+
+
+@pytest.mark.django_db
+class TestProcessLocalCache:
+
+    def test_code_survives_other_worker(self, client, catalog, issued,
+                                        settings):
+        from django.core.cache import cache
+
+        assert not settings.CONFIRM_CODE_IN_CACHE, (
+            'Проверьте, что с кэшем внутри процесса код хранится в базе'
+        )
+        user = catalog['users'][0]
+        client.post(SIGNUP, {'username': user.username, 'email': user.email})
+        # Запрос токена обслуживает другой воркер со своим кэшем.
+        cache.clear()
+        data = {
+            'username': user.username,
+            'confirmation_code': issued[user.email],
+        }
+        assert client.post(TOKEN, data).status_code == 200
+        assert client.post(TOKEN, data).status_code == 400
@@ -0,0 +1,236 @@
+import os
+import re
+
+import pytest
+from django.db import OperationalError, ProgrammingError, connection
+
+from .conftest import infra_dir_path
+
+
+class FakeConnection:
+    broken = False
+
+    def __init__(self):
+        self.closed = 0
+
+    def get_transaction_status(self):
+        from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+        return TRANSACTION_STATUS_IDLE
+
+    def cursor(self):
+        owner = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                return False
+
+            def execute(self, sql):
+                if owner.broken:
+                    raise OperationalError('server closed the connection')
+
+        return Cursor()
+
+    def close(self):
+        self.closed = 1
+
+
+class TestConnectionPool:
+
+    def make_pool(self, size=2, timeout=0.01):
+        from api_yamdb.postgresql_pool.base import ConnectionPool
+
+        return ConnectionPool(size, timeout)
+
+    def test_reuse(self):
+        pool = self.make_pool()
+        first = pool.get(FakeConnection)
+        pool.put(first)
+        assert pool.get(FakeConnection) is first, (
+            'Проверьте, что пул отдаёт возвращённое соединение повторно'
+        )
+        stats = pool.stats()
+        assert stats['opened'] == 1
+        assert stats['checkouts'] == 2
+        assert stats['used'] == 1
+
+    def test_exhausted(self):
+        pool = self.make_pool(size=1)
+        pool.get(FakeConnection)
+        with pytest.raises(OperationalError):
+            pool.get(FakeConnection)
+        assert pool.stats()['timeouts'] == 1
+
+    def test_discard_and_health_check(self, settings):
+        pool = self.make_pool()
+        broken = pool.get(FakeConnection)
+        pool.put(broken, discard=True)
+        assert broken.closed and pool.stats()['opened'] == 0
+
+        settings.DB_HEALTH_CHECK_INTERVAL = 0
+        stale = pool.get(FakeConnection)
+        stale.broken = True
+        pool.put(stale)
+        fresh = pool.get(FakeConnection)
+        assert fresh is not stale, (
+            'Проверьте, что неработающее соединение из пула заменяется'
+        )
+        assert stale.closed
+        stats = pool.stats()
+        assert (stats['opened'], stats['used'], stats['idle']) == (1, 1, 0)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestHealthCheck:
+
+    def test_unusable_connection_is_closed(self, client, monkeypatch):
+        client.get('/api/v1/genres/')
+        assert connection.connection is not None
+        monkeypatch.setattr(connection, 'is_usable', lambda: False)
+        connection.released_at = 0
+        closed = []
+        monkeypatch.setattr(
+            connection, 'close', lambda: closed.append(True)
+        )
+        client.get('/api/v1/genres/')
+        assert closed, (
+            'Проверьте, что простаивавшее соединение проверяется до запроса'
+        )
+
+
+@pytest.fixture
+def pool_backend():
+    """Соединения через api_yamdb.postgresql_pool к тестовой базе.
+
+    Псевдоним тот же, что у основного соединения, как у
+    ``connection.copy()``: по нему django.contrib.postgres находит
+    соединение при регистрации типов.
+    """
+    from django.db.utils import load_backend
+
+    from api_yamdb.postgresql_pool.base import pools
+
+    if connection.vendor != 'postgresql':
+        pytest.skip('Пул соединений проверяется на PostgreSQL')
+    backend = load_backend('api_yamdb.postgresql_pool')
+    wrappers = []
+
+    def connect():
+        wrapper = backend.DatabaseWrapper(
+            {
+                **connection.settings_dict,
+                'ENGINE': 'api_yamdb.postgresql_pool',
+                'POOL_SIZE': 1,
+                'POOL_TIMEOUT': 0.1,
+            },
+            alias=connection.alias,
+        )
+        wrappers.append(wrapper)
+        return wrapper
+
+    yield connect
+    for wrapper in wrappers:
+        wrapper.close()
+    pool = pools.pop(connection.alias, None)
+    if pool is not None:
+        pool.close_idle()
+
+
+def backend_pid(wrapper):
+    with wrapper.cursor() as cursor:
+        cursor.execute('SELECT pg_backend_pid()')
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+class TestPostgresPool:
+
+    def test_connection_is_reused(self, pool_backend):
+        wrapper = pool_backend()
+        pid = backend_pid(wrapper)
+        wrapper.close()
+        assert backend_pid(wrapper) == pid, (
+            'Проверьте, что закрытое соединение возвращается в пул и '
+            'выдаётся повторно'
+        )
+        stats = wrapper.pool.stats()
+        assert (stats['opened'], stats['checkouts']) == (1, 2)
+
+    def test_transaction_is_rolled_back(self, pool_backend):
+        from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+        wrapper = pool_backend()
+        with wrapper.cursor() as cursor:
+            cursor.execute('BEGIN')
+            cursor.execute('CREATE TEMPORARY TABLE pool_probe (id int)')
+        wrapper.close()
+        wrapper.ensure_connection()
+        assert (
+            wrapper.connection.get_transaction_status()
+            == TRANSACTION_STATUS_IDLE
+        )
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('pool_probe')")
+            assert cursor.fetchone() == (None,), (
+                'Проверьте, что незавершённая транзакция откатывается '
+                'при возврате соединения в пул'
+            )
+
+    def test_exhausted(self, pool_backend):
+        pool_backend().ensure_connection()
+        with pytest.raises(OperationalError):
+            pool_backend().ensure_connection()
+
+    def test_broken_connections_are_replaced(self, pool_backend, settings):
+        wrapper = pool_backend()
+        pid = backend_pid(wrapper)
+        with pytest.raises(ProgrammingError):
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT * FROM pool_missing_table')
+        wrapper.close()
+        assert wrapper.pool.stats()['opened'] == 0, (
+            'Проверьте, что соединение с ошибкой не возвращается в пул'
+        )
+        pid = backend_pid(wrapper)
+        wrapper.close()
+        settings.DB_HEALTH_CHECK_INTERVAL = 0
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_terminate_backend(%s)', [pid])
+        assert backend_pid(wrapper) != pid, (
+            'Проверьте, что разорванное сервером соединение из пула '
+            'заменяется новым'
+        )
+
+    def test_close_before_fork(self, pool_backend):
+        from api_yamdb.postgresql_pool.base import close_before_fork, pools
+
+        wrapper = pool_backend()
+        wrapper.ensure_connection()
+        used = wrapper.connection
+        close_before_fork([wrapper])
+        assert used.closed and connection.alias not in pools, (
+            'Проверьте, что выданное соединение закрывается, а не '
+            'возвращается в пул, который унаследуют воркеры'
+        )
+        wrapper.ensure_connection()
+        idle = wrapper.connection
+        wrapper.close()
+        close_before_fork([wrapper])
+        assert idle.closed, (
+            'Проверьте, что соединения, ждущие в пуле, тоже закрываются'
+        )
+
+
+class TestStartCommand:
+
+    def test_migrate_before_selftest(self):
+        path = os.path.join(infra_dir_path, 'docker-compose.yaml')
+        with open(path) as f:
+            commands = re.findall(r'manage\.py (\w+)', f.read())
+        assert commands.index('migrate') < commands.index('db_selftest'), (
+            'Проверьте, что контейнер web применяет миграции до проверки '
+            'таблиц, иначе новые таблицы не дадут ему запуститься'
+        )
@@ -0,0 +1,67 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+
+def content(response):
+    return b''.join(response.streaming_content)
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    def test_admin_only(self, client, catalog):
+        assert client.get('/api/v1/export/titles/').status_code == 401
+
+    def test_titles_ndjson(self, admin_client, catalog, settings):
+        settings.EXPORT_CHUNK_SIZE = 5
+        response = admin_client.get('/api/v1/export/titles/')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('application/x-ndjson')
+        rows = [json.loads(line) for line in content(response).splitlines()]
+        api = admin_client.get('/api/v1/titles/?limit=100').json()
+        assert sorted(rows, key=lambda row: row['id']) == sorted(
+            api['results'], key=lambda row: row['id']
+        ), 'Проверьте, что выгрузка совпадает с ответами API'
+
+    def test_reviews_csv_gzip(self, admin_client, catalog):
+        title = catalog['title']
+        response = admin_client.get(
+            f'/api/v1/export/reviews/?output=csv&title={title.id}',
+            HTTP_ACCEPT_ENCODING='gzip',
+        )
+        assert response['Content-Encoding'] == 'gzip'
+        text = gzip.decompress(content(response)).decode()
+        rows = list(csv.DictReader(io.StringIO(text)))
+        assert len(rows) == title.reviews.count()
+        assert {row['title'] for row in rows} == {str(title.id)}
+        assert sum(int(row['score']) for row in rows) == 58
+
+    def test_comments_by_category(self, admin_client, catalog):
+        from reviews.models import Comment
+
+        category = catalog['title'].category
+        response = admin_client.get(
+            f'/api/v1/export/comments/?category={category.slug}'
+        )
+        rows = content(response).splitlines()
+        assert len(rows) == Comment.objects.filter(
+            review__title__category=category
+        ).count()
+
+    def test_invalid_params(self, admin_client, catalog):
+        assert admin_client.get(
+            '/api/v1/export/users/'
+        ).status_code == 404
+        assert admin_client.get(
+            '/api/v1/export/titles/?output=xml'
+        ).status_code == 400
+        assert admin_client.get(
+            '/api/v1/export/reviews/?title=abc'
+        ).status_code == 400
+        assert admin_client.get(
+            '/api/v1/export/reviews/?category=missing'
+        ).status_code == 404
@@ -0,0 +1,152 @@
+import pytest
+
+TITLES = '/api/v1/titles/'
+
+
+def names(response):
+    return [title['name'] for title in response.json()['results']]
+
+
+@pytest.mark.django_db
+class TestFacetIndex:
+
+    def test_genres_intersect(self, client, catalog):
+        response = client.get(
+            TITLES, {'facets': '', 'genre': 'genre2,genre3', 'limit': 20}
+        )
+        assert response.status_code == 200
+        assert names(response) == [
+            'Произведение 03', 'Произведение 07', 'Произведение 11'
+        ], 'Проверьте, что жанры в фасетном режиме пересекаются'
+        assert response.json()['count'] == 3
+
+    def test_counts(self, client, catalog):
+        response = client.get(
+            TITLES, {'facets': 'genre,category', 'genre': 'genre1'}
+        )
+        facets = response.json()['facets']
+        assert facets == {
+            'genre': {'genre0': 9, 'genre1': 9, 'genre2': 6, 'genre3': 3},
+            'category': {'cat0': 3, 'cat1': 3, 'cat2': 3},
+        }, 'Проверьте счётчики по фасетам для текущего фильтра'
+
+    def test_category_and_year(self, client, catalog):
+        response = client.get(
+            TITLES,
+            {'facets': 'year', 'category': 'cat0,cat1', 'year': 2003},
+        )
+        assert names(response) == ['Произведение 03']
+        assert response.json()['facets']['year'] == {
+            '2000': 1, '2001': 1, '2003': 1, '2004': 1,
+            '2006': 1, '2007': 1, '2009': 1, '2010': 1,
+        }
+
+    def test_matches_sql_filters(self, client, catalog, settings):
+        params = {'facets': '', 'genre': 'genre1', 'category': 'cat1'}
+        expected = names(client.get(TITLES, params))
+        settings.FACET_MAX_IDS = 0
+        params['limit'] = 10
+        assert names(client.get(TITLES, params)) == expected, (
+            'Проверьте, что без списка id фильтры работают так же'
+        )
+
+    def test_invalid_year(self, client, catalog):
+        response = client.get(TITLES, {'facets': '', 'year': 'abc'})
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+class TestFacetIndexUpdates:
+
+    def test_incremental_update(self, admin_client, catalog, monkeypatch):
+        from api.facets import FacetIndex, get_index
+
+        get_index()
+
+        def rebuild(self, generation):
+            raise AssertionError('Индекс не должен перестраиваться')
+
+        monkeypatch.setattr(FacetIndex, 'rebuild', rebuild)
+        response = admin_client.post(TITLES, {
+            'name': 'Новое', 'year': 1999, 'description': 'Описание',
+            'category': 'cat2', 'genre': ['genre0', 'genre3'],
+        })
+        assert response.status_code == 201
+        facets = admin_client.get(
+            TITLES, {'facets': '', 'year': 1999}
+        ).json()['facets']
+        assert facets['genre'] == {'genre0': 1, 'genre3': 1}, (
+            'Проверьте, что индекс обновляется по сигналам'
+        )
+        admin_client.delete(f'{TITLES}{response.json()["id"]}/')
+        facets = admin_client.get(TITLES, {'facets': ''}).json()['facets']
+        assert '1999' not in facets['year']
+
+    def test_rebuild_after_bulk(self, admin_client, catalog):
+        admin_client.get(TITLES, {'facets': ''})
+        response = admin_client.post(f'{TITLES}bulk/', [{
+            'name': 'Пакет', 'year': 1990, 'description': 'Описание',
+            'category': 'cat0', 'genre': ['genre1'],
+        }], format='json')
+        assert response.status_code == 200
+        facets = admin_client.get(
+            TITLES, {'facets': 'genre', 'year': 1990}
+        ).json()['facets']
+        assert facets == {'genre': {'genre1': 1}}
+
+    def test_other_worker_catches_up(self, client, catalog, monkeypatch):
+        from api.facets import FacetIndex, get_index
+        from reviews.models import Title
+
+        index, generation = get_index()
+        stale = FacetIndex()
+        stale.rebuild(generation)
+        title = Title.objects.create(
+            name='Из другого воркера', year=1980, description='Описание',
+            category=catalog['categories'][1],
+        )
+        title.genre.set(catalog['genres'][2:])
+        # Этот процесс построил индекс до записи и узнаёт о ней только
+        # из общего кэша.
+        monkeypatch.setattr('api.facets._index', stale)
+
+        def rebuild(self, generation):
+            raise AssertionError('Индекс не должен перестраиваться')
+
+        monkeypatch.setattr(FacetIndex, 'rebuild', rebuild)
+        response = client.get(
+            TITLES, {'facets': '', 'genre': 'genre3', 'year': 1980}
+        )
+        assert names(response) == ['Из другого воркера'], (
+            'Проверьте, что индекс догоняет изменения других процессов'
+        )
+        assert response.json()['count'] == 1
+
+    def test_missing_change_rebuilds(self, client, catalog):
+        from api.facets import change_key, get_index
+        from django.core.cache import cache
+        from reviews.models import Title
+
+        _, generation = get_index()
+        Title.objects.filter(pk=catalog['titles'][0].pk).update(year=1970)
+        catalog['titles'][1].save()
+        cache.delete(change_key(generation + 1))
+        response = client.get(TITLES, {'facets': '', 'year': 1970})
+        assert names(response) == ['Произведение 00']
+
+    def test_stale_index_uses_sql(self, client, catalog, monkeypatch):
+        from api import facets
+
+        index, generation = facets.get_index()
+        index.titles.clear()
+        index.all = 0
+        monkeypatch.setattr(
+            facets, 'get_index', lambda: (index, generation - 1)
+        )
+        response = client.get(
+            TITLES, {'facets': '', 'genre': 'genre3', 'limit': 20}
+        )
+        assert names(response) == [
+            'Произведение 03', 'Произведение 07', 'Произведение 11'
+        ], 'Проверьте, что устаревший индекс не фильтрует строки'
+        assert response.json()['count'] == 3
@@ -0,0 +1,97 @@
+import datetime
+import uuid
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+
+
+@pytest.mark.django_db
+class TestFastReaders:
+
+    def get_both(self, client, settings, url):
+        responses = []
+        for fast in (False, True):
+            settings.FAST_READERS = fast
+            cache.clear()
+            response = client.get(url)
+            assert response.status_code == 200, url
+            responses.append(response.content)
+        return responses
+
+    def test_responses_are_identical(self, client, settings, catalog):
+        from reviews.models import Comment, Title
+
+        title = catalog['title']
+        review = catalog['review']
+        orphan = Title.objects.create(
+            name='Без категории   "кавычки"', year=1999,
+            description='строка\nс\tуправляющими \x01 символами',
+        )
+        Comment.objects.filter(pk=review.comments.first().pk).update(
+            pub_date=timezone.now().replace(microsecond=123456)
+        )
+        urls = [
+            '/api/v1/titles/',
+            '/api/v1/titles/?pagination=cursor&ordering=-rating',
+            f'/api/v1/titles/{title.id}/',
+            f'/api/v1/titles/{orphan.id}/',
+            f'/api/v1/titles/{title.id}/reviews/',
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/',
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+            f'?pagination=cursor',
+            '/api/v1/genres/genre0/top/',
+        ]
+        for url in urls:
+            slow, fast = self.get_both(client, settings, url)
+            assert slow == fast, (
+                f'Проверьте, что быстрое чтение {url} совпадает с '
+                f'сериализатором байт в байт'
+            )
+
+    def test_fast_reader_queries(
+        self, client, settings, catalog, estimate_queries,
+        django_assert_max_num_queries
+    ):
+        settings.FAST_READERS = True
+        with django_assert_max_num_queries(3 + estimate_queries):
+            client.get('/api/v1/titles/?limit=12')
+
+    def test_benchmark(self, catalog):
+        output = StringIO()
+        call_command('benchmark_readers', repeat=1, stdout=output)
+        assert 'titles x12' in output.getvalue()
+        assert 'comments x' in output.getvalue()
+
+
+class TestFastJSONRenderer:
+
+    def test_same_bytes(self):
+        from api.renderers import FastJSONRenderer
+        from rest_framework.renderers import JSONRenderer
+
+        data = {
+            'text': 'юникод    \x00\x1f\x7f "\\/ emoji \U0001f600',
+            'date': datetime.datetime(
+                2020, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc
+            ),
+            'day': datetime.date(2020, 1, 2),
+            'time': datetime.time(3, 4, 5, 678901),
+            'decimal': Decimal('1.50'),
+            'uuid': uuid.UUID(int=1),
+            'lazy': gettext_lazy('Invalid cursor'),
+            'numbers': [0, -1, 2 ** 62, 1.5, 0.1, True, None],
+            'nested': [{'a': []}, {}],
+        }
+        for item in (data, [data], {1: 'нестроковый ключ'}, 'строка', None):
+            assert FastJSONRenderer().render(item) == JSONRenderer().render(
+                item
+            )
+        assert FastJSONRenderer().render(
+            data, 'application/json; indent=2'
+        ) == JSONRenderer().render(data, 'application/json; indent=2')
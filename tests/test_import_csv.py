@@ -0,0 +1,103 @@
+from io import StringIO
+from os.path import abspath, dirname, join
+
+import pytest
+from django.core.management import call_command
+
+CSV_DIR = join(dirname(abspath(__file__)), 'fixtures', 'csv')
+
+
+def import_csv(**options):
+    out = StringIO()
+    call_command(
+        'import_csv', path=CSV_DIR, workers=1, stdout=out, stderr=StringIO(),
+        **options
+    )
+    return out.getvalue()
+
+
+def stored_rows():
+    from reviews.models import (Category, Comment, CustomUser, Genre, Review,
+                                Title, TitleGenre, TitleStatistics)
+
+    return {
+        'users': set(CustomUser.objects.values_list('id', flat=True)),
+        'categories': set(Category.objects.values_list('id', flat=True)),
+        'genres': set(Genre.objects.values_list('id', flat=True)),
+        'titles': set(Title.objects.values_list('id', flat=True)),
+        'links': set(TitleGenre.objects.values_list('title_id', 'genre_id')),
+        'reviews': set(Review.objects.values_list('id', flat=True)),
+        'comments': set(Comment.objects.values_list('id', flat=True)),
+        'statistics': set(
+            TitleStatistics.objects.values_list('title_id', flat=True)
+        ),
+    }
+
+
+@pytest.mark.django_db
+class TestImportCsv:
+
+    def test_skips_orphans_and_duplicates(self):
+        from reviews.models import CustomUser
+
+        import_csv()
+        assert stored_rows() == {
+            'users': {100, 101},
+            'categories': {1},
+            'genres': {1, 2},
+            'titles': {1, 2},
+            'links': {(1, 1), (1, 2), (2, 1)},
+            'reviews': {1, 2, 3},
+            'comments': {1},
+            'statistics': {1, 2},
+        }, (
+            'Проверьте, что строки со ссылками на отсутствующие записи '
+            'и повторы пропускаются, как и комментарии к пропущенным '
+            'отзывам'
+        )
+        assert CustomUser.objects.get(pk=101).bio == 'Пишет рецензии', (
+            'Проверьте, что из повторяющихся строк загружается первая'
+        )
+
+    def test_recomputes_ratings_and_statistics(self):
+        from reviews.models import Title, TitleStatistics
+
+        import_csv()
+        title = Title.objects.get(pk=1)
+        assert (title.rating_sum, title.review_count) == (12, 2), (
+            'Проверьте, что после загрузки рейтинги пересчитываются '
+            'по отзывам'
+        )
+        assert title.rating_avg == 6
+        statistics = TitleStatistics.objects.get(title_id=1)
+        assert (
+            statistics.score_8, statistics.score_4, statistics.comment_count
+        ) == (1, 1, 1), (
+            'Проверьте, что после загрузки сводки произведений '
+            'пересобираются'
+        )
+        assert TitleStatistics.objects.get(title_id=2).score_10 == 1
+
+    def test_resume_inserts_nothing(self):
+        import_csv()
+        before = stored_rows()
+        output = import_csv()
+        assert stored_rows() == before
+        imported = [
+            line for line in output.splitlines()
+            if '.csv:' in line and ' 0 imported' not in line
+        ]
+        assert not imported, (
+            'Проверьте, что повторный запуск пропускает уже загруженные '
+            'строки:\n' + '\n'.join(imported)
+        )
+
+    def test_dry_run_writes_nothing(self):
+        output = import_csv(dry_run=True)
+        assert 'titles.csv: 2 imported, 1 skipped' in output, (
+            'Проверьте, что с --dry-run файлы всё равно читаются '
+            'и проверяются'
+        )
+        assert not any(stored_rows().values()), (
+            'Проверьте, что с --dry-run в базу ничего не записывается'
+        )
@@ -0,0 +1,82 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count
+
+
+@pytest.mark.django_db
+class TestLoadTools:
+
+    def test_seed_data(self):
+        from reviews.models import Comment, Review, Title, TitleStatistics
+
+        call_command(
+            'seed_data', users=20, categories=2, genres=3, titles=30,
+            reviews=200, comments_per_review=1, workers=1,
+            database='default', stdout=StringIO(),
+        )
+        assert Title.objects.count() == 30
+        reviews = Review.objects.count()
+        assert 0 < reviews <= 200
+        assert Comment.objects.count() == reviews
+        title = Title.objects.filter(review_count__gt=0).first()
+        assert title.review_count == title.reviews.count(), (
+            'Проверьте, что после загрузки пересчитываются рейтинги'
+        )
+        assert TitleStatistics.objects.count() == 30
+        assert not Review.objects.values('title', 'author').annotate(
+            count=Count('id')
+        ).filter(count__gt=1).exists(), (
+            'Проверьте, что автор оставляет не больше одного отзыва'
+        )
+
+    def test_replay_traffic(self, catalog, tmp_path):
+        output = tmp_path / 'result.json'
+        trace = tmp_path / 'trace.jsonl'
+        call_command(
+            'replay_traffic', synthetic=60, save_trace=str(trace),
+            output=str(output), stdout=StringIO(),
+        )
+        result = json.loads(output.read_text())
+        assert result['total']['count'] == 60
+        assert result['total']['errors'] == 0
+        assert 'GET api:titles-list' in result['endpoints']
+        summary = result['endpoints']['GET api:titles-list']
+        assert summary['p50_ms'] <= summary['p95_ms'] <= summary['p99_ms']
+        assert len(trace.read_text().splitlines()) == 60
+
+        replayed = tmp_path / 'replayed.json'
+        call_command(
+            'replay_traffic', str(trace), output=str(replayed),
+            baseline=str(output), stdout=StringIO(),
+        )
+        assert json.loads(replayed.read_text())['total']['count'] == 60
+
+    def test_replay_write_throttling(self, catalog, tmp_path):
+        review = catalog['review']
+        entry = json.dumps({
+            'method': 'POST',
+            'path': (
+                f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+                'comments/'
+            ),
+            'user': catalog['users'][0].username,
+            'body': {'text': 'Комментарий'},
+        })
+        trace = tmp_path / 'trace.jsonl'
+        trace.write_text('\n'.join([entry] * 40))
+        output = tmp_path / 'result.json'
+        call_command(
+            'replay_traffic', str(trace), output=str(output),
+            stdout=StringIO(),
+        )
+        assert json.loads(output.read_text())['total']['client_errors'] == 0, (
+            'Проверьте, что при воспроизведении записи не ограничиваются'
+        )
+        call_command(
+            'replay_traffic', str(trace), output=str(output), throttle=True,
+            stdout=StringIO(),
+        )
+        assert json.loads(output.read_text())['total']['client_errors'] > 0
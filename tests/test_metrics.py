@@ -0,0 +1,75 @@
+import re
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    from api.metrics import Registry
+
+    registry = Registry()
+    monkeypatch.setattr('api.metrics.registry', registry)
+    return registry
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_server_timing(self, client, catalog, settings):
+        settings.METRICS_SAMPLE_RATE = 1
+        response = client.get('/api/v1/titles/')
+        timing = response['Server-Timing']
+        assert re.search(r'app;dur=[\d.]+', timing)
+        assert re.search(r'db;dur=[\d.]+;desc="\d+ queries"', timing), (
+            'Проверьте, что для выборки в Server-Timing есть время БД'
+        )
+        assert re.search(r'ser;dur=[\d.]+', timing)
+        settings.METRICS_SAMPLE_RATE = 0
+        timing = client.get('/api/v1/titles/')['Server-Timing']
+        assert 'db;' not in timing, (
+            'Проверьте, что подробные замеры делаются только для выборки'
+        )
+
+    def test_prometheus_endpoint(self, client, catalog, settings):
+        settings.METRICS_SAMPLE_RATE = 1
+        settings.CACHE_IS_SHARED = True
+        settings.DEBUG = True
+        for _ in range(3):
+            client.get('/api/v1/titles/')
+        client.get(f'/api/v1/titles/{catalog["title"].id}/reviews/')
+        text = client.get('/metrics').content.decode()
+        labels = 'route="api:titles-list",method="GET"'
+        assert (
+            f'yamdb_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3'
+            in text
+        ), 'Проверьте, что гистограмма задержки накапливается по маршрутам'
+        assert f'yamdb_request_duration_seconds_count{{{labels}}} 3' in text
+        queries = re.search(
+            rf'yamdb_db_queries_total{{{labels}}} (\d+)', text
+        )
+        assert queries and int(queries.group(1)) >= 3
+        assert 'route="api:reviews-list"' in text
+
+    def test_token(self, client, settings):
+        settings.METRICS_TOKEN = ''
+        assert client.get('/metrics').status_code == 403, (
+            'Проверьте, что без METRICS_TOKEN метрики не отдаются'
+        )
+        settings.METRICS_TOKEN = 'secret'
+        assert client.get('/metrics').status_code == 403
+        response = client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        assert response.status_code == 200
+
+    def test_process_label(self, client, settings):
+        settings.METRICS_TOKEN = 'secret'
+        settings.CACHE_IS_SHARED = False
+        client.get('/api/v1/genres/')
+        text = client.get(
+            '/metrics', HTTP_AUTHORIZATION='Bearer secret'
+        ).content.decode()
+        assert re.search(
+            r'yamdb_request_duration_seconds_count\{route="api:genres-list",'
+            r'method="GET",pid="\d+"\} 1', text
+        ), (
+            'Проверьте, что с кэшем внутри процесса ряды помечены pid '
+            'воркера'
+        )
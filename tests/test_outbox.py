@@ -0,0 +1,83 @@
+import smtplib
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+
+
+@pytest.mark.django_db
+class TestEmailOutbox:
+
+    def signup(self, client, number):
+        return client.post(
+            '/api/v1/auth/signup/',
+            data={'username': f'user{number}', 'email': f'u{number}@y.ru'},
+        )
+
+    def test_signup_does_not_send(self, client):
+        from reviews.models import OutboxEmail
+
+        response = self.signup(client, 1)
+        assert response.status_code == 200
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что регистрация не отправляет письмо в запросе'
+        )
+        assert OutboxEmail.objects.filter(recipient='u1@y.ru').exists(), (
+            'Проверьте, что письмо с кодом ставится в очередь'
+        )
+
+    def test_batch_uses_one_connection(self, client, monkeypatch):
+        from reviews.models import CustomUser, OutboxEmail
+        from reviews.outbox import deliver_pending
+
+        opened = []
+        monkeypatch.setattr(
+            EmailBackend, 'open', lambda self: opened.append(self),
+            raising=False,
+        )
+        for number in range(5):
+            self.signup(client, number)
+        assert deliver_pending() == (5, 0)
+        assert len(opened) == 1, (
+            'Проверьте, что пачка писем отправляется через одно соединение'
+        )
+        assert len(mail.outbox) == 5
+        user = CustomUser.objects.get(username='user3')
+        message = next(item for item in mail.outbox if item.to == [user.email])
+        code = message.body.split()[-1]
+        response = client.post(
+            '/api/v1/auth/token/',
+            data={'username': user.username, 'confirmation_code': code},
+        )
+        assert response.status_code == 200, (
+            'Проверьте, что в письме приходит действующий код подтверждения'
+        )
+        assert not OutboxEmail.objects.exists()
+
+    def test_failed_delivery_is_retried(self, client, monkeypatch):
+        from reviews.models import OutboxEmail
+        from reviews.outbox import deliver_pending
+
+        def fail(self, messages):
+            raise smtplib.SMTPServerDisconnected('down')
+
+        self.signup(client, 1)
+        with monkeypatch.context() as patch:
+            patch.setattr(EmailBackend, 'send_messages', fail)
+            assert deliver_pending() == (0, 1)
+        email = OutboxEmail.objects.get()
+        assert email.attempts == 1
+        assert email.next_attempt_at > email.created, (
+            'Проверьте, что повторная отправка откладывается'
+        )
+        assert deliver_pending() == (0, 0)
+        OutboxEmail.objects.update(next_attempt_at=email.created)
+        assert deliver_pending() == (1, 0)
+        assert len(mail.outbox) == 1
+
+    def test_stats(self, client, admin_client):
+        self.signup(client, 1)
+        response = admin_client.get('/api/v1/stats/outbox/')
+        assert response.status_code == 200
+        assert response.json()['email_outbox']['pending'] == 1
+        assert client.get('/api/v1/stats/outbox/').status_code == 401
@@ -0,0 +1,164 @@
+import pytest
+
+
+def walk(client, url, link):
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает статус 200'
+        )
+        data = response.json()
+        assert 'count' not in data, (
+            'Проверьте, что в режиме курсорной пагинации не считается count'
+        )
+        pages.append([item['id'] for item in data['results']])
+        url = data[link]
+    return pages
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+
+    def test_comments_forward_and_back(self, client, catalog):
+        url = (
+            f'/api/v1/titles/{catalog["title"].id}/reviews/'
+            f'{catalog["review"].id}/comments/'
+        )
+        response = client.get(f'{url}?limit=100')
+        expected = [item['id'] for item in response.json()['results']]
+        forward = walk(client, f'{url}?pagination=cursor&limit=5', 'next')
+        assert sum(forward, []) == expected, (
+            'Проверьте, что курсорная пагинация проходит все комментарии '
+            'в порядке `-pub_date` без пропусков и повторов'
+        )
+        last_page = client.get(f'{url}?pagination=cursor&limit=5').json()
+        while last_page['next']:
+            last_page = client.get(last_page['next']).json()
+        backward = walk(client, last_page['previous'], 'previous')
+        assert backward[::-1] == forward[:-1], (
+            'Проверьте, что ссылка `previous` возвращает предыдущие страницы'
+        )
+
+    def test_titles(self, client, catalog):
+        pages = walk(
+            client, '/api/v1/titles/?pagination=cursor&limit=5', 'next'
+        )
+        assert sum(pages, []) == [title.id for title in catalog['titles']]
+
+    def test_invalid_cursor(self, client, catalog):
+        response = client.get('/api/v1/titles/?cursor=broken')
+        assert response.status_code == 404
+
+    def test_offset_limit_is_capped(self, client, catalog, monkeypatch):
+        from api.pagination import OffsetPagination
+
+        monkeypatch.setattr(OffsetPagination, 'max_limit', 5)
+        data = client.get('/api/v1/titles/?limit=100000').json()
+        assert 'count' in data, (
+            'Проверьте, что offset-пагинация остаётся режимом по умолчанию'
+        )
+        assert len(data['results']) == 5, (
+            'Проверьте, что параметр `limit` ограничен сверху'
+        )
+
+
+@pytest.mark.django_db
+class TestCountModes:
+
+    def comments_url(self, catalog):
+        return (
+            f'/api/v1/titles/{catalog["title"].id}/reviews/'
+            f'{catalog["review"].id}/comments/'
+        )
+
+    def test_count_can_be_skipped(self, client, catalog):
+        data = client.get('/api/v1/titles/?count=false&limit=5').json()
+        assert 'count' not in data, (
+            'Проверьте, что `?count=false` отключает подсчёт записей'
+        )
+        assert len(data['results']) == 5
+        assert data['next'] is not None
+        data = client.get(data['next'].replace('offset=5', 'offset=10'))
+        assert data.json()['next'] is None
+
+    def test_maintained_counters(self, client, catalog):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        reviews = f'/api/v1/titles/{catalog["title"].id}/reviews/'
+        comments = self.comments_url(catalog)
+        client.get(comments)
+        for url in (reviews, comments):
+            with CaptureQueriesContext(connection) as context:
+                assert client.get(url).json()['count'] == 12
+            assert not any(
+                'COUNT' in query['sql'] for query in context.captured_queries
+            ), f'Проверьте, что count для `{url}` берётся из счётчика'
+
+    def test_stale_counter_does_not_hide_rows(self, client, catalog):
+        from api.cache import comment_count_key
+        from django.core.cache import cache
+
+        cache.set(comment_count_key(catalog['review'].id), 0)
+        data = client.get(self.comments_url(catalog) + '?limit=5').json()
+        assert data['count'] == 0
+        assert len(data['results']) == 5, (
+            'Проверьте, что устаревший счётчик не прячет записи'
+        )
+        assert data['next'] is not None
+
+    def test_estimate_above_threshold(self, client, catalog, monkeypatch,
+                                      settings):
+        settings.COUNT_ESTIMATE_THRESHOLD = 100
+        monkeypatch.setattr(
+            'api.pagination.estimate_count', lambda queryset: 5000
+        )
+        data = client.get('/api/v1/titles/?limit=5').json()
+        assert data['count'] == 5000
+        assert data['count_estimated'] is True
+        monkeypatch.setattr(
+            'api.pagination.estimate_count', lambda queryset: 50
+        )
+        data = client.get('/api/v1/titles/?limit=6').json()
+        assert data['count'] == 12, (
+            'Проверьте, что небольшие выборки считаются точно'
+        )
+        assert 'count_estimated' not in data
+
+    def test_count_from_facet_index(self, client, catalog):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        client.get('/api/v1/titles/?facets=genre&genre=genre1')
+        with CaptureQueriesContext(connection) as context:
+            data = client.get(
+                '/api/v1/titles/?facets=genre&genre=genre1&limit=3'
+            ).json()
+        assert data['count'] == 9
+        assert not any(
+            'COUNT' in query['sql'] for query in context.captured_queries
+        ), 'Проверьте, что в фасетном режиме count берётся из индекса'
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCommentCounter:
+
+    def test_follows_commits(self, client, catalog):
+        from reviews.models import Comment
+
+        url = (
+            f'/api/v1/titles/{catalog["title"].id}/reviews/'
+            f'{catalog["review"].id}/comments/'
+        )
+        assert client.get(url).json()['count'] == 12
+        Comment.objects.create(
+            review=catalog['review'], author=catalog['users'][0], text='1'
+        )
+        Comment.objects.filter(review=catalog['review']).first().delete()
+        Comment.objects.create(
+            review=catalog['review'], author=catalog['users'][1], text='2'
+        )
+        assert client.get(url).json()['count'] == 13, (
+            'Проверьте, что сигналы комментариев сдвигают счётчик'
+        )
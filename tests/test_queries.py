@@ -0,0 +1,62 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает статус 200'
+    )
+    return len(context)
+
+
+@pytest.mark.django_db
+class TestQueryBudget:
+
+    def assert_budget(self, client, url, budget):
+        # Прогревает счётчики, из которых пагинация берёт count.
+        client.get(url)
+        small_page = count_queries(client, f'{url}?limit=2')
+        full_page = count_queries(client, f'{url}?limit=100')
+        assert small_page == full_page, (
+            f'Количество запросов к БД для `{url}` не должно зависеть от '
+            f'размера страницы: {small_page} для 2 записей, '
+            f'{full_page} для 100 записей'
+        )
+        assert full_page <= budget, (
+            f'Запрос к `{url}` выполняет {full_page} запросов к БД, '
+            f'допустимо не больше {budget}'
+        )
+
+    def test_titles(self, client, catalog, estimate_queries):
+        self.assert_budget(client, '/api/v1/titles/', 3 + estimate_queries)
+
+    def test_title_detail(self, client, catalog, django_assert_max_num_queries):
+        with django_assert_max_num_queries(2):
+            client.get(f'/api/v1/titles/{catalog["title"].id}/')
+
+    def test_genres(self, client, catalog, estimate_queries):
+        self.assert_budget(client, '/api/v1/genres/', 2 + estimate_queries)
+
+    def test_categories(self, client, catalog, estimate_queries):
+        self.assert_budget(client, '/api/v1/categories/', 2 + estimate_queries)
+
+    def test_reviews(self, client, catalog):
+        self.assert_budget(
+            client, f'/api/v1/titles/{catalog["title"].id}/reviews/', 2
+        )
+
+    def test_comments(self, client, catalog):
+        self.assert_budget(
+            client,
+            f'/api/v1/titles/{catalog["title"].id}/reviews/'
+            f'{catalog["review"].id}/comments/',
+            2,
+        )
+
+    def test_users(self, admin_client, catalog, estimate_queries):
+        self.assert_budget(
+            admin_client, '/api/v1/users/', 2 + estimate_queries
+        )
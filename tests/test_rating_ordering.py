@@ -0,0 +1,92 @@
+import pytest
+
+
+@pytest.fixture
+def rated(catalog):
+    author = catalog['users'][0]
+    scores = {1: 9, 2: 3, 3: 10, 4: 7, 5: 9, 6: 1}
+    for index, score in scores.items():
+        catalog['titles'][index].reviews.create(
+            author=author, text='Отзыв', score=score
+        )
+    return catalog
+
+
+def ids(response):
+    assert response.status_code == 200
+    data = response.json()
+    if isinstance(data, dict):
+        data = data['results']
+    return [item['id'] for item in data]
+
+
+@pytest.mark.django_db
+class TestRatingOrdering:
+
+    def expected(self, catalog, titles=None):
+        from reviews.models import Title
+
+        titles = titles or catalog['titles']
+        ordered = Title.objects.filter(
+            id__in=[title.id for title in titles]
+        ).order_by('-rating_avg', 'id')
+        return list(ordered.values_list('id', flat=True))
+
+    def test_stored_rating(self, rated):
+        from reviews.models import Title
+
+        title = Title.objects.get(id=rated['title'].id)
+        assert title.rating_avg == pytest.approx(58 / 12)
+        review = title.reviews.first()
+        review.delete()
+        title.refresh_from_db()
+        assert title.rating_avg == pytest.approx(
+            (58 - review.score) / 11
+        ), 'Проверьте, что средняя оценка пересчитывается при удалении'
+        title.reviews.all().delete()
+        title.refresh_from_db()
+        assert title.rating_avg == 0
+
+    def test_ordering_offset_and_cursor(self, client, rated):
+        url = '/api/v1/titles/?ordering=-rating&limit=100'
+        expected = self.expected(rated)
+        assert ids(client.get(url)) == expected, (
+            'Проверьте, что список произведений сортируется по рейтингу'
+        )
+        pages, page_url = [], f'{url[:-3]}5&pagination=cursor'
+        while page_url:
+            data = client.get(page_url).json()
+            pages += [item['id'] for item in data['results']]
+            page_url = data['next']
+        assert pages == expected, (
+            'Проверьте, что курсорная пагинация учитывает параметр ordering'
+        )
+        years = ids(client.get('/api/v1/titles/?ordering=-year&limit=100'))
+        assert years == [title.id for title in rated['titles']][::-1]
+        response = client.get('/api/v1/titles/?ordering=description')
+        assert response.status_code == 400
+
+    def test_leaderboards(self, client, rated):
+        category = rated['categories'][0]
+        titles = [
+            title for title in rated['titles']
+            if title.category_id == category.id and title.id in {
+                rated['titles'][index].id for index in (0, 3, 6)
+            }
+        ]
+        response = client.get(f'/api/v1/categories/{category.slug}/top/')
+        assert ids(response) == self.expected(rated, titles), (
+            'Проверьте, что в рейтинг категории попадают только оценённые '
+            'произведения по убыванию рейтинга'
+        )
+        genre = rated['genres'][3]
+        response = client.get(f'/api/v1/genres/{genre.slug}/top/?limit=1')
+        assert ids(response) == [rated['titles'][3].id]
+
+    def test_leaderboard_follows_reviews(self, client, rated):
+        url = f'/api/v1/categories/{rated["categories"][0].slug}/top/?limit=1'
+        assert ids(client.get(url)) == [rated['titles'][3].id]
+        rated['titles'][3].reviews.get().delete()
+        assert ids(client.get(url)) == [rated['titles'][0].id], (
+            'Проверьте, что удаление отзыва сбрасывает кэш рейтинга'
+        )
@@ -0,0 +1,102 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+
+def title_rating(client, title):
+    response = client.get(f'/api/v1/titles/{title.id}/')
+    assert response.status_code == 200
+    return response.json()['rating']
+
+
+@pytest.mark.django_db
+class TestRatingCounters:
+
+    def test_create(self, admin_client, catalog):
+        title = catalog['titles'][1]
+        response = admin_client.post(
+            f'/api/v1/titles/{title.id}/reviews/',
+            data={'text': 'Отзыв', 'score': 7},
+        )
+        assert response.status_code == 201
+        title.refresh_from_db()
+        assert (title.rating_sum, title.review_count) == (7, 1), (
+            'Проверьте, что новый отзыв добавляется к счётчикам произведения'
+        )
+        assert title.rating_avg == 7
+        assert title_rating(admin_client, title) == 7
+
+    def test_update_score(self, admin_client, catalog):
+        title = catalog['titles'][1]
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        review_id = admin_client.post(
+            url, data={'text': 'Отзыв', 'score': 3}
+        ).json()['id']
+        response = admin_client.patch(
+            f'{url}{review_id}/', data={'score': 9}
+        )
+        assert response.status_code == 200
+        title.refresh_from_db()
+        assert (title.rating_sum, title.review_count) == (9, 1), (
+            'Проверьте, что при изменении оценки в сумме оценок старая '
+            'оценка заменяется новой'
+        )
+        assert title.rating_avg == 9
+        assert title_rating(admin_client, title) == 9
+
+    def test_delete_last_review(self, admin_client, catalog):
+        title = catalog['titles'][1]
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        review_id = admin_client.post(
+            url, data={'text': 'Отзыв', 'score': 5}
+        ).json()['id']
+        response = admin_client.delete(f'{url}{review_id}/')
+        assert response.status_code == 204
+        title.refresh_from_db()
+        assert (title.rating_sum, title.review_count) == (0, 0), (
+            'Проверьте, что удалённый отзыв вычитается из счётчиков'
+        )
+        assert title.rating_avg == 0
+        assert title_rating(admin_client, title) is None, (
+            'Проверьте, что у произведения без отзывов рейтинг равен None'
+        )
+
+
+@pytest.mark.django_db
+class TestRecomputeRatings:
+
+    def corrupt(self, catalog):
+        from reviews.models import Title
+
+        title = catalog['title']
+        title.refresh_from_db()
+        expected = (title.rating_sum, title.review_count, title.rating_avg)
+        Title.objects.filter(pk=title.pk).update(
+            rating_sum=1, review_count=100, rating_avg=0.01
+        )
+        return title, expected
+
+    def test_recompute_fixes_counters(self, catalog):
+        title, expected = self.corrupt(catalog)
+        call_command('recompute_ratings', batch_size=5)
+        title.refresh_from_db()
+        assert (
+            title.rating_sum, title.review_count, title.rating_avg
+        ) == expected == (58, 12, 58 / 12), (
+            'Проверьте, что recompute_ratings пересчитывает счётчики '
+            'по отзывам'
+        )
+        other = catalog['titles'][1]
+        other.refresh_from_db()
+        assert (other.rating_sum, other.review_count) == (0, 0)
+
+    def test_check_reports_without_fixing(self, catalog):
+        title, expected = self.corrupt(catalog)
+        with pytest.raises(CommandError):
+            call_command('recompute_ratings', check=True)
+        title.refresh_from_db()
+        assert (title.rating_sum, title.review_count) == (1, 100), (
+            'Проверьте, что с --check команда ничего не записывает'
+        )
+        call_command('recompute_ratings')
+        call_command('recompute_ratings', check=True)
@@ -0,0 +1,133 @@
+import pytest
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.fixture
+def replica(settings, monkeypatch):
+    # Реплика смотрит в ту же тестовую базу, поэтому по ней видно
+    # только, куда ушли запросы.
+    monkeypatch.setattr('api.replicas._replica_state', {})
+    alias = 'replica1'
+    connections.databases[alias] = {
+        **connections.databases['default'], 'TEST': {'MIRROR': 'default'}
+    }
+    settings.DATABASE_REPLICAS = [alias]
+    yield alias
+    connections[alias].close()
+    del connections.databases[alias]
+    delattr(connections._connections, alias)
+
+
+def capture(alias):
+    return CaptureQueriesContext(connections[alias])
+
+
+@pytest.fixture
+def token_client(client, catalog):
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    user = catalog['users'][0]
+    client.defaults['HTTP_AUTHORIZATION'] = (
+        f'Bearer {AccessToken.for_user(user)}'
+    )
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReplicaRouting:
+
+    def test_reads_go_to_replica(self, client, catalog, replica):
+        title = catalog['title']
+        with capture('default') as primary, capture(replica) as read:
+            response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert response.status_code == 200
+        assert len(read) > 0, 'Проверьте, что чтение идёт на реплику'
+        assert len(primary) == 0
+
+    def test_writes_stick_to_primary(self, token_client, catalog, replica):
+        title = catalog['titles'][1]
+        with capture(replica) as read:
+            response = token_client.post(
+                f'/api/v1/titles/{title.id}/reviews/',
+                {'text': 'Новый отзыв', 'score': 7},
+                content_type='application/json',
+            )
+        assert response.status_code == 201
+        assert len(read) == 0, 'Проверьте, что запись не читает с реплики'
+        with capture('default') as primary, capture(replica) as read:
+            token_client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert len(read) == 0 and len(primary) > 0, (
+            'Проверьте, что после записи клиент читает с основной базы'
+        )
+
+    def test_lagging_replica_is_skipped(
+        self, client, catalog, replica, monkeypatch, settings
+    ):
+        settings.REPLICA_CHECK_INTERVAL = 0
+        monkeypatch.setattr('api.replicas.replica_lag', lambda alias: 60)
+        with capture('default') as primary, capture(replica) as read:
+            client.get('/api/v1/titles/')
+        assert len(read) == 0 and len(primary) > 0, (
+            'Проверьте, что отстающая реплика не используется'
+        )
+
+    def test_commands_use_primary(self, catalog, replica):
+        from reviews.models import Title
+
+        with capture(replica) as read:
+            Title.objects.count()
+        assert len(read) == 0
+
+    def test_cache_after_write(self, token_client, catalog, replica):
+        title = catalog['titles'][1]
+        url = f'/api/v1/titles/{title.id}/'
+        assert token_client.get(url)['X-Cache'] == 'MISS'
+        token_client.post(
+            f'/api/v1/titles/{title.id}/reviews/',
+            {'text': 'Новый отзыв', 'score': 7},
+            content_type='application/json',
+        )
+        response = token_client.get(url)
+        assert response['X-Cache'] == 'BYPASS', (
+            'Проверьте, что недавно писавший клиент не читает кэш ответов'
+        )
+        assert response.json()['rating'] == 7
+
+    def test_replica_responses_expire_quickly(self, client, catalog,
+                                              replica, monkeypatch):
+        from django.core.cache import cache
+
+        timeouts = []
+        set_value = cache.set
+
+        def remember(key, value, timeout=None, **kwargs):
+            if key.startswith('catalog:titles:'):
+                timeouts.append(timeout)
+            return set_value(key, value, timeout, **kwargs)
+
+        monkeypatch.setattr(cache, 'set', remember)
+        client.get('/api/v1/titles/')
+        assert timeouts == [2], (
+            'Проверьте, что ответ, собранный на реплике, живёт в кэше не '
+            'дольше допустимого отставания'
+        )
+
+    def test_sticky_cookie(self, client, catalog, replica, settings):
+        from api.replicas import STICKY_COOKIE
+        from django.core.cache import cache
+
+        response = client.post(
+            '/api/v1/auth/signup/',
+            {'username': 'new0', 'email': 'new0@yamdb.fake'},
+        )
+        assert response.status_code == 200
+        assert STICKY_COOKIE in response.cookies
+        # Следующий запрос обслуживает воркер, не видевший метку в кэше.
+        cache.clear()
+        with capture('default') as primary, capture(replica) as read:
+            client.get('/api/v1/titles/')
+        assert len(read) == 0 and len(primary) > 0, (
+            'Проверьте, что после записи клиент читает с основной базы и '
+            'на другом воркере'
+        )
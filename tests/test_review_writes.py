@@ -0,0 +1,48 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+class TestReviewWrites:
+
+    def test_create_review_queries(self, admin_client, catalog):
+        url = f'/api/v1/titles/{catalog["titles"][1].id}/reviews/'
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.post(
+                url, data={'text': 'Отзыв', 'score': 8}
+            )
+        assert response.status_code == 201
+        selects = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT')
+        ]
+        assert len(selects) == 1, (
+            'Проверьте, что при создании отзыва произведение загружается '
+            'один раз и нет отдельной проверки уникальности:\n'
+            + '\n'.join(selects)
+        )
+
+    def test_duplicate_review(self, admin_client, catalog):
+        url = f'/api/v1/titles/{catalog["titles"][1].id}/reviews/'
+        admin_client.post(url, data={'text': 'Отзыв', 'score': 8})
+        response = admin_client.post(url, data={'text': 'Ещё', 'score': 2})
+        assert response.status_code == 400
+        assert response.json() == {
+            'non_field_errors': ['Можно оставлять только один отзыв!']
+        }
+        title = catalog['titles'][1]
+        title.refresh_from_db()
+        assert (title.rating_sum, title.review_count) == (8, 1)
+
+    def test_comment_checks_title(self, admin_client, catalog):
+        other = catalog['titles'][1]
+        url = f'/api/v1/titles/{other.id}/reviews/{catalog["review"].id}/'
+        assert admin_client.get(f'{url}comments/').status_code == 404, (
+            'Проверьте, что отзыв ищется только среди отзывов произведения '
+            'из URL'
+        )
+        response = admin_client.post(
+            f'{url}comments/', data={'text': 'Текст'}
+        )
+        assert response.status_code == 404
@@ -0,0 +1,48 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestTitleSearch:
+
+    def test_search_is_ranked(self, client, catalog):
+        from reviews.models import Title
+
+        exact = Title.objects.create(
+            name='Шоушенк', year=1994, description='Побег'
+        )
+        mention = Title.objects.create(
+            name='Тюремные истории', year=1990, description='Про Шоушенк'
+        )
+        response = client.get('/api/v1/titles/?search=шоушенк')
+        assert response.status_code == 200
+        ids = [item['id'] for item in response.json()['results']]
+        assert ids == [exact.id, mention.id], (
+            'Проверьте, что поиск находит произведения по названию и '
+            'описанию и ставит совпадения в названии выше'
+        )
+
+    def test_search_combines_with_filters(self, client, catalog):
+        title = catalog['titles'][5]
+        response = client.get(
+            f'/api/v1/titles/?search=Произведение&year={title.year}'
+            f'&category={title.category.slug}'
+        )
+        ids = [item['id'] for item in response.json()['results']]
+        assert ids == [title.id]
+
+    def test_search_follows_updates(self, client, catalog):
+        title = catalog['titles'][0]
+        title.name = 'Уникальное имя'
+        title.save()
+        response = client.get('/api/v1/titles/?search=уникальное')
+        ids = [item['id'] for item in response.json()['results']]
+        assert ids == [title.id]
+
+    def test_search_rejects_cursor(self, client, catalog):
+        for query in ('pagination=cursor', 'cursor=e30='):
+            response = client.get(f'/api/v1/titles/?search=Произведение&{query}')
+            assert response.status_code == 400, (
+                'Проверьте, что поиск вместе с keyset-пагинацией отклоняется: '
+                'курсор не сохраняет порядок по релевантности'
+            )
+            assert 'pagination' in response.json()
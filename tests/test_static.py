@@ -0,0 +1,51 @@
+import gzip
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.fixture
+def collected(settings, tmp_path):
+    settings.STATIC_ROOT = str(tmp_path)
+    call_command('collectstatic', interactive=False, verbosity=0)
+    return tmp_path
+
+
+@pytest.mark.django_db
+class TestStaticFiles:
+
+    def test_compressed_variants(self, collected):
+        from django.contrib.staticfiles.storage import staticfiles_storage
+
+        hashed = staticfiles_storage.stored_name('redoc.yaml')
+        assert hashed != 'redoc.yaml'
+        assert (collected / f'{hashed}.gz').exists(), (
+            'Проверьте, что collectstatic сохраняет сжатые копии файлов'
+        )
+
+    def test_served_compressed_and_immutable(self, client, collected):
+        from django.contrib.staticfiles.storage import staticfiles_storage
+
+        url = staticfiles_storage.url('redoc.yaml')
+        response = client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        assert response.status_code == 200
+        assert response['Content-Encoding'] == 'gzip', (
+            'Проверьте, что клиенту с gzip отдаётся сжатый файл'
+        )
+        assert 'Accept-Encoding' in response['Vary']
+        assert 'immutable' in response['Cache-Control'], (
+            'Проверьте, что файлы с хешем в имени кэшируются навсегда'
+        )
+        body = gzip.decompress(b''.join(response.streaming_content))
+        plain = client.get(url)
+        assert 'Content-Encoding' not in plain
+        assert b''.join(plain.streaming_content) == body
+
+    def test_docs_use_hashed_spec(self, client, collected):
+        from django.contrib.staticfiles.storage import staticfiles_storage
+
+        content = client.get('/redoc/').content.decode()
+        assert staticfiles_storage.url('redoc.yaml') in content, (
+            'Проверьте, что страница документации ссылается на версию '
+            'спецификации с хешем'
+        )
@@ -0,0 +1,98 @@
+import pytest
+from django.core.management import call_command
+
+
+def histogram(**counts):
+    return {str(score): counts.get(f's{score}', 0) for score in range(1, 11)}
+
+
+@pytest.mark.django_db
+class TestTitleStatistics:
+
+    def test_title_stats(self, client, catalog):
+        title = catalog['title']
+        response = client.get(f'/api/v1/titles/{title.id}/stats/')
+        assert response.status_code == 200
+        data = response.json()
+        scores = [review.score for review in title.reviews.all()]
+        assert data['review_count'] == 12
+        assert data['comment_count'] == 144
+        assert sum(data['histogram'].values()) == 12
+        assert data['mean'] == round(sum(scores) / len(scores), 2)
+        response = client.get('/api/v1/titles/100500/stats/')
+        assert response.status_code == 404
+
+    def test_incremental_updates(self, client, catalog):
+        title = catalog['titles'][1]
+        url = f'/api/v1/titles/{title.id}/stats/'
+        review = title.reviews.create(
+            author=catalog['users'][0], text='Отзыв', score=3
+        )
+        review.comments.create(author=catalog['users'][1], text='Ответ')
+        data = client.get(url).json()
+        assert data['histogram'] == histogram(s3=1)
+        assert data['comment_count'] == 1
+        review.score = 9
+        review.save()
+        assert client.get(url).json()['histogram'] == histogram(s9=1), (
+            'Проверьте, что изменение оценки переносит её в гистограмме'
+        )
+        review.delete()
+        data = client.get(url).json()
+        assert (data['review_count'], data['comment_count']) == (0, 0), (
+            'Проверьте, что удаление отзыва убирает его комментарии из сводки'
+        )
+        assert data['mean'] is None
+
+    def test_missing_row(self, client, admin_client, catalog):
+        from reviews.models import TitleStatistics
+
+        title = catalog['title']
+        url = f'/api/v1/titles/{title.id}/stats/'
+        expected = client.get(url).json()
+        TitleStatistics.objects.filter(title=title).delete()
+        response = admin_client.post(
+            f'/api/v1/titles/{title.id}/reviews/',
+            data={'text': 'Отзыв', 'score': 10},
+        )
+        assert response.status_code == 201
+        expected['histogram']['10'] += 1
+        expected['review_count'] += 1
+        data = client.get(url).json()
+        assert data['histogram'] == expected['histogram'], (
+            'Проверьте, что сводка без строки в базе пересчитывается '
+            'при первом изменении'
+        )
+        assert data['review_count'] == expected['review_count']
+        TitleStatistics.objects.filter(title=title).delete()
+        catalog['review'].comments.create(
+            author=catalog['users'][0], text='Ответ'
+        )
+        assert client.get(url).json()['comment_count'] == 145
+        title_id = title.id
+        title.delete()
+        statistics = TitleStatistics.objects.filter(title_id=title_id)
+        assert not statistics.exists(), (
+            'Проверьте, что при удалении произведения его сводка не создаётся '
+            'заново'
+        )
+
+    def test_rollups(self, client, catalog):
+        genre, category = catalog['genres'][0], catalog['categories'][0]
+        genre_data = client.get(f'/api/v1/genres/{genre.slug}/stats/').json()
+        category_data = client.get(
+            f'/api/v1/categories/{category.slug}/stats/'
+        ).json()
+        assert genre_data['title_count'] == genre.titles.count()
+        assert category_data['title_count'] == category.titles.count()
+        assert category_data['review_count'] == 12
+        assert category_data['comment_count'] == 144
+
+    def test_rebuild(self, client, catalog):
+        from reviews.models import TitleStatistics
+
+        url = f'/api/v1/titles/{catalog["title"].id}/stats/'
+        expected = client.get(url).json()
+        TitleStatistics.objects.update(score_1=100, comment_count=0)
+        call_command('rebuild_stats', batch_size=5, workers=1)
+        assert client.get(url).json() == expected
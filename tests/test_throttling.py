@@ -0,0 +1,134 @@
+import pytest
+from django.test import RequestFactory
+
+
+@pytest.fixture
+def rates(settings):
+    def set_rates(**rates):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {
+                **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'],
+                **rates,
+            },
+        }
+    return set_rates
+
+
+@pytest.mark.django_db
+class TestThrottling:
+
+    def test_token_attempts_per_username(self, client, catalog, rates):
+        rates(auth_user='3/min')
+        data = {'username': 'user0', 'confirmation_code': 'wrong'}
+        statuses = [
+            client.post('/api/v1/auth/token/', data).status_code
+            for _ in range(4)
+        ]
+        assert statuses == [400, 400, 400, 429], (
+            'Проверьте, что попытки получить токен ограничены по имени'
+        )
+        response = client.post('/api/v1/auth/token/', data)
+        assert int(response['Retry-After']) > 0
+        other = {'username': 'user1', 'confirmation_code': 'wrong'}
+        assert client.post('/api/v1/auth/token/', other).status_code == 400
+
+    def test_signup_per_ip(self, client, rates):
+        rates(auth_ip='2/min')
+        statuses = [
+            client.post(
+                '/api/v1/auth/signup/',
+                {'username': f'new{index}', 'email': f'new{index}@yamdb.fake'},
+                REMOTE_ADDR='10.0.0.1',
+            ).status_code
+            for index in range(3)
+        ]
+        assert statuses == [200, 200, 429]
+        assert client.post(
+            '/api/v1/auth/signup/',
+            {'username': 'new9', 'email': 'new9@yamdb.fake'},
+            REMOTE_ADDR='10.0.0.2',
+        ).status_code == 200
+
+    def test_non_object_body(self, client, rates):
+        for body in ('[]', '"user0"', '1'):
+            response = client.post(
+                '/api/v1/auth/token/', body, content_type='application/json'
+            )
+            assert response.status_code == 400, (
+                'Проверьте, что тело не в виде объекта не вызывает ошибку 500'
+            )
+
+    def test_client_address_from_proxy(self, client, rates):
+        rates(auth_ip='1/min')
+
+        def signup(index, forwarded):
+            return client.post(
+                '/api/v1/auth/signup/',
+                {'username': f'new{index}', 'email': f'new{index}@yamdb.fake'},
+                REMOTE_ADDR='172.18.0.5',
+                HTTP_X_FORWARDED_FOR=forwarded,
+            ).status_code
+
+        assert signup(0, '10.0.0.1') == 200
+        assert signup(1, '10.0.0.2') == 200, (
+            'Проверьте, что клиенты за nginx ограничиваются по своим адресам'
+        )
+        assert signup(2, '192.168.0.9, 10.0.0.1') == 429, (
+            'Проверьте, что подставленный клиентом X-Forwarded-For не '
+            'обходит ограничение'
+        )
+
+    def test_writes_per_user(self, catalog, rates):
+        from rest_framework.test import APIClient
+
+        rates(write_user='2/min')
+        client = APIClient()
+        client.force_authenticate(catalog['users'][1])
+        review = catalog['review']
+        url = (
+            f'/api/v1/titles/{review.title_id}/reviews/{review.id}/comments/'
+        )
+        statuses = [
+            client.post(url, {'text': 'Комментарий'}).status_code
+            for _ in range(3)
+        ]
+        assert statuses == [201, 201, 429]
+        assert client.get(url).status_code == 200, (
+            'Проверьте, что чтение не ограничивается'
+        )
+
+    def test_rejection_counters(self, admin_client, client, rates, settings):
+        rates(auth_ip='1/min')
+        settings.METRICS_TOKEN = 'secret'
+        settings.CACHE_IS_SHARED = True
+        for _ in range(3):
+            client.post('/api/v1/auth/signup/', {})
+        response = admin_client.get('/api/v1/stats/throttle/')
+        assert response.json()['rejected']['auth_ip'] == 2
+        assert (
+            'yamdb_rejected_requests_total{reason="auth_ip"} 2'
+            in client.get(
+                '/metrics', HTTP_AUTHORIZATION='Bearer secret'
+            ).content.decode()
+        )
+
+
+class TestConcurrencyLimit:
+
+    def test_overload_is_rejected(self, settings):
+        from api.throttling import ConcurrencyLimitMiddleware
+        from django.http import HttpResponse
+
+        settings.MAX_CONCURRENT_REQUESTS = 1
+        responses = []
+
+        def view(request):
+            # Второй запрос приходит, пока первый ещё обрабатывается.
+            responses.append(middleware(RequestFactory().get('/')))
+            return HttpResponse('ok')
+
+        middleware = ConcurrencyLimitMiddleware(view)
+        assert middleware(RequestFactory().get('/')).status_code == 200
+        assert responses[0].status_code == 503
+        assert responses[0]['Retry-After'] == '1'
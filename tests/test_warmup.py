@@ -0,0 +1,129 @@
+import logging
+import os
+import runpy
+import types
+
+import pytest
+from django.db import DatabaseError
+
+from .conftest import root_dir
+
+GUNICORN_CONF = os.path.join(root_dir, 'api_yamdb', 'gunicorn.conf.py')
+
+
+@pytest.fixture
+def state(monkeypatch):
+    state = {'status': 'pending'}
+    monkeypatch.setattr('api.warmup.state', state)
+    return state
+
+
+@pytest.mark.django_db
+class TestWarmUp:
+
+    def test_prepare_without_database(self, state,
+                                      django_assert_num_queries):
+        from api.warmup import prepare
+
+        with django_assert_num_queries(0):
+            prepare()
+        assert state['urls'] > 0
+        assert state['serializers'] >= 10, (
+            'Проверьте, что прогреваются все сериализаторы API'
+        )
+        assert state['errors'] == []
+
+    def test_routes(self, state, catalog):
+        from api.warmup import warm_up
+
+        warm_up()
+        assert state['status'] == 'ready'
+        assert state['errors'] == []
+        title = catalog['title']
+        assert state['routes']['/api/v1/titles/'] == 200
+        assert state['routes'][f'/api/v1/titles/{title.id}/reviews/'] == 200
+        comments = [
+            status for url, status in state['routes'].items()
+            if url.endswith('/comments/')
+        ]
+        assert comments == [200], (
+            'Проверьте, что прогреваются и вложенные маршруты'
+        )
+        assert state['routes']['/api/v1/users/'] == 401
+
+    def test_empty_database(self, state):
+        from api.warmup import warm_up
+
+        warm_up()
+        assert list(state['routes']) == [
+            '/api/v1/titles/', '/api/v1/genres/',
+            '/api/v1/categories/', '/api/v1/users/',
+        ]
+
+
+@pytest.mark.django_db
+class TestHealth:
+
+    def test_live(self, client, state):
+        response = client.get('/health/live')
+        assert response.status_code == 200
+        assert response.json()['status'] == 'alive'
+
+    def test_ready_after_warm_up(self, client, state):
+        from api.warmup import warm_up
+
+        response = client.get('/health/ready')
+        assert response.status_code == 503, (
+            'Проверьте, что до прогрева воркер не готов'
+        )
+        assert response.json()['status'] == 'pending'
+        warm_up()
+        response = client.get('/health/ready')
+        assert response.status_code == 200
+        assert response.json()['status'] == 'ready'
+        assert 'no-cache' in response['Cache-Control']
+
+    def test_ready_without_database(self, client, state, monkeypatch):
+        from api.warmup import warm_up
+        from django.db import connection
+
+        warm_up()
+
+        def unavailable():
+            raise DatabaseError('connection refused')
+
+        monkeypatch.setattr(connection, 'cursor', unavailable)
+        response = client.get('/health/ready')
+        assert response.status_code == 503
+        assert response.json()['status'] == 'database unavailable'
+
+
+class TestGunicornConfig:
+
+    def test_sizing(self, monkeypatch):
+        for name in ('GUNICORN_WORKERS', 'GUNICORN_THREADS',
+                     'GUNICORN_PRELOAD'):
+            monkeypatch.delenv(name, raising=False)
+        config = runpy.run_path(GUNICORN_CONF)
+        assert config['workers'] == config['cpu_count']() + 1
+        assert config['threads'] == 2
+        assert config['preload_app'] is True
+        assert config['max_requests'] > 0
+        assert config['max_requests_jitter'] > 0
+        monkeypatch.setenv('GUNICORN_WORKERS', '3')
+        assert runpy.run_path(GUNICORN_CONF)['workers'] == 3
+
+    def test_memory_limit(self, monkeypatch):
+        monkeypatch.delenv('GUNICORN_MAX_MEMORY', raising=False)
+        worker = types.SimpleNamespace(
+            alive=True, log=logging.getLogger('gunicorn')
+        )
+        config = runpy.run_path(GUNICORN_CONF)
+        config['post_request'](worker, None, {}, None)
+        assert worker.alive, 'Без GUNICORN_MAX_MEMORY воркер не перезапускается'
+        monkeypatch.setenv('GUNICORN_MAX_MEMORY', '1')
+        config = runpy.run_path(GUNICORN_CONF)
+        config['post_request'](worker, None, {}, None)
+        assert not worker.alive, (
+            'Проверьте, что воркер сверх лимита памяти перезапускается'
+        )